@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Job, JobApplication, SavedJob
+from .models import Job, JobApplication, Recommendation, Review, SavedJob, Tombstone
 
 
 # Admin for Job
@@ -8,6 +8,7 @@ class JobAdmin(admin.ModelAdmin):
     list_display = ('title', 'posted_by', 'job_date', 'payment', 'applicants_needed')
     search_fields = ('title', 'location', 'posted_by__user__username')
     list_filter = ('job_date', 'date_posted')
+    list_select_related = ('posted_by__user',)
 
 # Admin for JobApplication
 @admin.register(JobApplication)
@@ -15,9 +16,31 @@ class JobApplicationAdmin(admin.ModelAdmin):
     list_display = ('job', 'applicant', 'status')
     search_fields = ('job__title', 'applicant__user__username')
     list_filter = ('status',)
+    list_select_related = ('job', 'applicant__user')
 
 # Admin for SavedJob
 @admin.register(SavedJob)
 class SavedJobAdmin(admin.ModelAdmin):
     list_display = ('user', 'job', 'saved_on')
     search_fields = ('user__user__username', 'job__title')
+    list_select_related = ('user__user', 'job')
+
+# Admin for Review
+@admin.register(Review)
+class ReviewAdmin(admin.ModelAdmin):
+    list_display = ('reviewee', 'reviewer', 'rating', 'created_at')
+    list_filter = ('rating',)
+    list_select_related = ('reviewee__user', 'reviewer__user')
+
+# Admin for Tombstone
+@admin.register(Tombstone)
+class TombstoneAdmin(admin.ModelAdmin):
+    list_display = ('model', 'object_id', 'deleted_at')
+    list_filter = ('model',)
+
+# Admin for Recommendation
+@admin.register(Recommendation)
+class RecommendationAdmin(admin.ModelAdmin):
+    list_display = ('profile', 'computed_at')
+    list_select_related = ('profile__user',)
+    readonly_fields = ('job_ids', 'scores', 'computed_at')
@@ -0,0 +1,133 @@
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from . import listing_cache
+from .models import Job, JobApplication, adjust_job_counters
+
+
+class JobFilled(Exception):
+    """The job already has as many accepted applicants as it needs."""
+
+
+def accept_application(application_id, poster_user_id=None):
+    """
+    Accept one application without ever over-filling its job.
+
+    The spot is claimed with a conditional UPDATE (accepted_count <
+    applicants_needed), which the database re-checks under the row lock,
+    so concurrent accepts on one job serialise there and no more than
+    ``applicants_needed`` can win. With ``poster_user_id`` only
+    applications to that user's jobs are found. Returns the application;
+    raises JobApplication.DoesNotExist or JobFilled.
+    """
+    with transaction.atomic():
+        application = _decidable(poster_user_id).get(pk=application_id)
+        if application.status == JobApplication.ACCEPTED:
+            return application
+
+        claimed = Job.objects.filter(pk=application.job_id, accepted_count__lt=F('applicants_needed')).update(
+            accepted_count=F('accepted_count') + 1, updated_at=timezone.now()
+        )
+        if not claimed:
+            raise JobFilled(application.job_id)
+        listing_cache.invalidate('job', application.job_id)
+
+        JobApplication.objects.filter(pk=application.pk).update(status=JobApplication.ACCEPTED, updated_at=timezone.now())
+        listing_cache.invalidate('jobApplication', application.pk)
+        application.status = JobApplication.ACCEPTED
+        return application
+
+
+def reject_application(application_id, poster_user_id=None):
+    """Reject one application, giving its spot back if it had been accepted."""
+    with transaction.atomic():
+        application = _decidable(poster_user_id).get(pk=application_id)
+        if application.status == JobApplication.REJECTED:
+            return application
+
+        JobApplication.objects.filter(pk=application.pk).update(status=JobApplication.REJECTED, updated_at=timezone.now())
+        listing_cache.invalidate('jobApplication', application.pk)
+        if application.status == JobApplication.ACCEPTED:
+            adjust_job_counters(application.job_id, accepted=-1)
+        application.status = JobApplication.REJECTED
+        return application
+
+
+def bulk_accept(application_ids, poster_user_id=None):
+    """
+    Accept many applications in one transaction, in the order given,
+    until each job runs out of spots.
+
+    Job rows are locked with SELECT ... FOR UPDATE in id order (so two bulk
+    calls cannot deadlock), spots are counted once per job, and each job
+    gets a single status UPDATE and a single counter UPDATE.
+    Applications to other posters' jobs are reported as not found.
+    Returns {"accepted": [ids], "failed": {id: reason}}.
+    """
+    application_ids = list(dict.fromkeys(application_ids))
+    result = {'accepted': [], 'failed': {}}
+    with transaction.atomic():
+        applications = _lock_applications(application_ids, poster_user_id)
+        job_ids = sorted({application.job_id for application in applications.values()})
+        jobs = {job.pk: job for job in Job.objects.select_for_update().filter(pk__in=job_ids).order_by('pk')}
+
+        to_accept = {}
+        for application_id in application_ids:
+            application = applications.get(application_id)
+            if application is None:
+                result['failed'][application_id] = 'not found'
+                continue
+            if application.status == JobApplication.ACCEPTED:
+                result['accepted'].append(application_id)
+                continue
+            job = jobs[application.job_id]
+            if job.spots_remaining - len(to_accept.get(job.pk, [])) <= 0:
+                result['failed'][application_id] = 'job is full'
+                continue
+            to_accept.setdefault(job.pk, []).append(application_id)
+            result['accepted'].append(application_id)
+
+        for job_id, ids in to_accept.items():
+            JobApplication.objects.filter(pk__in=ids).update(status=JobApplication.ACCEPTED, updated_at=timezone.now())
+            listing_cache.invalidate('jobApplication', *ids)
+            adjust_job_counters(job_id, accepted=len(ids))
+    return result
+
+
+def bulk_reject(application_ids, poster_user_id=None):
+    """Reject many applications in one transaction. Returns {"rejected": [ids], "failed": {id: reason}}."""
+    application_ids = list(dict.fromkeys(application_ids))
+    result = {'rejected': [], 'failed': {}}
+    with transaction.atomic():
+        applications = _lock_applications(application_ids, poster_user_id)
+        freed = {}
+        for application_id in application_ids:
+            application = applications.get(application_id)
+            if application is None:
+                result['failed'][application_id] = 'not found'
+                continue
+            if application.status == JobApplication.ACCEPTED:
+                freed[application.job_id] = freed.get(application.job_id, 0) + 1
+            result['rejected'].append(application_id)
+
+        JobApplication.objects.filter(pk__in=result['rejected']).update(status=JobApplication.REJECTED, updated_at=timezone.now())
+        listing_cache.invalidate('jobApplication', *result['rejected'])
+        for job_id, count in freed.items():
+            adjust_job_counters(job_id, accepted=-count)
+    return result
+
+
+def _decidable(poster_user_id):
+    # The poster is matched through a subquery rather than a join, so FOR
+    # UPDATE locks only application rows and job rows keep their own order.
+    queryset = JobApplication.objects.select_for_update()
+    if poster_user_id is not None:
+        queryset = queryset.filter(job__in=Job.objects.filter(posted_by__user_id=poster_user_id).values('pk'))
+    return queryset
+
+
+def _lock_applications(application_ids, poster_user_id):
+    # Always lock in id order so concurrent bulk calls cannot deadlock.
+    locked = _decidable(poster_user_id).filter(pk__in=application_ids).order_by('pk')
+    return {application.pk: application for application in locked}
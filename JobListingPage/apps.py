@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class JoblistingpageConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'JobListingPage'
+
+    def ready(self):
+        import JobListingPage.signals
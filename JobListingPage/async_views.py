@@ -0,0 +1,112 @@
+import functools
+from types import SimpleNamespace
+
+from django.http import HttpResponseNotAllowed, HttpResponseNotModified, JsonResponse
+from django.utils.cache import get_conditional_response
+from rest_framework.exceptions import APIException, NotAuthenticated, NotFound
+from rest_framework.request import Request
+
+from authUser.authentication import ClaimsJWTAuthentication
+from main.metrics import timed
+from . import listing_cache
+from .models import Job
+from .pagination import KeysetCursorPagination
+from .serializers import JobReadSerializer, MyJobApplicationSerializer
+from .views import JobViewSet, filter_jobs, my_applications
+
+# Async versions of the busiest reads, for ASGI deployments (see main/asgi.py).
+# They answer exactly like their viewset counterparts (same filters,
+# cursors, ETags and cache) but read through the async ORM, so a worker
+# waiting on the database keeps serving other requests. Only bearer tokens
+# are accepted: a session would need a database read just to find the user.
+
+authenticator = ClaimsJWTAuthentication()
+
+
+def async_api_view(view):
+    """
+    Run ``view(request, ...)`` on a DRF Request (for query_params and
+    pagination), with the caller's token checked, and render APIExceptions
+    the way DRF's exception handler does.
+    """
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        # require_safe only learned to wrap coroutines in Django 5.0.
+        if request.method not in ('GET', 'HEAD'):
+            return HttpResponseNotAllowed(['GET', 'HEAD'])
+        request = Request(request, authenticators=())
+        try:
+            # Claims only, no query, so this is safe to run on the event loop.
+            authenticated = authenticator.authenticate(request)
+            request.user = authenticated[0] if authenticated else None
+            return await view(request, *args, **kwargs)
+        except APIException as exc:
+            detail = exc.detail if isinstance(exc.detail, (dict, list)) else {'detail': exc.detail}
+            response = JsonResponse(detail, status=exc.status_code, safe=False)
+            if exc.status_code == 401:
+                response['WWW-Authenticate'] = authenticator.authenticate_header(request)
+            return response
+    return wrapper
+
+
+async def _conditional(request, version, respond):
+    etag, last_modified = listing_cache.validators(request, version)
+    if get_conditional_response(request, etag=etag, last_modified=last_modified) is not None:
+        response = HttpResponseNotModified()
+    else:
+        response = await respond()
+    return listing_cache.set_validators(response, etag, last_modified)
+
+
+async def _cached(endpoint, version, request, build):
+    cache = listing_cache.get_cache()
+    key = listing_cache.response_key(endpoint, version, request)
+    data = await cache.aget(key)
+    if data is not None:
+        await listing_cache.arecord(endpoint, 'hit')
+    else:
+        await listing_cache.arecord(endpoint, 'miss')
+        data = await build()
+        await cache.aset(key, data, listing_cache.TIMEOUT)
+    return JsonResponse(data, safe=False)
+
+
+@async_api_view
+async def job_list(request):
+    """GET /async/job/: the job list, with ?open=, ?q= and cursor pagination."""
+    async def build():
+        queryset, ordering = filter_jobs(Job.objects.select_related('posted_by__user'), request.query_params, listing=True)
+        paginator = KeysetCursorPagination()
+        view = SimpleNamespace(ordering=ordering or JobViewSet.ordering)
+        page = await paginator.apaginate_queryset(queryset, request, view)
+        data = timed(JobReadSerializer(page, many=True, context={'request': request})).data
+        return paginator.get_paginated_response(data).data
+
+    version = await listing_cache.aget_version('job')
+    return await _conditional(request, version, lambda: _cached('job-list', version, request, build))
+
+
+@async_api_view
+async def job_detail(request, pk):
+    """GET /async/job/<id>/."""
+    async def build():
+        queryset, _ = filter_jobs(Job.objects.select_related('posted_by__user'), request.query_params, listing=False)
+        try:
+            job = await queryset.aget(pk=pk)
+        except Job.DoesNotExist:
+            raise NotFound()
+        return timed(JobReadSerializer(job, context={'request': request})).data
+
+    version = await listing_cache.adetail_version('job', pk)
+    return await _conditional(request, version, lambda: _cached('job-retrieve', version, request, build))
+
+
+@async_api_view
+async def my_application_list(request):
+    """GET /async/jobApplication/me/: the caller's applications, ?status= keeping one status."""
+    if request.user is None:
+        raise NotAuthenticated()
+    paginator = KeysetCursorPagination()
+    page = await paginator.apaginate_queryset(my_applications(request.user.pk, request.query_params), request)
+    data = timed(MyJobApplicationSerializer(page, many=True)).data
+    return JsonResponse(paginator.get_paginated_response(data).data)
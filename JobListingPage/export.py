@@ -0,0 +1,74 @@
+import csv
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import Job, JobApplication, SavedJob
+
+# Bulk exports stream values() rows straight from a database cursor
+# (QuerySet.iterator), so memory use does not grow with the table: no model
+# instances, no serializers, and at most one chunk of rows in flight.
+EXPORTS = {
+    'job': (Job, [
+        'id', 'title', 'description', 'contract_duration', 'date_posted', 'updated_at', 'job_date', 'location',
+        'latitude', 'longitude', 'payment', 'applicants_needed', 'applications_count', 'accepted_count',
+        'posted_by_id', 'posted_by__user__username',
+    ]),
+    'jobApplication': (JobApplication, [
+        'id', 'job_id', 'job__title', 'applicant_id', 'applicant__user__username', 'status', 'updated_at',
+    ]),
+    'savedJob': (SavedJob, ['id', 'user_id', 'user__user__username', 'job_id', 'job__title', 'saved_on', 'updated_at']),
+}
+# What a poster may export of their own: their jobs, and the applications
+# to them. The lookup from each row to the poster's user id.
+POSTER_EXPORTS = {
+    'job': 'posted_by__user_id',
+    'jobApplication': 'job__posted_by__user_id',
+}
+FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+CHUNK_SIZE = 2000
+
+
+def rows(kind, chunk_size=CHUNK_SIZE, poster=None):
+    model, fields = EXPORTS[kind]
+    queryset = model.objects.order_by('pk')
+    if poster is not None:
+        queryset = queryset.filter(**{POSTER_EXPORTS[kind]: poster})
+    return queryset.values_list(*fields).iterator(chunk_size=chunk_size)
+
+
+def stream(kind, fmt, chunk_size=CHUNK_SIZE, poster=None):
+    """
+    Yield every ``kind`` row rendered as ``fmt``, in id order, or with
+    ``poster`` (a user id) only that poster's rows, see POSTER_EXPORTS.
+    Lines are joined ``chunk_size`` at a time so the response is written in
+    a few large pieces rather than one tiny one per row.
+    """
+    fields = EXPORTS[kind][1]
+    render = _ndjson(fields) if fmt == 'ndjson' else _csv(fields)
+    lines = [] if fmt == 'ndjson' else [render(fields)]
+    for row in rows(kind, chunk_size, poster):
+        lines.append(render(row))
+        if len(lines) >= chunk_size:
+            yield ''.join(lines)
+            lines = []
+    if lines:
+        yield ''.join(lines)
+
+
+def _ndjson(fields):
+    encoder = DjangoJSONEncoder(separators=(',', ':'))
+    return lambda row: encoder.encode(dict(zip(fields, row))) + '\n'
+
+
+class _Line:
+    """File-like target that hands back what csv.writer writes to it."""
+
+    def write(self, value):
+        return value
+
+
+def _csv(fields):
+    return csv.writer(_Line()).writerow
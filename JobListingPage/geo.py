@@ -0,0 +1,163 @@
+import heapq
+import math
+
+from django.db.models import Q
+
+# Grid cells are CELL_DEGREES square (about 5.5km at the equator) and are
+# numbered row-major from (-90, -180), so a band of cells along one row is a
+# contiguous integer range and a radius search is a handful of index range scans.
+CELL_DEGREES = 0.05
+GRID_ROWS = int(round(180 / CELL_DEGREES))
+GRID_COLS = int(round(360 / CELL_DEGREES))
+
+EARTH_RADIUS_KM = 6371.0088
+
+# Offline geocoding table for the free-text location fields, keyed on the
+# lowercased place name. Add places here as we open new markets.
+KNOWN_LOCATIONS = {
+    "lagos": (6.5244, 3.3792),
+    "ikeja": (6.6018, 3.3515),
+    "lekki": (6.4698, 3.5852),
+    "victoria island": (6.4281, 3.4219),
+    "yaba": (6.5095, 3.3711),
+    "surulere": (6.5000, 3.3500),
+    "ikorodu": (6.6194, 3.5105),
+    "abuja": (9.0765, 7.3986),
+    "ibadan": (7.3775, 3.9470),
+    "abeokuta": (7.1475, 3.3619),
+    "port harcourt": (4.8156, 7.0498),
+    "benin city": (6.3350, 5.6037),
+    "enugu": (6.5244, 7.5186),
+    "kano": (12.0022, 8.5920),
+    "kaduna": (10.5105, 7.4165),
+    "jos": (9.8965, 8.8583),
+    "ilorin": (8.4966, 4.5421),
+    "owerri": (5.4836, 7.0333),
+    "uyo": (5.0377, 7.9128),
+    "calabar": (4.9757, 8.3417),
+    "warri": (5.5544, 5.7932),
+    "accra": (5.6037, -0.1870),
+    "nairobi": (-1.2921, 36.8219),
+    "london": (51.5072, -0.1276),
+}
+
+
+def geocode(location):
+    """
+    Look a free-text location up in KNOWN_LOCATIONS. "Ikeja, Lagos" tries
+    the whole string first, then each comma separated part. Returns
+    (latitude, longitude) or None.
+    """
+    if not location:
+        return None
+    text = " ".join(location.lower().split())
+    if text in KNOWN_LOCATIONS:
+        return KNOWN_LOCATIONS[text]
+    for part in text.split(","):
+        part = part.strip()
+        if part in KNOWN_LOCATIONS:
+            return KNOWN_LOCATIONS[part]
+    return None
+
+
+def locate(instance):
+    """
+    Fill ``instance.latitude``/``longitude`` from its location when they
+    are missing, or when the location changed since the row was loaded
+    (``_loaded_geo``, set by the model's from_db) and the caller left the
+    old coordinates in place. An unknown new place clears them.
+    """
+    loaded = getattr(instance, '_loaded_geo', None)
+    moved = (loaded is not None and instance.location != loaded[0]
+             and (instance.latitude, instance.longitude) == loaded[1:])
+    if moved or instance.latitude is None or instance.longitude is None:
+        coordinates = geocode(instance.location)
+        if coordinates:
+            instance.latitude, instance.longitude = coordinates
+        elif moved:
+            instance.latitude = instance.longitude = None
+    instance._loaded_geo = (instance.location, instance.latitude, instance.longitude)
+
+
+def loaded_geo(instance):
+    """The (location, latitude, longitude) a row was loaded with, for locate()."""
+    fields = instance.__dict__
+    if {'location', 'latitude', 'longitude'} <= fields.keys():
+        instance._loaded_geo = (fields['location'], fields['latitude'], fields['longitude'])
+    return instance
+
+
+def _row(latitude):
+    return min(max(int(math.floor((latitude + 90) / CELL_DEGREES)), 0), GRID_ROWS - 1)
+
+
+def _col(longitude):
+    return int(math.floor((longitude + 180) / CELL_DEGREES)) % GRID_COLS
+
+
+def grid_cell(latitude, longitude):
+    if latitude is None or longitude is None:
+        return None
+    return _row(latitude) * GRID_COLS + _col(longitude)
+
+
+def cell_ranges(latitude, longitude, radius_km):
+    """
+    Inclusive (first, last) grid cell ranges covering the bounding box of a
+    circle. One range per row, split in two where the box wraps the antimeridian.
+    The box uses the same sphere as haversine_km, and its longitude half-width
+    is the circle's widest point, which lies poleward of its centre.
+    """
+    angle = radius_km / EARTH_RADIUS_KM
+    lat_delta = math.degrees(angle)
+    cos_lat = math.cos(math.radians(latitude))
+    if (angle >= math.pi / 2 or abs(latitude) + lat_delta >= 90
+            or math.sin(angle) >= cos_lat):
+        first_col, last_col = 0, GRID_COLS - 1
+    else:
+        lng_delta = math.degrees(math.asin(math.sin(angle) / cos_lat))
+        first_col, last_col = _col(longitude - lng_delta), _col(longitude + lng_delta)
+
+    ranges = []
+    for row in range(_row(latitude - lat_delta), _row(latitude + lat_delta) + 1):
+        base = row * GRID_COLS
+        if first_col <= last_col:
+            ranges.append((base + first_col, base + last_col))
+        else:
+            ranges.append((base + first_col, base + GRID_COLS - 1))
+            ranges.append((base, base + last_col))
+    return ranges
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    lat1, lng1, lat2, lng2 = map(math.radians, (lat1, lng1, lat2, lng2))
+    a = (math.sin((lat2 - lat1) / 2) ** 2
+         + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def nearby(queryset, latitude, longitude, radius_km, limit):
+    """
+    The ``limit`` closest rows of ``queryset`` within ``radius_km``, each
+    with a ``distance_km`` attribute. Only rows in the covering grid cells
+    are read, and only their coordinates until the winners are known.
+    """
+    condition = Q()
+    for first, last in cell_ranges(latitude, longitude, radius_km):
+        condition |= Q(geo_cell__range=(first, last))
+
+    candidates = queryset.filter(condition).values_list("id", "latitude", "longitude")
+    matches = []
+    for pk, lat, lng in candidates.iterator():
+        distance = haversine_km(latitude, longitude, lat, lng)
+        if distance <= radius_km:
+            matches.append((distance, pk))
+    matches = heapq.nsmallest(limit, matches)
+
+    rows = queryset.in_bulk([pk for _, pk in matches])
+    results = []
+    for distance, pk in matches:
+        row = rows[pk]
+        row.distance_km = round(distance, 3)
+        results.append(row)
+    return results
@@ -0,0 +1,217 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from rest_framework import status
+from rest_framework.response import Response
+
+# Version counters for the listing endpoints, and the response cache and
+# conditional GET support built on them.
+#
+# Every namespace ("job", "jobApplication", ...) has a version for its
+# lists and one per object ("job:<id>") for details. A version is the
+# time.time_ns() of the last write that touched it, so it doubles as the
+# Last-Modified date. Writes bump the versions they affect; cache keys and
+# ETags embed them, so stale entries are simply never asked for again.
+
+TIMEOUT = getattr(settings, 'LISTING_CACHE_TIMEOUT', 60)
+VERSION_TIMEOUT = getattr(settings, 'LISTING_VERSION_TIMEOUT', None)
+ENDPOINTS = []
+
+# Reads that embed summaries of another namespace's rows: applications and
+# saved jobs show their job, and most cards show a profile. A write to a
+# namespace also bumps the lists of the namespaces that embed it, and their
+# details are versioned on it as well (see detail_version).
+EMBEDDED_IN = {
+    'job': ('jobApplication', 'savedJob'),
+    'userProfile': ('job', 'jobApplication', 'savedJob', 'review'),
+}
+
+
+def embedded(namespace):
+    """The namespaces whose summaries ``namespace`` reads embed."""
+    return [name for name, dependents in EMBEDDED_IN.items() if namespace in dependents]
+
+
+def get_cache():
+    return caches[getattr(settings, 'LISTING_CACHE_ALIAS', 'default')]
+
+
+def _version_key(namespace):
+    return f'listing:version:{namespace}'
+
+
+def get_version(namespace):
+    cache = get_cache()
+    key = _version_key(namespace)
+    version = cache.get(key)
+    if version is None:
+        # Nothing recorded (first use, eviction or expiry): treat it as
+        # changed now, which is always safe.
+        cache.add(key, time.time_ns(), VERSION_TIMEOUT)
+        version = cache.get(key)
+    return version
+
+
+async def aget_version(namespace):
+    """get_version for async views."""
+    cache = get_cache()
+    key = _version_key(namespace)
+    version = await cache.aget(key)
+    if version is None:
+        await cache.aadd(key, time.time_ns(), VERSION_TIMEOUT)
+        version = await cache.aget(key)
+    return version
+
+
+def detail_version(namespace, object_id):
+    """The version of one object's detail: its own, or later if anything it embeds changed since."""
+    return max([get_version(f'{namespace}:{object_id}')] + [get_version(name) for name in embedded(namespace)])
+
+
+async def adetail_version(namespace, object_id):
+    """detail_version for async views."""
+    return max([await aget_version(f'{namespace}:{object_id}')] + [await aget_version(name) for name in embedded(namespace)])
+
+
+def bump(*namespaces):
+    now = time.time_ns()
+    get_cache().set_many({_version_key(namespace): now for namespace in namespaces}, VERSION_TIMEOUT)
+
+
+def invalidate(namespace, *object_ids):
+    """
+    Mark every ``namespace`` list, the details of ``object_ids`` and the
+    lists that embed ``namespace`` (EMBEDDED_IN) as changed.
+    """
+    namespaces = [namespace] + [f'{namespace}:{pk}' for pk in object_ids] + list(EMBEDDED_IN.get(namespace, ()))
+    bump(*namespaces)
+    if transaction.get_connection().in_atomic_block:
+        # A reader may re-cache the old rows before we commit; bump again after.
+        transaction.on_commit(lambda: bump(*namespaces))
+
+
+def record(endpoint, outcome):
+    cache = get_cache()
+    key = f'listing:stats:{endpoint}:{outcome}'
+    if not cache.add(key, 1, None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, None)
+
+
+async def arecord(endpoint, outcome):
+    cache = get_cache()
+    key = f'listing:stats:{endpoint}:{outcome}'
+    if not await cache.aadd(key, 1, None):
+        try:
+            await cache.aincr(key)
+        except ValueError:
+            await cache.aset(key, 1, None)
+
+
+def stats():
+    cache = get_cache()
+    keys = {(endpoint, outcome): f'listing:stats:{endpoint}:{outcome}' for endpoint in ENDPOINTS for outcome in ('hit', 'miss')}
+    values = cache.get_many(keys.values())
+    return {
+        endpoint: {outcome: values.get(keys[endpoint, outcome], 0) for outcome in ('hit', 'miss')}
+        for endpoint in ENDPOINTS
+    }
+
+
+def request_key(request):
+    """Host, path and the query string with its parameters sorted, hashed."""
+    params = sorted((name, value) for name, values in request.query_params.lists() for value in values)
+    raw = '\n'.join([request.get_host(), request.path] + [f'{name}={value}' for name, value in params])
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+def response_key(endpoint, version, request):
+    return f'listing:{endpoint}:{version}:{request_key(request)}'
+
+
+def validators(request, version):
+    """The weak ETag and Last-Modified (POSIX seconds) of a response built at ``version``."""
+    raw = f'{version}:{request_key(request)}:{request.META.get("HTTP_ACCEPT", "")}'
+    return 'W/"%s"' % hashlib.sha1(raw.encode('utf-8')).hexdigest(), version // 1_000_000_000
+
+
+def set_validators(response, etag, last_modified):
+    if response.status_code in (status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED):
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+    return response
+
+
+class VersionedReadMixin:
+    """
+    Base for viewsets whose reads are keyed on ``version_namespace``: lists
+    on the namespace version, details on the object's own version and
+    those of the namespaces it embeds.
+    """
+    version_namespace = None
+
+    def list_version(self):
+        return get_version(self.version_namespace)
+
+    def detail_version(self):
+        return detail_version(self.version_namespace, self.kwargs.get(self.lookup_url_kwarg or self.lookup_field))
+
+
+class ConditionalGetMixin(VersionedReadMixin):
+    """
+    ETag and Last-Modified on ``list`` and ``retrieve``, taken from the
+    version counters instead of the body, so a poll that matches gets
+    304 Not Modified before any query or serialization runs.
+    """
+
+    def list(self, request, *args, **kwargs):
+        return self._conditional(self.list_version(), lambda: super(ConditionalGetMixin, self).list(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._conditional(self.detail_version(), lambda: super(ConditionalGetMixin, self).retrieve(request, *args, **kwargs))
+
+    def _conditional(self, version, respond):
+        etag, last_modified = validators(self.request, version)
+        not_modified = get_conditional_response(self.request, etag=etag, last_modified=last_modified)
+        if not_modified is not None:
+            response = Response(status=not_modified.status_code)
+        else:
+            response = respond()
+        return set_validators(response, etag, last_modified)
+
+
+class CachedReadMixin(VersionedReadMixin):
+    """Serve ``list`` and ``retrieve`` from the cache, keyed on the version and the normalized request."""
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if cls.version_namespace:
+            ENDPOINTS.extend(f'{cls.version_namespace}-{action}' for action in ('list', 'retrieve'))
+
+    def list(self, request, *args, **kwargs):
+        return self._cached('list', self.list_version(), lambda: super(CachedReadMixin, self).list(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._cached('retrieve', self.detail_version(), lambda: super(CachedReadMixin, self).retrieve(request, *args, **kwargs))
+
+    def _cached(self, action, version, respond):
+        cache = get_cache()
+        endpoint = f'{self.version_namespace}-{action}'
+        key = response_key(endpoint, version, self.request)
+        data = cache.get(key)
+        if data is not None:
+            record(endpoint, 'hit')
+            return Response(data)
+
+        record(endpoint, 'miss')
+        response = respond()
+        if response.status_code == status.HTTP_200_OK:
+            cache.set(key, response.data, TIMEOUT)
+        return response
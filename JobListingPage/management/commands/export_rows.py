@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from JobListingPage import export
+
+
+class Command(BaseCommand):
+    help = "Stream every Job, JobApplication or SavedJob row as NDJSON or CSV, in constant memory"
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=sorted(export.EXPORTS))
+        parser.add_argument('--format', choices=sorted(export.FORMATS), default='ndjson')
+        parser.add_argument('--output', help="File to write (default: standard output)")
+        parser.add_argument('--chunk-size', type=int, default=export.CHUNK_SIZE,
+                            help=f"Rows fetched from the database at a time (default {export.CHUNK_SIZE})")
+
+    def handle(self, *args, **options):
+        chunks = export.stream(options['kind'], options['format'], options['chunk_size'])
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8', newline='') as out:
+                out.writelines(chunks)
+        else:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending='')
@@ -0,0 +1,156 @@
+import json
+import math
+import random
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from authUser.models import CustomUser, Profile
+from JobListingPage import geo, listing_cache
+from JobListingPage.models import Job, JobApplication, SavedJob
+
+# Where synthetic users live and jobs are, weighted: mostly Lagos.
+PLACES = [
+    ("Ikeja, Lagos", 20), ("Lekki, Lagos", 15), ("Yaba, Lagos", 12), ("Victoria Island, Lagos", 10),
+    ("Surulere, Lagos", 10), ("Ikorodu, Lagos", 6), ("Abuja", 10), ("Ibadan", 6), ("Port Harcourt", 6), ("Kano", 5),
+]
+ROLES = ["Warehouse assistant", "Waiter", "Event usher", "Cleaner", "Delivery rider", "Cashier", "Security guard", "Barista"]
+DURATIONS = [("2hrs Contract", 2), ("4hrs Contract", 5), ("8hrs Contract", 4), ("2 days Contract", 1)]
+# Share of applications per status; acceptances also stop when a job is full
+STATUSES = [(JobApplication.PENDING, 65), (JobApplication.ACCEPTED, 25), (JobApplication.REJECTED, 10)]
+JITTER_DEGREES = 0.03  # about 3km around each place's centre
+
+
+class Command(BaseCommand):
+    help = (
+        "Insert synthetic users, profiles, jobs, applications and saved jobs for load testing. "
+        "The same --seed gives the same data; --manifest writes the logins benchmarks/load.py replays"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000, help="Users, each with a profile (default 1000)")
+        parser.add_argument('--jobs', type=int, default=5000, help="Jobs (default 5000)")
+        parser.add_argument('--applications', type=int, default=20000, help="Job applications (default 20000)")
+        parser.add_argument('--saved', type=int, default=10000, help="Saved jobs (default 10000)")
+        parser.add_argument('--posters', type=float, default=0.1,
+                            help="Share of users who post jobs; the rest apply and save (default 0.1)")
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--prefix', default='synthetic', help="Usernames and emails are <prefix><n>")
+        parser.add_argument('--password', default='synthetic-pass-123', help="Password of every synthetic user")
+        parser.add_argument('--manifest', help="Write the workers' emails, profile ids and password to this JSON file")
+        parser.add_argument('--batch-size', type=int, default=2000, help="Rows per INSERT (default 2000)")
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        posters = max(1, round(options['users'] * options['posters']))
+        if options['users'] < 2 or posters >= options['users']:
+            raise CommandError("Need at least two users and at least one who is not a poster.")
+        prefix, batch_size = options['prefix'], options['batch_size']
+        if CustomUser.objects.filter(username__startswith=prefix).exists():
+            raise CommandError(f"Users named {prefix}* already exist; pass another --prefix.")
+
+        with transaction.atomic():
+            profiles = self.create_profiles(rng, options['users'], prefix, options['password'], batch_size)
+            posting, working = profiles[:posters], profiles[posters:]
+            jobs = self.build_jobs(rng, options['jobs'], posting)
+            applications = self.build_applications(rng, options['applications'], jobs, working)
+            # Counters are set before the INSERT, so no reconcile pass is needed.
+            Job.objects.bulk_create(jobs, batch_size=batch_size)
+            JobApplication.objects.bulk_create(applications, batch_size=batch_size)
+            saved = SavedJob.objects.bulk_create(self.build_saved(rng, options['saved'], jobs, working), batch_size=batch_size)
+            for namespace in ('job', 'jobApplication', 'savedJob', 'userProfile'):
+                listing_cache.invalidate(namespace)
+
+        if options['manifest']:
+            with open(options['manifest'], 'w') as handle:
+                json.dump({
+                    'password': options['password'],
+                    'workers': [{'email': p.user.email, 'profile': p.pk} for p in working],
+                }, handle)
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {len(profiles)} users ({posters} posters), {len(jobs)} jobs, "
+            f"{len(applications)} applications and {len(saved)} saved jobs"
+        ))
+
+    def create_profiles(self, rng, count, prefix, password, batch_size):
+        # bulk_create sends no post_save, so create_profile does not run and
+        # each profile is inserted here; one hash serves every user.
+        hashed = make_password(password)
+        users = CustomUser.objects.bulk_create([
+            CustomUser(username=f"{prefix}{i}", email=f"{prefix}{i}@example.com", password=hashed,
+                       firstName="Synthetic", lastName=f"User {i}")
+            for i in range(count)
+        ], batch_size=batch_size)
+        profiles = []
+        for user in users:
+            location, latitude, longitude = self.place(rng)
+            profiles.append(Profile(user=user, firstName=user.firstName, lastName=user.lastName,
+                                    location=location, latitude=latitude, longitude=longitude))
+        return Profile.objects.bulk_create(profiles, batch_size=batch_size)
+
+    def build_jobs(self, rng, count, posters):
+        # A few busy posters post most jobs (Pareto-distributed activity).
+        activity = [rng.paretovariate(1.2) for _ in posters]
+        now = timezone.now()
+        jobs = []
+        for poster in rng.choices(posters, weights=activity, k=count):
+            location, latitude, longitude = self.place(rng)
+            duration = rng.choices(*zip(*DURATIONS))[0]
+            job = Job(
+                title=rng.choice(ROLES), description=f"{duration} shift, synthetic load-test data",
+                contract_duration=duration, location=location, latitude=latitude, longitude=longitude,
+                job_date=now + timedelta(hours=rng.randint(2, 30 * 24)),
+                # Log-normal pay around 40, in whole units
+                payment=Decimal(min(max(round(math.exp(rng.gauss(math.log(40), 0.5))), 5), 500)),
+                applicants_needed=min(1 + int(rng.expovariate(0.4)), 20),
+                posted_by=poster,
+            )
+            job.fill_geo()
+            jobs.append(job)
+        return jobs
+
+    def build_applications(self, rng, count, jobs, workers):
+        # Attention is Zipf-like: a few jobs draw most of the applications.
+        pairs = self.distinct_pairs(rng, count, jobs, workers)
+        statuses, shares = zip(*STATUSES)
+        applications = []
+        for job, worker in pairs:
+            status = rng.choices(statuses, weights=shares)[0]
+            if status == JobApplication.ACCEPTED and job.accepted_count >= job.applicants_needed:
+                status = JobApplication.PENDING
+            job.applications_count += 1
+            job.accepted_count += status == JobApplication.ACCEPTED
+            applications.append(JobApplication(job=job, applicant=worker, status=status))
+        return applications
+
+    def build_saved(self, rng, count, jobs, workers):
+        return [SavedJob(job=job, user=worker) for job, worker in self.distinct_pairs(rng, count, jobs, workers)]
+
+    def distinct_pairs(self, rng, count, jobs, workers):
+        """Up to ``count`` distinct (job, worker) pairs: Zipf-weighted jobs, Pareto-weighted workers."""
+        popularity = [1 / (rank + 1) ** 1.1 for rank in range(len(jobs))]
+        ranked = rng.sample(jobs, len(jobs))
+        activity = [rng.paretovariate(1.5) for _ in workers]
+        count = min(count, len(jobs) * len(workers))
+        pairs, seen = [], set()
+        while len(pairs) < count:
+            batch = zip(rng.choices(range(len(ranked)), weights=popularity, k=count),
+                        rng.choices(range(len(workers)), weights=activity, k=count))
+            for job, worker in batch:
+                if (job, worker) not in seen:
+                    seen.add((job, worker))
+                    pairs.append((ranked[job], workers[worker]))
+                    if len(pairs) == count:
+                        break
+        return pairs
+
+    def place(self, rng):
+        names, weights = zip(*PLACES)
+        location = rng.choices(names, weights=weights)[0]
+        latitude, longitude = geo.geocode(location)
+        return (location, round(latitude + rng.uniform(-JITTER_DEGREES, JITTER_DEGREES), 6),
+                round(longitude + rng.uniform(-JITTER_DEGREES, JITTER_DEGREES), 6))
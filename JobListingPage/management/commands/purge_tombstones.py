@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from JobListingPage import sync
+from JobListingPage.models import Tombstone
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete tombstones older than the delta sync retention window "
+        "(SYNC_TOMBSTONE_RETENTION_DAYS) in batches; run it daily"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000,
+                            help="Tombstones deleted per transaction (default 5000)")
+
+    def handle(self, *args, **options):
+        # /changes/ asks clients older than the same cutoff to resync, so
+        # nobody can still need what is deleted here.
+        cutoff = sync.retention_cutoff()
+        deleted = 0
+        while True:
+            ids = list(Tombstone.objects.filter(deleted_at__lt=cutoff)
+                       .order_by('deleted_at', 'id').values_list('pk', flat=True)[:options['batch_size']])
+            if not ids:
+                break
+            with transaction.atomic():
+                deleted += Tombstone.objects.filter(pk__in=ids).delete()[0]
+
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} tombstones from before {cutoff:%Y-%m-%d %H:%M}"))
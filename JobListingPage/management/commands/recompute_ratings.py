@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Avg, Count, F, FloatField, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Abs, Coalesce
+
+from authUser.models import Profile
+from JobListingPage import listing_cache
+from JobListingPage.models import Review
+
+
+def review_subquery(aggregate, output_field, default):
+    reviews = (Review.objects.filter(reviewee=OuterRef('pk'))
+               .order_by().values('reviewee').annotate(total=aggregate).values('total'))
+    return Coalesce(Subquery(reviews, output_field=output_field), Value(default), output_field=output_field)
+
+
+class Command(BaseCommand):
+    help = "Rebuild Profile.rating and Profile.rating_count from the Review table"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=2000,
+                            help="Profiles recomputed per UPDATE statement (default 2000)")
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        mean = review_subquery(Avg('rating'), FloatField(), 0.0)
+        count = review_subquery(Count('id'), Profile._meta.get_field('rating_count'), 0)
+
+        checked = changed = 0
+        last_id = 0
+        while True:
+            ids = list(Profile.objects.filter(pk__gt=last_id).order_by('pk').values_list('pk', flat=True)[:chunk_size])
+            if not ids:
+                break
+            with transaction.atomic():
+                chunk = Profile.objects.filter(pk__gte=ids[0], pk__lte=ids[-1])
+                # Only rewrite drifted rows, so their cached cards stay valid.
+                stale = list(chunk.annotate(real_rating=mean, real_count=count)
+                             .annotate(drift=Abs(F('rating') - F('real_rating')))
+                             .filter(~Q(rating_count=F('real_count')) | Q(drift__gt=1e-9))
+                             .values_list('pk', flat=True))
+                # The new values are computed inside the UPDATE itself, so a
+                # review saved since the check above is still counted.
+                if stale:
+                    changed += Profile.objects.filter(pk__in=stale).update(rating=mean, rating_count=count)
+                    listing_cache.invalidate('userProfile', *stale)
+            checked += len(ids)
+            last_id = ids[-1]
+
+        self.stdout.write(self.style.SUCCESS(f"Recomputed ratings for {checked} profiles, {changed} had drifted"))
@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from JobListingPage import listing_cache
+from JobListingPage.models import Job, JobApplication
+
+
+def count_subquery(**filters):
+    applications = (JobApplication.objects.filter(job=OuterRef('pk'), **filters)
+                    .order_by().values('job').annotate(total=Count('id')).values('total'))
+    return Coalesce(Subquery(applications), 0)
+
+
+class Command(BaseCommand):
+    help = "Recompute Job.applications_count and Job.accepted_count from the JobApplication table"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000,
+                            help="Jobs recomputed per UPDATE statement (default 5000)")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        applications = count_subquery()
+        accepted = count_subquery(status=JobApplication.ACCEPTED)
+
+        checked = drifted = 0
+        last_id = 0
+        while True:
+            ids = list(Job.objects.filter(pk__gt=last_id).order_by('pk').values_list('pk', flat=True)[:batch_size])
+            if not ids:
+                break
+            with transaction.atomic():
+                batch = Job.objects.filter(pk__gte=ids[0], pk__lte=ids[-1])
+                # Only rewrite drifted rows, so delta sync does not resend the rest.
+                stale = list(batch.annotate(real_applications=applications, real_accepted=accepted)
+                             .exclude(applications_count=F('real_applications'), accepted_count=F('real_accepted'))
+                             .values_list('pk', flat=True))
+                if stale:
+                    drifted += Job.objects.filter(pk__in=stale).update(
+                        applications_count=applications, accepted_count=accepted, updated_at=timezone.now()
+                    )
+                    listing_cache.invalidate('job', *stale)
+                checked += len(ids)
+            last_id = ids[-1]
+
+        self.stdout.write(self.style.SUCCESS(f"Recomputed counters for {checked} jobs, {drifted} had drifted"))
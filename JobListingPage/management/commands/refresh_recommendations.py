@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from authUser.models import Profile
+from JobListingPage import recommend
+
+
+class Command(BaseCommand):
+    help = "Recompute the recommended jobs of every profile whose ranking is stale; run it every few minutes"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true',
+                            help="Recompute every profile, not only those older than RECOMMENDATION_MAX_AGE_MINUTES")
+
+    def handle(self, *args, **options):
+        # One refresh of the feature arrays serves every profile below.
+        recommend.features.refresh()
+        profiles = Profile.objects.order_by('pk')
+        if not options['all']:
+            profiles = profiles.exclude(recommendation__computed_at__gte=timezone.now() - recommend.MAX_AGE)
+        count = 0
+        for profile in profiles.iterator(chunk_size=500):
+            recommend.recompute(profile, refresh=False)
+            count += 1
+        self.stdout.write(self.style.SUCCESS(
+            f"Recomputed recommendations for {count} profiles over {int(recommend.features.snapshot.live.sum())} open jobs"
+        ))
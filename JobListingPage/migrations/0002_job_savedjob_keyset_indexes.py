@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-18 11:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('JobListingPage', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['date_posted', 'id'], name='job_date_posted_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='savedjob',
+            index=models.Index(fields=['saved_on', 'id'], name='savedjob_saved_on_id_idx'),
+        ),
+    ]
@@ -0,0 +1,100 @@
+# Generated by Django 4.2.7 on 2026-10-18 11:57
+
+import math
+
+from django.db import migrations, models
+
+# A frozen copy of JobListingPage.geo as it was when this migration was
+# written, so later changes to the live table or grid cannot change what
+# this migration does.
+KNOWN_LOCATIONS = {
+    "lagos": (6.5244, 3.3792),
+    "ikeja": (6.6018, 3.3515),
+    "lekki": (6.4698, 3.5852),
+    "victoria island": (6.4281, 3.4219),
+    "yaba": (6.5095, 3.3711),
+    "surulere": (6.5000, 3.3500),
+    "ikorodu": (6.6194, 3.5105),
+    "abuja": (9.0765, 7.3986),
+    "ibadan": (7.3775, 3.9470),
+    "abeokuta": (7.1475, 3.3619),
+    "port harcourt": (4.8156, 7.0498),
+    "benin city": (6.3350, 5.6037),
+    "enugu": (6.5244, 7.5186),
+    "kano": (12.0022, 8.5920),
+    "kaduna": (10.5105, 7.4165),
+    "jos": (9.8965, 8.8583),
+    "ilorin": (8.4966, 4.5421),
+    "owerri": (5.4836, 7.0333),
+    "uyo": (5.0377, 7.9128),
+    "calabar": (4.9757, 8.3417),
+    "warri": (5.5544, 5.7932),
+    "accra": (5.6037, -0.1870),
+    "nairobi": (-1.2921, 36.8219),
+    "london": (51.5072, -0.1276),
+}
+CELL_DEGREES = 0.05
+GRID_ROWS = 3600
+GRID_COLS = 7200
+
+
+def geocode(location):
+    if not location:
+        return None
+    text = " ".join(location.lower().split())
+    if text in KNOWN_LOCATIONS:
+        return KNOWN_LOCATIONS[text]
+    for part in text.split(","):
+        part = part.strip()
+        if part in KNOWN_LOCATIONS:
+            return KNOWN_LOCATIONS[part]
+    return None
+
+
+def grid_cell(latitude, longitude):
+    row = min(max(int(math.floor((latitude + 90) / CELL_DEGREES)), 0), GRID_ROWS - 1)
+    col = int(math.floor((longitude + 180) / CELL_DEGREES)) % GRID_COLS
+    return row * GRID_COLS + col
+
+
+def geocode_existing(apps, schema_editor):
+    Job = apps.get_model('JobListingPage', 'Job')
+    Profile = apps.get_model('authUser', 'Profile')
+    for job in Job.objects.all().iterator():
+        coordinates = geocode(job.location)
+        if coordinates:
+            job.latitude, job.longitude = coordinates
+            job.geo_cell = grid_cell(*coordinates)
+            job.save(update_fields=['latitude', 'longitude', 'geo_cell'])
+    for profile in Profile.objects.exclude(location=None).iterator():
+        coordinates = geocode(profile.location)
+        if coordinates:
+            profile.latitude, profile.longitude = coordinates
+            profile.save(update_fields=['latitude', 'longitude'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('JobListingPage', '0002_job_savedjob_keyset_indexes'),
+        ('authUser', '0004_profile_coordinates'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='geo_cell',
+            field=models.IntegerField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='latitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='longitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.RunPython(geocode_existing, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 4.2.7 on 2026-10-18 11:59
+
+from django.db import migrations
+
+# The search table's DDL and backfill as they were when this migration was
+# written; JobListingPage.search keeps it current afterwards. Databases
+# without full-text support here get no table.
+CREATE_SQL = {
+    'postgresql': [
+        'CREATE TABLE IF NOT EXISTS "JobListingPage_jobsearch" ('
+        'job_id bigint PRIMARY KEY REFERENCES "JobListingPage_job" (id) ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, '
+        'document tsvector NOT NULL)',
+        'CREATE INDEX IF NOT EXISTS jobsearch_document_gin ON "JobListingPage_jobsearch" USING GIN (document)',
+        'INSERT INTO "JobListingPage_jobsearch" (job_id, document) '
+        "SELECT id, setweight(to_tsvector('english', title), 'A') || "
+        "setweight(to_tsvector('english', description), 'C') || "
+        "setweight(to_tsvector('english', location), 'B') "
+        'FROM "JobListingPage_job" ON CONFLICT (job_id) DO NOTHING',
+    ],
+    'sqlite': [
+        'CREATE VIRTUAL TABLE IF NOT EXISTS "JobListingPage_jobsearch" '
+        "USING fts5(title, description, location, tokenize='porter unicode61')",
+        'INSERT INTO "JobListingPage_jobsearch" (rowid, title, description, location) '
+        'SELECT id, title, description, location FROM "JobListingPage_job"',
+    ],
+}
+DROP_SQL = 'DROP TABLE IF EXISTS "JobListingPage_jobsearch"'
+
+
+def create_search_index(apps, schema_editor):
+    for sql in CREATE_SQL.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(sql)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor in CREATE_SQL:
+        schema_editor.execute(DROP_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('JobListingPage', '0003_job_coordinates_geo_cell'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
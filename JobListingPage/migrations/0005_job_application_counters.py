@@ -0,0 +1,42 @@
+# Generated by Django 4.2.7 on 2026-10-18 12:01
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_existing_applications(apps, schema_editor):
+    Job = apps.get_model('JobListingPage', 'Job')
+    JobApplication = apps.get_model('JobListingPage', 'JobApplication')
+
+    def count(**filters):
+        applications = (JobApplication.objects.filter(job=OuterRef('pk'), **filters)
+                        .order_by().values('job').annotate(total=Count('id')).values('total'))
+        return Coalesce(Subquery(applications), 0)
+
+    Job.objects.update(applications_count=count(), accepted_count=count(status='Accepted'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('JobListingPage', '0004_job_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='accepted_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='applications_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(condition=models.Q(('accepted_count__lt', models.F('applicants_needed'))), fields=['date_posted', 'id'], name='job_open_date_posted_id_idx'),
+        ),
+        migrations.RunPython(count_existing_applications, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 4.2.7 on 2026-10-18 12:14
+
+from django.db import migrations, models
+import django.utils.timezone
+from django.db.models import F
+
+
+def backfill_updated_at(apps, schema_editor):
+    # Best available guess for rows that predate the column.
+    apps.get_model('JobListingPage', 'Job').objects.update(updated_at=F('date_posted'))
+    apps.get_model('JobListingPage', 'SavedJob').objects.update(updated_at=F('saved_on'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('JobListingPage', '0005_job_application_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(max_length=32)),
+                ('object_id', models.BigIntegerField()),
+                ('deleted_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='jobapplication',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='savedjob',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(backfill_updated_at, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['updated_at', 'id'], name='job_updated_at_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='jobapplication',
+            index=models.Index(fields=['updated_at', 'id'], name='jobapp_updated_at_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='savedjob',
+            index=models.Index(fields=['updated_at', 'id'], name='savedjob_updated_at_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tombstone',
+            index=models.Index(fields=['deleted_at', 'id'], name='tombstone_deleted_at_id_idx'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 4.2.7 on 2026-10-18 12:35
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def drop_duplicate_saved_jobs(apps, schema_editor):
+    # Keep the first save of each (user, job); tombstone the rest so synced clients drop them too.
+    SavedJob = apps.get_model('JobListingPage', 'SavedJob')
+    Tombstone = apps.get_model('JobListingPage', 'Tombstone')
+    duplicated = (SavedJob.objects.values('user', 'job').annotate(first=Min('id'), copies=Count('id'))
+                  .filter(copies__gt=1).order_by())
+    for row in duplicated:
+        extra = list(SavedJob.objects.filter(user=row['user'], job=row['job'])
+                     .exclude(pk=row['first']).values_list('pk', flat=True))
+        SavedJob.objects.filter(pk__in=extra).delete()
+        Tombstone.objects.bulk_create(Tombstone(model='savedJob', object_id=pk) for pk in extra)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('JobListingPage', '0008_recommendation'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_duplicate_saved_jobs, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='jobapplication',
+            index=models.Index(fields=['applicant', 'status', 'id'], name='jobapp_applicant_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='savedjob',
+            index=models.Index(fields=['user', 'saved_on', 'id'], name='savedjob_user_saved_on_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='savedjob',
+            constraint=models.UniqueConstraint(fields=('user', 'job'), name='savedjob_once_per_user'),
+        ),
+    ]
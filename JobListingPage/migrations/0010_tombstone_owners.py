@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-18 14:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('JobListingPage', '0009_my_lists_indexes_savedjob_unique'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tombstone',
+            name='owner_id',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='tombstone',
+            name='poster_id',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+    ]
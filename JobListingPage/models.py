@@ -1,6 +1,12 @@
-from django.db import models
+from django.db import models, transaction
+from django.core.validators import MaxValueValidator, MinValueValidator
+from django.db.models import Case, ExpressionWrapper, F, FloatField, Q, Value, When
+from django.db.models.functions import Greatest
+from django.utils import timezone
 from authUser.models import CustomUser
 from authUser.models import Profile
+from .geo import grid_cell, loaded_geo, locate
+from . import listing_cache, search
 
 # User Profile Model
 # class UserProfile(models.Model):
@@ -11,39 +17,250 @@ from authUser.models import Profile
 #     def __str__(self):
 #         return self.user.username
 
+# A job is open while fewer applicants are accepted than it needs
+OPEN_JOB = Q(accepted_count__lt=F('applicants_needed'))
+
+class JobQuerySet(models.QuerySet):
+    def bulk_create(self, objs, *args, **kwargs):
+        # bulk_create skips save() and post_save, so fill in what they would have.
+        objs = list(objs)
+        for job in objs:
+            job.fill_geo()
+        objs = super().bulk_create(objs, *args, **kwargs)
+        search.index_jobs([job for job in objs if job.pk is not None])
+        listing_cache.invalidate('job')
+        return objs
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        # Likewise for bulk_update, which also leaves auto_now alone; counters
+        # are never written back, as in Job.save.
+        objs, fields = list(objs), set(fields) - set(Job.COUNTER_FIELDS)
+        if fields & {'location', 'latitude', 'longitude'}:
+            for job in objs:
+                job.fill_geo()
+            fields |= {'latitude', 'longitude', 'geo_cell'}
+        now = timezone.now()
+        for job in objs:
+            job.updated_at = now
+        rows = super().bulk_update(objs, fields | {'updated_at'}, *args, **kwargs)
+        if fields & {'title', 'description', 'location'}:
+            search.index_jobs(objs)
+        listing_cache.invalidate('job', *[job.pk for job in objs])
+        return rows
+
 # Job Listing Model
 class Job(models.Model):
     title = models.CharField(max_length=255)
     description = models.TextField()
     contract_duration = models.CharField(max_length=50)  # e.g., "2hrs Contract"
     date_posted = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)  # read by delta sync, see sync.py
     job_date = models.DateTimeField()
     location = models.CharField(max_length=255)
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    geo_cell = models.IntegerField(null=True, blank=True, editable=False, db_index=True)  # see geo.grid_cell
     payment = models.DecimalField(max_digits=10, decimal_places=2)
     applicants_needed = models.PositiveIntegerField(default=1)
     posted_by = models.ForeignKey(Profile, on_delete=models.CASCADE)
+    # Maintained by JobApplication.save and the post_delete receiver in
+    # signals.py; `manage.py reconcile_job_counters` repairs any drift.
+    applications_count = models.PositiveIntegerField(default=0, editable=False)
+    accepted_count = models.PositiveIntegerField(default=0, editable=False)
+
+    COUNTER_FIELDS = ('applications_count', 'accepted_count')
+
+    objects = JobQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Keyset pagination seeks on (date_posted, id)
+            models.Index(fields=['date_posted', 'id'], name='job_date_posted_id_idx'),
+            # Same key over open jobs only, for ?open=true
+            models.Index(fields=['date_posted', 'id'], condition=OPEN_JOB, name='job_open_date_posted_id_idx'),
+            # Delta sync seeks on (updated_at, id)
+            models.Index(fields=['updated_at', 'id'], name='job_updated_at_id_idx'),
+        ]
 
     def __str__(self):
         return self.title
 
+    @property
+    def spots_remaining(self):
+        return max(self.applicants_needed - self.accepted_count, 0)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        return loaded_geo(super().from_db(db, field_names, values))
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        loaded_geo(self)
+
+    def fill_geo(self):
+        locate(self)
+        self.geo_cell = grid_cell(self.latitude, self.longitude)
+
+    def save(self, *args, **kwargs):
+        self.fill_geo()
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            # Never write back counters this instance may have read long ago.
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.COUNTER_FIELDS
+            ]
+        super(Job, self).save(*args, **kwargs)
+
+def adjust_job_counters(job_id, applications=0, accepted=0):
+    """Add to a job's counters in one UPDATE, never taking them below zero."""
+    changes = {}
+    if applications:
+        changes['applications_count'] = Greatest(F('applications_count') + applications, 0)
+    if accepted:
+        changes['accepted_count'] = Greatest(F('accepted_count') + accepted, 0)
+    if changes:
+        Job.objects.filter(pk=job_id).update(updated_at=timezone.now(), **changes)
+        listing_cache.invalidate('job', job_id)
+
 # Job Application Model
 class JobApplication(models.Model):
+    PENDING = 'Pending'
+    ACCEPTED = 'Accepted'
+    REJECTED = 'Rejected'
+
     job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='applications')
     applicant = models.ForeignKey(Profile, on_delete=models.CASCADE)
     status = models.CharField(max_length=50, choices=[
-        ('Pending', 'Pending'),
-        ('Accepted', 'Accepted'),
-        ('Rejected', 'Rejected'),
-    ], default='Pending')
+        (PENDING, 'Pending'),
+        (ACCEPTED, 'Accepted'),
+        (REJECTED, 'Rejected'),
+    ], default=PENDING)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['updated_at', 'id'], name='jobapp_updated_at_id_idx'),
+            # A worker's own applications, optionally by status (/jobApplication/me/)
+            models.Index(fields=['applicant', 'status', 'id'], name='jobapp_applicant_status_idx'),
+        ]
 
     def __str__(self):
         return f"{self.applicant.user.username} - {self.job.title}"
 
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            previous = None
+            if not self._state.adding:
+                # Lock the row so concurrent status changes are counted once each.
+                previous = (JobApplication.objects.select_for_update()
+                            .filter(pk=self.pk).values_list('job_id', 'status').first())
+            super(JobApplication, self).save(*args, **kwargs)
+
+            if previous is None:
+                adjust_job_counters(self.job_id, applications=1, accepted=int(self.status == self.ACCEPTED))
+            elif previous[0] != self.job_id:
+                adjust_job_counters(previous[0], applications=-1, accepted=-int(previous[1] == self.ACCEPTED))
+                adjust_job_counters(self.job_id, applications=1, accepted=int(self.status == self.ACCEPTED))
+            elif previous[1] != self.status:
+                adjust_job_counters(self.job_id, accepted=int(self.status == self.ACCEPTED) - int(previous[1] == self.ACCEPTED))
+
 # Saved Jobs Model
 class SavedJob(models.Model):
     user = models.ForeignKey(Profile, on_delete=models.CASCADE)
     job = models.ForeignKey(Job, on_delete=models.CASCADE)
     saved_on = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # Keyset pagination seeks on (saved_on, id)
+            models.Index(fields=['saved_on', 'id'], name='savedjob_saved_on_id_idx'),
+            models.Index(fields=['updated_at', 'id'], name='savedjob_updated_at_id_idx'),
+            # A worker's own saved jobs, newest first (/savedJob/me/)
+            models.Index(fields=['user', 'saved_on', 'id'], name='savedjob_user_saved_on_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'job'], name='savedjob_once_per_user'),
+        ]
 
     def __str__(self):
         return f"{self.user.user.username} saved {self.job.title}"
+
+# Deleted Jobs, JobApplications and SavedJobs, so delta sync can tell
+# clients to drop them. Written by the post_delete receivers in signals.py.
+class Tombstone(models.Model):
+    model = models.CharField(max_length=32)  # sync stream name, e.g. "job"
+    object_id = models.BigIntegerField()
+    # Profiles that may see the delete, for the streams that are not public:
+    # the applicant or saver, and the poster of an application's job.
+    owner_id = models.BigIntegerField(null=True, blank=True)
+    poster_id = models.BigIntegerField(null=True, blank=True)
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['deleted_at', 'id'], name='tombstone_deleted_at_id_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.model} {self.object_id} deleted"
+
+def adjust_profile_rating(profile_id, added=None, removed=None):
+    """
+    Fold one rating into (``added``) and/or out of (``removed``) a profile's
+    running mean in a single UPDATE, so concurrent reviews cannot lose each other.
+    """
+    delta = (added is not None) - (removed is not None)
+    total = F('rating') * F('rating_count') + (added or 0) - (removed or 0)
+    Profile.objects.filter(pk=profile_id).update(
+        rating=Case(
+            When(rating_count__lte=-delta, then=Value(0.0)),
+            default=ExpressionWrapper(total / (F('rating_count') + delta), output_field=FloatField()),
+        ),
+        rating_count=Greatest(F('rating_count') + delta, 0),
+    )
+    listing_cache.invalidate('userProfile', profile_id)  # and the cards embedding the rating
+
+# Review Model
+class Review(models.Model):
+    """One party's rating of the other after an accepted application: the poster rates the applicant or vice versa."""
+    application = models.ForeignKey(JobApplication, on_delete=models.CASCADE, related_name='reviews')
+    reviewer = models.ForeignKey(Profile, on_delete=models.CASCADE, related_name='reviews_given')
+    reviewee = models.ForeignKey(Profile, on_delete=models.CASCADE, related_name='reviews_received')
+    rating = models.PositiveSmallIntegerField(validators=[MinValueValidator(1), MaxValueValidator(5)])
+    comment = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['application', 'reviewer'], name='review_once_per_application'),
+        ]
+
+    def __str__(self):
+        return f"{self.rating}/5 for {self.reviewee_id} on application {self.application_id}"
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            previous = None
+            if not self._state.adding:
+                previous = (Review.objects.select_for_update()
+                            .filter(pk=self.pk).values_list('reviewee_id', 'rating').first())
+            super(Review, self).save(*args, **kwargs)
+
+            if previous is None:
+                adjust_profile_rating(self.reviewee_id, added=self.rating)
+            elif previous[0] != self.reviewee_id:
+                adjust_profile_rating(previous[0], removed=previous[1])
+                adjust_profile_rating(self.reviewee_id, added=self.rating)
+            elif previous[1] != self.rating:
+                adjust_profile_rating(self.reviewee_id, added=self.rating, removed=previous[1])
+
+# Recommended Jobs: a worker's top-ranked open jobs, precomputed by recommend.py
+class Recommendation(models.Model):
+    profile = models.OneToOneField(Profile, on_delete=models.CASCADE, primary_key=True, related_name='recommendation')
+    job_ids = models.JSONField(default=list)  # best first
+    scores = models.JSONField(default=list)   # parallel to job_ids
+    computed_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{len(self.job_ids)} jobs for {self.profile_id}"
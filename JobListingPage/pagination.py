@@ -0,0 +1,148 @@
+import base64
+import binascii
+import json
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination, replace_query_param
+
+
+class KeysetCursorPagination(CursorPagination):
+    """
+    Cursor pagination that seeks on the whole ordering tuple.
+
+    DRF's CursorPagination only seeks on the first ordering column and
+    OFFSETs past ties; here the cursor carries the value of every ordering
+    column, so each page is a single index range scan however deep it is.
+    Views set ``ordering`` and must end it with a unique column (``id``);
+    it may name annotations (e.g. a search rank) as well as model fields.
+    """
+    ordering = ('-id',)
+    page_size_query_param = 'page_size'
+    max_page_size = getattr(settings, 'MAX_PAGE_SIZE', 100)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+        return self._set_page(list(self._page_queryset(queryset, request, view)))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """paginate_queryset for async views: the page is read with the async ORM."""
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+        return self._set_page([obj async for obj in self._page_queryset(queryset, request, view)])
+
+    def _page_queryset(self, queryset, request, view):
+        self.base_url = request.build_absolute_uri()
+        self.model = queryset.model
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+
+        reverse = self.cursor is not None and self.cursor['reverse']
+        ordering = _reverse_ordering(self.ordering) if reverse else self.ordering
+        queryset = queryset.order_by(*ordering)
+        if self.cursor is not None:
+            queryset = queryset.filter(_seek(ordering, self.cursor['position']))
+        # One extra row tells whether another page follows.
+        return queryset[:self.page_size + 1]
+
+    def _set_page(self, results):
+        reverse = self.cursor is not None and self.cursor['reverse']
+        self.page = results[:self.page_size]
+        has_more = len(results) > self.page_size
+
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, self.cursor is not None
+
+        return self.page
+
+    def get_ordering(self, request, queryset, view):
+        return tuple(getattr(view, 'ordering', None) or self.ordering)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        if self.page:
+            position = self._get_position_from_instance(self.page[-1], self.ordering)
+        else:
+            position = self.cursor['position']
+        return self.encode_cursor({'position': position, 'reverse': False})
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if self.page:
+            position = self._get_position_from_instance(self.page[0], self.ordering)
+        else:
+            position = self.cursor['position']
+        return self.encode_cursor({'position': position, 'reverse': True})
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')))
+            position, reverse = list(payload['p']), bool(payload['r'])
+            if len(position) != len(self.ordering):
+                raise ValueError(encoded)
+            # Reject values the columns cannot hold before they reach the query.
+            for field, value in zip(self.ordering, position):
+                model_field = self._get_field(field)
+                if model_field is not None:
+                    model_field.to_python(value)
+                elif not isinstance(value, (int, float)):
+                    raise ValueError(value)
+        except (TypeError, ValueError, KeyError, binascii.Error, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+        return {'position': position, 'reverse': reverse}
+
+    def encode_cursor(self, cursor):
+        payload = json.dumps({'p': cursor['position'], 'r': int(cursor['reverse'])})
+        encoded = base64.urlsafe_b64encode(payload.encode('ascii')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def _get_position_from_instance(self, instance, ordering):
+        position = []
+        for field in ordering:
+            model_field = self._get_field(field)
+            if model_field is not None:
+                position.append(model_field.value_to_string(instance))
+            else:
+                position.append(getattr(instance, field.lstrip('-')))
+        return position
+
+    def _get_field(self, field):
+        try:
+            return self.model._meta.get_field(field.lstrip('-'))
+        except FieldDoesNotExist:
+            return None
+
+
+def _reverse_ordering(ordering):
+    return tuple(field[1:] if field.startswith('-') else '-' + field for field in ordering)
+
+
+def _seek(ordering, position):
+    """
+    Rows strictly after ``position`` in ``ordering``, spelled out as
+    (a < x) OR (a = x AND b < y) ... so any backend can use the index.
+    """
+    condition = Q()
+    for i, field in enumerate(ordering):
+        name = field.lstrip('-')
+        lookup = '__lt' if field.startswith('-') else '__gt'
+        clause = Q(**{name + lookup: position[i]})
+        for previous, value in zip(ordering[:i], position):
+            clause &= Q(**{previous.lstrip('-'): value})
+        condition |= clause
+    return condition
@@ -0,0 +1,281 @@
+import atexit
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import NamedTuple
+
+import numpy as np
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import Q
+from django.utils import timezone
+
+from .geo import EARTH_RADIUS_KM
+from .models import OPEN_JOB, Job, Profile, Recommendation, Tombstone
+
+# Recommended jobs. Each process keeps the open jobs as a feature matrix
+# (one NumPy array per feature), brought up to date from Job.updated_at and
+# Tombstone instead of reloaded. A worker's jobs are scored against all of it at once,
+# and the top TOP_K are stored on their Recommendation row, which is what a
+# request reads. Once the row is older than MAX_AGE the request still gets
+# it, and it is recomputed in a background thread, unless `manage.py
+# refresh_recommendations` gets there first.
+TOP_K = getattr(settings, 'RECOMMENDED_JOBS', 100)
+MAX_AGE = timedelta(minutes=getattr(settings, 'RECOMMENDATION_MAX_AGE_MINUTES', 30))
+
+# Share of the score each signal contributes; every signal is in [0, 1].
+WEIGHTS = {
+    'location': 0.4,
+    'payment': 0.25,
+    'date': 0.2,
+    'history': 0.15,
+}
+LOCATION_SCALE_KM = 25.0  # a job this far away scores 1/e on location
+DATE_SCALE_DAYS = 7.0     # likewise for how soon it starts
+
+# Rows changed this close to the last refresh are fetched again, in case
+# their transaction committed after it.
+OVERLAP = timedelta(seconds=30)
+
+logger = logging.getLogger(__name__)
+
+FEATURE_FIELDS = ('id', 'latitude', 'longitude', 'payment', 'job_date', 'posted_by_id', 'accepted_count', 'applicants_needed')
+
+
+class FeatureSnapshot(NamedTuple):
+    """
+    Open jobs as parallel arrays: row i of every array describes the job
+    ids[i]. Never modified once published; refreshes build a new one.
+    """
+    ids: np.ndarray
+    latitude: np.ndarray
+    longitude: np.ndarray
+    payment: np.ndarray
+    job_date: np.ndarray  # POSIX seconds
+    poster: np.ndarray
+    live: np.ndarray  # False once a job fills up, starts or is deleted
+    rows: dict  # job id -> row
+
+
+EMPTY = FeatureSnapshot(
+    np.empty(0, np.int64), np.empty(0), np.empty(0), np.empty(0), np.empty(0), np.empty(0, np.int64), np.empty(0, bool), {},
+)
+
+
+class JobFeatures:
+    """
+    The current FeatureSnapshot of the open jobs. refresh() publishes a new
+    snapshot with one assignment, so a reader that takes ``snapshot`` once
+    has a consistent set of arrays whatever refreshes run meanwhile. The
+    lock only keeps refreshes from racing each other.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.snapshot = EMPTY
+            self.synced_at = None
+
+    def refresh(self):
+        """Bring the snapshot up to date: everything on first use, then only what changed."""
+        with self.lock:
+            now = timezone.now()
+            if self.synced_at is None:
+                changed = Job.objects.filter(OPEN_JOB, job_date__gte=now).values_list(*FEATURE_FIELDS)
+                deleted = []
+            else:
+                since = self.synced_at - OVERLAP
+                changed = Job.objects.filter(updated_at__gte=since).values_list(*FEATURE_FIELDS)
+                deleted = Tombstone.objects.filter(model='job', deleted_at__gte=since).values_list('object_id', flat=True)
+            self.snapshot = _apply(self.snapshot, list(changed), list(deleted), now)
+            self.synced_at = now
+
+
+def _apply(snapshot, changed, deleted, now):
+    """
+    ``snapshot`` with ``changed`` rows and ``deleted`` ids applied, as a new
+    snapshot. Jobs whose date is before ``now`` are retired as well, so the
+    arrays only hold jobs that can still be offered, plus dead rows until
+    the next compaction.
+    """
+    now = now.timestamp()
+    updated, added = [], []
+    for row in changed:
+        job_id, latitude, longitude, payment, job_date, poster, accepted, needed = row
+        values = (
+            np.nan if latitude is None else latitude, np.nan if longitude is None else longitude,
+            float(payment), job_date.timestamp(), poster,
+        )
+        is_open = accepted < needed and values[3] >= now
+        index = snapshot.rows.get(job_id)
+        if index is not None:
+            updated.append((index, values, is_open))
+        elif is_open:
+            added.append((job_id, *values))
+    retired = [snapshot.rows[job_id] for job_id in deleted if job_id in snapshot.rows]
+    expired = np.flatnonzero(snapshot.live & (snapshot.job_date < now))
+    if not (updated or added or retired or len(expired)):
+        return snapshot
+
+    # Readers may still hold the published arrays, so write into copies.
+    latitude, longitude, payment, job_date, poster, live = (array.copy() for array in snapshot[1:7])
+    live[expired] = False
+    for index, values, is_open in updated:
+        latitude[index], longitude[index], payment[index], job_date[index], poster[index] = values
+        live[index] = is_open
+    live[retired] = False
+
+    ids, rows = snapshot.ids, snapshot.rows
+    if added:
+        columns = list(zip(*added))
+        start = len(ids)
+        ids = np.concatenate([ids, np.array(columns[0], np.int64)])
+        latitude = np.concatenate([latitude, np.array(columns[1], float)])
+        longitude = np.concatenate([longitude, np.array(columns[2], float)])
+        payment = np.concatenate([payment, np.array(columns[3], float)])
+        job_date = np.concatenate([job_date, np.array(columns[4], float)])
+        poster = np.concatenate([poster, np.array(columns[5], np.int64)])
+        live = np.concatenate([live, np.ones(len(added), bool)])
+        rows = {**rows, **{job_id: start + i for i, job_id in enumerate(columns[0])}}
+
+    snapshot = FeatureSnapshot(ids, latitude, longitude, payment, job_date, poster, live, rows)
+    if len(live) and (~live).sum() > len(live) // 2:
+        snapshot = _compact(snapshot)
+    return snapshot
+
+
+def _compact(snapshot):
+    keep = snapshot.live
+    ids = snapshot.ids[keep]
+    return FeatureSnapshot(*(array[keep] for array in snapshot[:7]), {int(job_id): i for i, job_id in enumerate(ids)})
+
+
+features = JobFeatures()
+
+
+class WorkerPreferences:
+    """What a worker's profile and history say about the jobs they want."""
+
+    def __init__(self, profile):
+        self.profile_id = profile.pk
+        history = list(
+            Job.objects.filter(Q(applications__applicant=profile) | Q(savedjob__user=profile))
+            .values_list('id', 'latitude', 'longitude', 'payment', 'posted_by_id').distinct()
+        )
+        self.seen = np.array([row[0] for row in history], np.int64)
+        self.posters = np.array(sorted({row[4] for row in history}), np.int64)
+        self.payment = float(np.median([float(row[3]) for row in history])) if history else None
+
+        self.latitude, self.longitude = profile.latitude, profile.longitude
+        located = [(row[1], row[2]) for row in history if row[1] is not None and row[2] is not None]
+        if (self.latitude is None or self.longitude is None) and located:
+            # No location on the profile: assume they work where they have applied.
+            self.latitude, self.longitude = np.mean(located, axis=0).tolist()
+
+
+def _distance_km(latitude, longitude, latitudes, longitudes):
+    lat1, lng1 = np.radians(latitude), np.radians(longitude)
+    lat2, lng2 = np.radians(latitudes), np.radians(longitudes)
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def score(jobs, preferences, now=None):
+    """
+    Score of every row of ``jobs`` for ``preferences``; -inf where the job
+    cannot be offered, which includes the worker's own jobs.
+    """
+    now = (now or timezone.now()).timestamp()
+    offerable = jobs.live & (jobs.job_date >= now) & (jobs.poster != preferences.profile_id)
+    if len(preferences.seen):
+        offerable &= ~np.isin(jobs.ids, preferences.seen)
+    if not offerable.any():
+        return np.full(len(jobs.ids), -np.inf)
+
+    if preferences.latitude is not None and preferences.longitude is not None:
+        distance = _distance_km(preferences.latitude, preferences.longitude, jobs.latitude, jobs.longitude)
+        location = np.nan_to_num(np.exp(-distance / LOCATION_SCALE_KM), nan=0.0)
+    else:
+        location = np.zeros(len(jobs.ids))
+
+    # Pay relative to what the worker usually takes, or to the market median.
+    reference = preferences.payment or float(np.median(jobs.payment[offerable]))
+    ratio = np.log(np.maximum(jobs.payment, 0.01) / max(reference, 0.01))
+    payment = 1.0 / (1.0 + np.exp(-2.0 * ratio))
+
+    date = np.exp(-np.maximum(jobs.job_date - now, 0.0) / (DATE_SCALE_DAYS * 86400))
+    history = np.isin(jobs.poster, preferences.posters).astype(float)
+
+    total = (WEIGHTS['location'] * location + WEIGHTS['payment'] * payment
+             + WEIGHTS['date'] * date + WEIGHTS['history'] * history)
+    return np.where(offerable, total, -np.inf)
+
+
+def top_jobs(scores, ids, k=TOP_K):
+    """The ``k`` best (job id, score) pairs, best first, leaving out jobs that cannot be offered."""
+    candidates = np.flatnonzero(np.isfinite(scores))
+    if len(candidates) > k:
+        candidates = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+    candidates = candidates[np.argsort(-scores[candidates], kind='stable')]
+    return [int(job_id) for job_id in ids[candidates]], [round(float(value), 6) for value in scores[candidates]]
+
+
+def recompute(profile, refresh=True):
+    """Score every open job for ``profile`` and store their top TOP_K as its Recommendation."""
+    if refresh:
+        features.refresh()
+    jobs = features.snapshot
+    job_ids, scores = top_jobs(score(jobs, WorkerPreferences(profile)), jobs.ids)
+    recommendation, _ = Recommendation.objects.update_or_create(
+        profile=profile, defaults={'job_ids': job_ids, 'scores': scores, 'computed_at': timezone.now()},
+    )
+    return recommendation
+
+
+_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='recommend')
+atexit.register(_pool.shutdown, wait=False)
+_queued = set()
+_queued_lock = threading.Lock()
+
+
+def schedule(profile_id):
+    """Recompute the profile's Recommendation in the background, unless that is already queued."""
+    with _queued_lock:
+        if profile_id in _queued:
+            return
+        _queued.add(profile_id)
+    _pool.submit(_run, profile_id)
+
+
+def _run(profile_id):
+    close_old_connections()
+    try:
+        with _queued_lock:
+            _queued.discard(profile_id)
+        profile = Profile.objects.filter(pk=profile_id).first()
+        if profile is not None:
+            recompute(profile)
+    except Exception:
+        logger.exception("Could not recompute the recommendations of profile %s", profile_id)
+    finally:
+        close_old_connections()
+
+
+def for_user(user_id):
+    """
+    The Recommendation of the user's profile: the stored one, a single
+    lookup, however old. A stale one is recomputed in the background for
+    the next request. A profile that has none yet is scored here, once.
+    None without a profile.
+    """
+    recommendation = Recommendation.objects.filter(profile__user_id=user_id).first()
+    if recommendation is not None:
+        if timezone.now() - recommendation.computed_at >= MAX_AGE:
+            schedule(recommendation.profile_id)
+        return recommendation
+    profile = Profile.objects.filter(user_id=user_id).first()
+    return recompute(profile) if profile is not None else None
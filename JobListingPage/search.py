@@ -0,0 +1,133 @@
+import re
+
+from django.db import connection
+from django.db.models import FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+# Shadow table holding one search document per Job, keyed on the job id.
+# On Postgres it is a tsvector column behind a GIN index; on SQLite an FTS5
+# virtual table. It is created by migration 0004_job_search_index and kept current by the
+# post_save/post_delete receivers in signals.py, never rebuilt wholesale.
+SEARCH_TABLE = 'JobListingPage_jobsearch'
+
+_WORDS = re.compile(r'\w+', re.UNICODE)
+
+
+class PostgresJobSearch:
+    # Title matches outrank location matches, which outrank description matches.
+    document_sql = (
+        "setweight(to_tsvector('english', %s), 'A') || "
+        "setweight(to_tsvector('english', %s), 'C') || "
+        "setweight(to_tsvector('english', %s), 'B')"
+    )
+
+    def __init__(self, conn):
+        self.table = conn.ops.quote_name(SEARCH_TABLE)
+        self.job_table = conn.ops.quote_name('JobListingPage_job')
+
+    def index(self, cursor, jobs):
+        cursor.executemany(
+            f"INSERT INTO {self.table} (job_id, document) VALUES (%s, {self.document_sql}) "
+            f"ON CONFLICT (job_id) DO UPDATE SET document = EXCLUDED.document",
+            [[job.pk, job.title, job.description, job.location] for job in jobs],
+        )
+
+    def unindex(self, cursor, job_id):
+        cursor.execute(f"DELETE FROM {self.table} WHERE job_id = %s", [job_id])
+
+    def search(self, queryset, query):
+        terms = ' '.join(_WORDS.findall(query))
+        matches = RawSQL(
+            f"SELECT job_id FROM {self.table} WHERE document @@ plainto_tsquery('english', %s)", [terms]
+        )
+        # ts_rank is a real (float4). The keyset cursor carries the rank as a
+        # Python float and seeks with search_rank = x, so hand it out as
+        # double precision, which round-trips exactly.
+        rank = RawSQL(
+            f"SELECT ts_rank(document, plainto_tsquery('english', %s))::double precision FROM {self.table} "
+            f"WHERE job_id = {self.job_table}.id",
+            [terms],
+            output_field=FloatField(),
+        )
+        return queryset.filter(id__in=matches).annotate(search_rank=rank)
+
+
+class SqliteJobSearch:
+    # bm25() weights follow the column order: title, description, location.
+    rank_sql = "-bm25({table}, 10.0, 1.0, 4.0)"
+
+    def __init__(self, conn):
+        self.table = conn.ops.quote_name(SEARCH_TABLE)
+        self.job_table = conn.ops.quote_name('JobListingPage_job')
+
+    def index(self, cursor, jobs):
+        cursor.executemany(f"DELETE FROM {self.table} WHERE rowid = %s", [[job.pk] for job in jobs])
+        cursor.executemany(
+            f"INSERT INTO {self.table} (rowid, title, description, location) VALUES (%s, %s, %s, %s)",
+            [[job.pk, job.title, job.description, job.location] for job in jobs],
+        )
+
+    def unindex(self, cursor, job_id):
+        cursor.execute(f"DELETE FROM {self.table} WHERE rowid = %s", [job_id])
+
+    def search(self, queryset, query):
+        # Quote every word so user input can never be parsed as FTS5 syntax,
+        # and let the last one match as a prefix for search-as-you-type.
+        words = ['"%s"' % word for word in _WORDS.findall(query)]
+        if not words:
+            return queryset.none()
+        words[-1] += '*'
+        terms = ' '.join(words)
+        matches = RawSQL(f"SELECT rowid FROM {self.table} WHERE {self.table} MATCH %s", [terms])
+        rank = RawSQL(
+            f"SELECT {self.rank_sql.format(table=self.table)} FROM {self.table} "
+            f"WHERE {self.table} MATCH %s AND rowid = {self.job_table}.id",
+            [terms],
+            output_field=FloatField(),
+        )
+        return queryset.filter(id__in=matches).annotate(search_rank=rank)
+
+
+BACKENDS = {
+    'postgresql': PostgresJobSearch,
+    'sqlite': SqliteJobSearch,
+}
+
+
+def get_backend(conn=None):
+    """The search backend for ``conn``, or None when that database has no full-text support here."""
+    conn = conn or connection
+    backend = BACKENDS.get(conn.vendor)
+    return backend(conn) if backend else None
+
+
+def search_jobs(queryset, query):
+    """
+    Jobs in ``queryset`` matching ``query`` on title, description and
+    location, annotated with ``search_rank`` (higher is more relevant).
+    """
+    backend = get_backend()
+    if backend is None:
+        terms = Q()
+        for word in _WORDS.findall(query):
+            terms &= Q(title__icontains=word) | Q(description__icontains=word) | Q(location__icontains=word)
+        return queryset.filter(terms).annotate(search_rank=Value(0.0, output_field=FloatField()))
+    return backend.search(queryset, query)
+
+
+def index_jobs(jobs):
+    backend = get_backend()
+    if backend is not None and jobs:
+        with connection.cursor() as cursor:
+            backend.index(cursor, jobs)
+
+
+def index_job(job):
+    index_jobs([job])
+
+
+def unindex_job(job_id):
+    backend = get_backend()
+    if backend is not None:
+        with connection.cursor() as cursor:
+            backend.unindex(cursor, job_id)
@@ -1,24 +1,230 @@
 from rest_framework import serializers
-from .models import Job, JobApplication, SavedJob
+from .models import Job, JobApplication, Review, SavedJob
+from authUser import images
 from authUser.models import Profile
 
 
+class BulkPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    Looks ids up in ``bulk_cache`` when BulkCreateListSerializer has filled
+    it, so validating N items costs one query per relation instead of N.
+    """
+    bulk_cache = None
+
+    def to_internal_value(self, data):
+        if self.bulk_cache is not None and not isinstance(data, bool):
+            try:
+                return self.bulk_cache[int(data)]
+            except (KeyError, TypeError, ValueError):
+                pass
+        return super().to_internal_value(data)
+
+
+class BulkCreateListSerializer(serializers.ListSerializer):
+    """Validates a list of items and writes them with a single bulk_create or bulk_update."""
+
+    def to_internal_value(self, data):
+        related = [
+            (name, field) for name, field in self.child.fields.items()
+            if isinstance(field, BulkPrimaryKeyRelatedField) and not field.read_only
+        ]
+        for name, field in related:
+            ids = [item.get(name) for item in data if isinstance(item, dict)]
+            # Anything that is not a plain id is left for the field's own validation to reject.
+            ids = {int(pk) for pk in ids if isinstance(pk, (int, str)) and str(pk).isdigit()}
+            field.bulk_cache = field.get_queryset().in_bulk(ids)
+        try:
+            return super().to_internal_value(data)
+        finally:
+            for name, field in related:
+                field.bulk_cache = None
+
+    def create(self, validated_data):
+        model = self.child.Meta.model
+        return model.objects.bulk_create([model(**attrs) for attrs in validated_data])
+
+    def update(self, instances, validated_data):
+        fields = set()
+        for instance, attrs in zip(instances, validated_data):
+            for name, value in attrs.items():
+                setattr(instance, name, value)
+            fields.update(attrs)
+        if fields:
+            self.child.Meta.model.objects.bulk_update(instances, fields)
+        return instances
+
+
 class UserProfileSerializer(serializers.ModelSerializer):
+    image_variants = serializers.SerializerMethodField()
+
     class Meta:
         model = Profile
-        fields = ['id', 'user', 'profile_picture', 'rating']
+        fields = ['id', 'user', 'image', 'image_variants', 'rating', 'rating_count']
+        # Maintained from Review rows, never written directly
+        read_only_fields = ['rating', 'rating_count']
+
+    def get_image_variants(self, profile):
+        return images.urls(profile)
 
 class JobSerializer(serializers.ModelSerializer):
+    serializer_related_field = BulkPrimaryKeyRelatedField
+    spots_remaining = serializers.IntegerField(read_only=True)
+
     class Meta:
         model = Job
-        fields = ['id', 'title', 'description', 'contract_duration', 'date_posted', 'job_date', 'location', 'payment', 'applicants_needed', 'posted_by']
+        list_serializer_class = BulkCreateListSerializer
+        fields = ['id', 'title', 'description', 'contract_duration', 'date_posted', 'job_date', 'location', 'latitude', 'longitude', 'payment', 'applicants_needed', 'applications_count', 'accepted_count', 'spots_remaining', 'posted_by', 'updated_at']
 
 class JobApplicationSerializer(serializers.ModelSerializer):
     class Meta:
         model = JobApplication
-        fields = ['id', 'job', 'applicant', 'status']
+        fields = ['id', 'job', 'applicant', 'status', 'updated_at']
+        # Status only changes through the accept/reject actions, which guard applicants_needed
+        read_only_fields = ['status']
+
+    def get_fields(self):
+        fields = super().get_fields()
+        # An application stays with its job and applicant: moving an accepted
+        # one would take a spot on the new job without checking it is free.
+        if self.instance is not None:
+            for name in {'job', 'applicant'} & fields.keys():
+                fields[name].read_only = True
+        return fields
+
+class SavedJobListSerializer(BulkCreateListSerializer):
+    """Bulk saves that skip (user, job) pairs already saved, returning the existing rows for them."""
+
+    def create(self, validated_data):
+        keys = [(attrs['user'].pk, attrs['job'].pk) for attrs in validated_data]
+        saved = {
+            (row.user_id, row.job_id): row for row in SavedJob.objects.filter(
+                user__in={user for user, _ in keys}, job__in={job for _, job in keys},
+            )
+        }
+        new = {}
+        for key, attrs in zip(keys, validated_data):
+            if key not in saved and key not in new:
+                new[key] = SavedJob(**attrs)
+        SavedJob.objects.bulk_create(new.values())
+        saved.update(new)
+        return [saved[key] for key in keys]
 
 class SavedJobSerializer(serializers.ModelSerializer):
+    serializer_related_field = BulkPrimaryKeyRelatedField
+
     class Meta:
         model = SavedJob
-        fields = ['id', 'user', 'job', 'saved_on']
\ No newline at end of file
+        list_serializer_class = SavedJobListSerializer
+        fields = ['id', 'user', 'job', 'saved_on', 'updated_at']
+        # (user, job) is unique, but saving a job twice is not an error:
+        # create() returns the first save instead.
+        validators = []
+
+    def create(self, validated_data):
+        return SavedJob.objects.get_or_create(**validated_data)[0]
+
+
+class ReviewSerializer(serializers.ModelSerializer):
+    """Writes take the reviewer from the caller (``reviewer_id`` in the context), never from the body."""
+
+    class Meta:
+        model = Review
+        fields = ['id', 'application', 'reviewer', 'reviewee', 'rating', 'comment', 'created_at']
+        # The reviewer is the caller; the reviewee is whichever side of the application that is not
+        read_only_fields = ['reviewer', 'reviewee']
+
+    def validate(self, attrs):
+        application = attrs.get('application') or self.instance.application
+        reviewer_id = self.instance.reviewer_id if self.instance is not None else self.context['reviewer_id']
+        if application.status != JobApplication.ACCEPTED:
+            raise serializers.ValidationError({"application": "Only accepted applications can be reviewed."})
+        if reviewer_id == application.applicant_id:
+            attrs['reviewee_id'] = application.job.posted_by_id
+        elif reviewer_id == application.job.posted_by_id:
+            attrs['reviewee_id'] = application.applicant_id
+        else:
+            raise serializers.ValidationError({"reviewer": "Only the job's poster or its applicant can review this application."})
+
+        others = Review.objects.filter(application=application, reviewer_id=reviewer_id)
+        if self.instance is not None:
+            others = others.exclude(pk=self.instance.pk)
+        if others.exists():
+            raise serializers.ValidationError({"reviewer": "This application has already been reviewed by this reviewer."})
+        return attrs
+
+
+class ApplicationIdsSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.IntegerField(min_value=1), allow_empty=False, max_length=500)
+
+
+# Read models. These embed small summaries of related rows so clients need
+# no follow-up requests; the viewsets and admin select_related what they touch.
+
+class ProfileSummarySerializer(serializers.ModelSerializer):
+    username = serializers.CharField(source='user.username', read_only=True)
+    avatar = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Profile
+        fields = ['id', 'username', 'firstName', 'lastName', 'rating', 'rating_count', 'avatar']
+
+    def get_avatar(self, profile):
+        # The small variants only; cards never need the full picture.
+        variants = images.urls(profile)
+        return {variant: variants[variant] for variant in ('thumb', 'small')} if variants else None
+
+class JobSummarySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Job
+        fields = ['id', 'title', 'job_date', 'location', 'payment']
+
+class JobDashboardSerializer(serializers.ModelSerializer):
+    """A poster's job with its applications counted by status (see JobViewSet.summary)."""
+    pending = serializers.IntegerField(read_only=True)
+    accepted = serializers.IntegerField(read_only=True)
+    rejected = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = Job
+        fields = ['id', 'title', 'job_date', 'date_posted', 'applicants_needed', 'pending', 'accepted', 'rejected']
+
+class JobReadSerializer(JobSerializer):
+    posted_by = ProfileSummarySerializer(read_only=True)
+
+class NearbyJobSerializer(JobReadSerializer):
+    distance_km = serializers.FloatField(read_only=True)
+
+    class Meta(JobSerializer.Meta):
+        fields = JobSerializer.Meta.fields + ['distance_km']
+
+class JobApplicationReadSerializer(JobApplicationSerializer):
+    job = JobSummarySerializer(read_only=True)
+    applicant = ProfileSummarySerializer(read_only=True)
+
+class SavedJobReadSerializer(SavedJobSerializer):
+    user = ProfileSummarySerializer(read_only=True)
+    job = JobSummarySerializer(read_only=True)
+
+# The caller's own rows (the /me/ actions): no need to repeat who they are.
+
+class MyJobApplicationSerializer(JobApplicationReadSerializer):
+    class Meta(JobApplicationSerializer.Meta):
+        fields = ['id', 'job', 'status', 'updated_at']
+
+class MySavedJobSerializer(SavedJobSerializer):
+    class Meta(SavedJobSerializer.Meta):
+        read_only_fields = ['user']
+
+class MySavedJobReadSerializer(SavedJobReadSerializer):
+    class Meta(SavedJobSerializer.Meta):
+        fields = ['id', 'job', 'saved_on', 'updated_at']
+
+class ReviewReadSerializer(ReviewSerializer):
+    reviewer = ProfileSummarySerializer(read_only=True)
+    reviewee = ProfileSummarySerializer(read_only=True)
+
+class RecommendedJobSerializer(JobReadSerializer):
+    score = serializers.FloatField(read_only=True)
+
+    class Meta(JobSerializer.Meta):
+        fields = JobSerializer.Meta.fields + ['score']
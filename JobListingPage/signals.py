@@ -0,0 +1,114 @@
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from authUser.models import Profile
+from .geo import locate
+from .models import Job, JobApplication, Review, SavedJob, Tombstone, adjust_job_counters, adjust_profile_rating
+from . import listing_cache, search
+
+
+@receiver(pre_save, sender=Profile)
+def geocode_profile(sender, instance, **kwargs):
+    locate(instance)
+
+
+@receiver(post_save, sender=Job)
+def index_job(sender, instance, **kwargs):
+    search.index_job(instance)
+    listing_cache.invalidate('job', instance.pk)
+
+
+@receiver(post_delete, sender=Job)
+def unindex_job(sender, instance, **kwargs):
+    search.unindex_job(instance.pk)
+    listing_cache.invalidate('job', instance.pk)
+
+
+# Also the job, application, saved job and review cards embedding the
+# profile; see listing_cache.EMBEDDED_IN.
+@receiver(post_save, sender=Profile)
+@receiver(post_delete, sender=Profile)
+def invalidate_profile(sender, instance, **kwargs):
+    listing_cache.invalidate('userProfile', instance.pk)
+
+
+@receiver(post_save, sender=JobApplication)
+@receiver(post_delete, sender=JobApplication)
+def invalidate_application(sender, instance, **kwargs):
+    listing_cache.invalidate('jobApplication', instance.pk)
+
+
+@receiver(post_save, sender=SavedJob)
+@receiver(post_delete, sender=SavedJob)
+def invalidate_saved_job(sender, instance, **kwargs):
+    listing_cache.invalidate('savedJob', instance.pk)
+
+
+# Deletes are counted here rather than in JobApplication.delete so that
+# cascades (e.g. a deleted Profile) are counted too. The instance may have
+# been loaded before a concurrent accept or reject, so what is uncounted is
+# the row as the delete finds it, locked inside the delete's transaction.
+@receiver(pre_delete, sender=JobApplication)
+def lock_application(sender, instance, origin=None, **kwargs):
+    if isinstance(origin, Job) and origin.pk == instance.job_id:
+        instance._deleted_row = None  # the job and its counters go too
+        instance._poster_id = origin.posted_by_id
+        return
+    row = (JobApplication.objects.select_for_update(of=('self',)).filter(pk=instance.pk)
+           .values_list('job_id', 'status', 'job__posted_by_id').first())
+    # The poster is kept for the application's tombstone, see record_tombstone.
+    instance._deleted_row, instance._poster_id = (row[:2], row[2]) if row else (None, None)
+
+
+@receiver(post_delete, sender=JobApplication)
+def uncount_application(sender, instance, **kwargs):
+    row = getattr(instance, '_deleted_row', None)
+    if row is None:
+        return  # its job is being deleted, or someone else deleted it first and uncounted it
+    job_id, status = row
+    adjust_job_counters(job_id, applications=-1, accepted=-int(status == JobApplication.ACCEPTED))
+
+
+
+# Like uncount_application: here so cascaded deletes are counted too, and
+# taking the rating out that the row holds, not a stale instance's.
+@receiver(pre_delete, sender=Review)
+def lock_review(sender, instance, origin=None, **kwargs):
+    if isinstance(origin, Profile) and origin.pk == instance.reviewee_id:
+        instance._deleted_row = None  # the reviewee and its rating go too
+        return
+    instance._deleted_row = (Review.objects.select_for_update()
+                             .filter(pk=instance.pk).values_list('reviewee_id', 'rating').first())
+
+
+@receiver(post_delete, sender=Review)
+def unrate_review(sender, instance, **kwargs):
+    row = getattr(instance, '_deleted_row', None)
+    if row is None:
+        return  # as in uncount_application
+    reviewee_id, rating = row
+    adjust_profile_rating(reviewee_id, removed=rating)
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def invalidate_review(sender, instance, **kwargs):
+    listing_cache.invalidate('review', instance.pk)
+
+
+# Delta sync reports deletes from these; cascades arrive here too.
+TOMBSTONE_STREAMS = {Job: 'job', JobApplication: 'jobApplication', SavedJob: 'savedJob'}
+
+
+@receiver(post_delete, sender=Job)
+@receiver(post_delete, sender=JobApplication)
+@receiver(post_delete, sender=SavedJob)
+def record_tombstone(sender, instance, **kwargs):
+    # Jobs are public; the others are only synced to the profiles they
+    # belong to, and so are their deletes.
+    owners = {}
+    if sender is JobApplication:
+        owners = {'owner_id': instance.applicant_id, 'poster_id': getattr(instance, '_poster_id', None)}
+    elif sender is SavedJob:
+        owners = {'owner_id': instance.user_id}
+    Tombstone.objects.create(model=TOMBSTONE_STREAMS[sender], object_id=instance.pk, **owners)
@@ -0,0 +1,155 @@
+import base64
+import binascii
+import heapq
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from main.metrics import timed
+
+from .models import Job, JobApplication, Profile, SavedJob, Tombstone
+from .pagination import _seek
+from .serializers import JobApplicationReadSerializer, JobReadSerializer, SavedJobReadSerializer
+
+# Delta sync: every change to a Job, JobApplication or SavedJob since a
+# client's last sync that the client's user may see (_visible), oldest first. Each model is one stream read in
+# (updated_at, id) order off its index, and deletes come from Tombstone in
+# (deleted_at, id) order. The sync token records how far each stream has
+# been read, so a page costs one index range scan per stream. It also
+# records the time up to which the client has seen every change.
+STREAMS = {
+    'job': (Job.objects.select_related('posted_by__user'), JobReadSerializer),
+    'jobApplication': (JobApplication.objects.select_related('job', 'applicant__user'), JobApplicationReadSerializer),
+    'savedJob': (SavedJob.objects.select_related('user__user', 'job'), SavedJobReadSerializer),
+}
+TOMBSTONES = 'deleted'
+
+
+def _visible(profiles):
+    """
+    What of each stream the owner of ``profiles`` (a Profile pk queryset)
+    may see: every job, the applications they made or that were made to
+    their jobs, the jobs they saved, and the deletes of all of those.
+    """
+    return {
+        'job': Q(),
+        'jobApplication': Q(applicant_id__in=profiles) | Q(job__posted_by_id__in=profiles),
+        'savedJob': Q(user_id__in=profiles),
+        TOMBSTONES: Q(model='job') | Q(owner_id__in=profiles) | Q(poster_id__in=profiles),
+    }
+
+# Rows this recent are held back until the next sync: a transaction that
+# started earlier can still commit a smaller updated_at behind the token.
+SETTLE = timedelta(seconds=getattr(settings, 'SYNC_SETTLE_SECONDS', 2))
+
+# Tombstones are kept this long (`manage.py purge_tombstones` deletes older
+# ones), so a client that has not synced for longer may have missed
+# deletes and must start over from an empty token.
+RETENTION = timedelta(days=getattr(settings, 'SYNC_TOMBSTONE_RETENTION_DAYS', 30))
+
+
+class InvalidToken(ValueError):
+    pass
+
+
+class ResyncRequired(Exception):
+    """The token's last sync is older than the tombstone retention window."""
+
+
+def retention_cutoff():
+    """Tombstones deleted before this may be purged."""
+    return timezone.now() - RETENTION
+
+
+def encode_token(positions, synced):
+    payload = {stream: [at.isoformat(), pk] for stream, (at, pk) in positions.items()}
+    payload['synced'] = synced.isoformat()
+    return base64.urlsafe_b64encode(json.dumps(payload).encode('ascii')).decode('ascii')
+
+
+def decode_token(token):
+    """
+    ({stream: (datetime, id)}, synced) from a sync token; an empty token
+    starts from the beginning, with synced None.
+    """
+    if not token:
+        return {}, None
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(token.encode('ascii')))
+        synced = payload.pop('synced', None)
+        positions = {}
+        for stream, (at, pk) in payload.items():
+            at = parse_datetime(at)
+            if (stream not in STREAMS and stream != TOMBSTONES) or at is None or not isinstance(pk, int):
+                raise ValueError(stream)
+            positions[stream] = (at, pk)
+        if synced is not None:
+            synced = parse_datetime(synced)
+            if synced is None:
+                raise ValueError(token)
+        elif positions:
+            # Tokens from before "synced" was recorded
+            synced = max(at for at, pk in positions.values())
+        return positions, synced
+    except (TypeError, ValueError, AttributeError, binascii.Error):
+        raise InvalidToken(token)
+
+
+def changes(token, limit, user_id, context=None):
+    """
+    Up to ``limit`` changes after ``token`` that the user ``user_id`` may see, as
+    {"changes": [...], "next": token, "has_more": bool}. Each change is
+    {"type", "op": "upsert" | "delete", "id", "at"} plus "data" for upserts.
+    Raises InvalidToken, or ResyncRequired for a token older than RETENTION.
+    """
+    positions, synced = decode_token(token)
+    # The client has seen every delete up to ``synced``; later ones are
+    # still kept as long as that is within the retention window.
+    if synced is not None and synced < retention_cutoff():
+        raise ResyncRequired(token)
+    horizon = timezone.now() - SETTLE
+    visible = _visible(Profile.objects.filter(user_id=user_id).values('pk'))
+
+    candidates = []
+    for stream, (queryset, serializer) in STREAMS.items():
+        rows = queryset.filter(visible[stream], updated_at__lte=horizon)
+        if stream in positions:
+            rows = rows.filter(_seek(('updated_at', 'id'), positions[stream]))
+        candidates.append([(row.updated_at, row.pk, stream, row) for row in rows.order_by('updated_at', 'id')[:limit + 1]])
+    deleted = Tombstone.objects.filter(visible[TOMBSTONES], deleted_at__lte=horizon)
+    if TOMBSTONES in positions:
+        deleted = deleted.filter(_seek(('deleted_at', 'id'), positions[TOMBSTONES]))
+    candidates.append([(row.deleted_at, row.pk, TOMBSTONES, row) for row in deleted.order_by('deleted_at', 'id')[:limit + 1]])
+
+    # Every stream fetched one extra row, so if fewer than limit + 1 came
+    # back in total, all of them are exhausted.
+    merged = list(heapq.merge(*candidates, key=lambda candidate: candidate[:3]))
+    page, has_more = merged[:limit], len(merged) > limit
+    # Pages are merged in time order: a full page covers every change up to
+    # its last one, and the last page every change up to the horizon.
+    if has_more:
+        synced = max(filter(None, [synced, page[-1][0]]))
+    else:
+        synced = horizon
+
+    upserts = {stream: [] for stream in STREAMS}
+    for at, pk, stream, row in page:
+        positions[stream] = (at, pk)
+        if stream != TOMBSTONES:
+            upserts[stream].append(row)
+    data = {
+        stream: iter(timed(serializer(upserts[stream], many=True, context=context)).data)
+        for stream, (queryset, serializer) in STREAMS.items()
+    }
+
+    results = []
+    for at, pk, stream, row in page:
+        if stream == TOMBSTONES:
+            results.append({'type': row.model, 'op': 'delete', 'id': row.object_id, 'at': at})
+        else:
+            results.append({'type': stream, 'op': 'upsert', 'id': pk, 'at': at, 'data': next(data[stream])})
+    return {'changes': results, 'next': encode_token(positions, synced), 'has_more': has_more}
@@ -1,3 +1,1445 @@
-from django.test import TestCase
+import csv
+import json
+import math
+import os
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from unittest import mock, skipUnless
+from urllib.parse import urlencode
 
-# Create your tests here.
+from django.core.handlers.base import BaseHandler
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.db.models import F
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from authUser.models import CustomUser, Profile
+from authUser.views import MyTokenObtainPairSerializer
+from main import metrics
+from main.db_backends.pooled_postgresql import base as pooled
+from main.db_backends.sqlite3 import base as sqlite_backend
+from main.testing import EndpointBudgetMixin, make_job, make_jobs, make_profile, make_profiles
+from . import applications, geo, listing_cache, recommend, sync
+from .models import Job, JobApplication, Recommendation, Review, SavedJob, Tombstone, adjust_profile_rating
+from .pagination import KeysetCursorPagination
+from .serializers import JobApplicationReadSerializer, JobReadSerializer
+
+
+class JobCursorPaginationTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        profile = make_profile()
+        self.jobs = [make_job(profile, title=f"Shift {i}") for i in range(7)]
+        # Give several jobs the same timestamp so the id tie-breaker matters.
+        stamp = timezone.now()
+        Job.objects.filter(id__in=[job.id for job in self.jobs[2:5]]).update(date_posted=stamp)
+
+    def expected_order(self):
+        return list(Job.objects.order_by("-date_posted", "-id").values_list("id", flat=True))
+
+    def test_walks_every_job_once_forwards_and_backwards(self):
+        url, seen, pages = "/jobListing/v1/job/?page_size=3", [], []
+        while url:
+            body = self.client.get(url).json()
+            pages.append(body)
+            seen += [job["id"] for job in body["results"]]
+            url = body["next"]
+        self.assertEqual(seen, self.expected_order())
+        self.assertIsNone(pages[0]["previous"])
+
+        back = self.client.get(pages[-1]["previous"]).json()
+        self.assertEqual([job["id"] for job in back["results"]], [job["id"] for job in pages[-2]["results"]])
+
+    def test_page_size_is_capped(self):
+        with mock.patch.object(KeysetCursorPagination, "max_page_size", 2):
+            body = self.client.get("/jobListing/v1/job/?page_size=1000").json()
+        self.assertEqual(len(body["results"]), 2)
+
+    def test_garbage_cursor_is_not_found(self):
+        response = self.client.get("/jobListing/v1/job/?cursor=not-a-cursor")
+        self.assertEqual(response.status_code, 404)
+
+
+class NearbyJobsTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        profile = make_profile()
+        self.ikeja = make_job(profile, title="Ikeja shift", location="Ikeja, Lagos")
+        self.yaba = make_job(profile, title="Yaba shift", location="Yaba")
+        self.abuja = make_job(profile, title="Abuja shift", location="Abuja")
+        self.unknown = make_job(profile, title="Somewhere", location="Atlantis")
+
+    def test_geocodes_on_save(self):
+        self.assertEqual((self.ikeja.latitude, self.ikeja.longitude), geo.KNOWN_LOCATIONS["ikeja"])
+        self.assertIsNotNone(self.ikeja.geo_cell)
+        self.assertIsNone(self.unknown.geo_cell)
+
+    def test_moving_geocodes_again_unless_coordinates_are_given(self):
+        job = Job.objects.get(pk=self.ikeja.pk)
+        job.location = "Abuja"
+        job.save()
+        job.refresh_from_db()
+        self.assertEqual((job.latitude, job.longitude), geo.KNOWN_LOCATIONS["abuja"])
+        self.assertEqual(job.geo_cell, geo.grid_cell(*geo.KNOWN_LOCATIONS["abuja"]))
+
+        response = self.client.patch(f"/jobListing/v1/job/{job.pk}/", {"location": "Yaba", "latitude": 6.6, "longitude": 3.4}, format="json")
+        self.assertEqual(response.status_code, 200, response.content)
+        job.refresh_from_db()
+        self.assertEqual((job.latitude, job.longitude), (6.6, 3.4))
+        job.location = "Atlantis"
+        job.save()
+        self.assertIsNone(Job.objects.get(pk=job.pk).geo_cell)
+
+        profile = Profile.objects.get(pk=job.posted_by_id)
+        profile.location = "Ikeja"
+        profile.save()
+        profile.location = "Abuja"
+        Profile.objects.get(pk=profile.pk).save()  # a fresh load keeps its place
+        profile.save()
+        profile.refresh_from_db()
+        self.assertEqual((profile.latitude, profile.longitude), geo.KNOWN_LOCATIONS["abuja"])
+
+    def test_returns_jobs_in_radius_closest_first(self):
+        lat, lng = geo.KNOWN_LOCATIONS["yaba"]
+        response = self.client.get(f"/jobListing/v1/job/nearby/?lat={lat}&lng={lng}&radius=15")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([job["id"] for job in response.json()], [self.yaba.id, self.ikeja.id])
+        self.assertEqual(response.json()[0]["distance_km"], 0)
+
+    def test_requires_coordinates(self):
+        self.assertEqual(self.client.get("/jobListing/v1/job/nearby/").status_code, 400)
+
+    def test_cell_ranges_cover_the_antimeridian(self):
+        ranges = geo.cell_ranges(0, 179.99, 20)
+        self.assertIn(geo.grid_cell(0, -179.99), [cell for first, last in ranges for cell in range(first, last + 1)])
+
+    def test_finds_jobs_just_inside_the_radius(self):
+        # Centred so that both edge points sit in the next grid cell out.
+        lat, lng, radius = 51.5203, -0.0889, 20
+        profile = Profile.objects.get(pk=self.ikeja.posted_by_id)
+        angle = math.degrees(radius / geo.EARTH_RADIUS_KM)
+        north = make_job(profile, title="North edge", location="", latitude=lat + angle * 0.9999, longitude=lng)
+        # The circle is widest poleward of its centre.
+        widest = math.degrees(math.asin(math.sin(math.radians(lat)) / math.cos(math.radians(angle))))
+        reach = math.degrees(math.asin(math.sin(math.radians(angle)) / math.cos(math.radians(lat))))
+        east = make_job(profile, title="East edge", location="", latitude=widest, longitude=lng + reach * 0.9999)
+        for job in (north, east):
+            self.assertLessEqual(geo.haversine_km(lat, lng, job.latitude, job.longitude), radius)
+
+        found = [job.id for job in geo.nearby(Job.objects.all(), lat, lng, radius, 10)]
+        self.assertCountEqual(found, [north.id, east.id])
+
+
+class JobSearchTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        profile = make_profile()
+        self.barista = make_job(profile, title="Barista", description="Coffee bar weekend shift", location="Yaba")
+        self.cleaner = make_job(profile, title="Office cleaner", description="Evening cleaning, barista experience a plus", location="Ikeja")
+        self.driver = make_job(profile, title="Delivery driver", description="Own bike needed", location="Lekki")
+
+    def search(self, query):
+        response = self.client.get("/jobListing/v1/job/", {"q": query})
+        self.assertEqual(response.status_code, 200)
+        return [job["id"] for job in response.json()["results"]]
+
+    def test_ranks_title_matches_first(self):
+        self.assertEqual(self.search("barista"), [self.barista.id, self.cleaner.id])
+
+    def test_matches_location_and_prefix(self):
+        self.assertEqual(self.search("lek"), [self.driver.id])
+
+    def test_index_follows_saves_and_deletes(self):
+        self.driver.title = "Barista driver"
+        self.driver.save()
+        self.assertIn(self.driver.id, self.search("barista"))
+        self.barista.delete()
+        self.assertNotIn(self.barista.id, self.search("barista"))
+
+    def test_search_syntax_is_not_interpreted(self):
+        self.assertEqual(self.search('"barista" ( * -'), [self.barista.id, self.cleaner.id])
+
+    def test_paginates_by_rank(self):
+        first = self.client.get("/jobListing/v1/job/", {"q": "barista", "page_size": 1}).json()
+        second = self.client.get(first["next"]).json()
+        self.assertEqual([job["id"] for job in first["results"] + second["results"]], [self.barista.id, self.cleaner.id])
+
+    @skipUnless(connection.vendor == "postgresql", "ts_rank is a float4 on PostgreSQL only")
+    def test_paginates_through_tied_ranks(self):
+        profile = Profile.objects.get(pk=self.barista.posted_by_id)
+        # Equal documents tie on rank, so later pages seek through search_rank = x.
+        tied = [make_job(profile, title="Barista", description="Coffee bar weekend shift", location="Yaba").id
+                for _ in range(4)]
+        seen = []
+        url = "/jobListing/v1/job/?" + urlencode({"q": "barista", "page_size": 2})
+        while url:
+            page = self.client.get(url).json()
+            seen += [job["id"] for job in page["results"]]
+            url = page["next"]
+        self.assertEqual(seen, sorted(tied + [self.barista.id], reverse=True) + [self.cleaner.id])
+
+
+class ListingQueryCountTests(TestCase):
+    """Listings and admin changelists cost the same number of queries for 2 rows as for 12."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.poster = make_profile()
+        self.admin = CustomUser.objects.create_superuser(email="admin@example.com", username="admin", password="pass12345")
+
+    def seed(self, count):
+        for _ in range(count):
+            worker = make_profile(f"worker{CustomUser.objects.count()}@example.com")
+            job = make_job(self.poster)
+            JobApplication.objects.create(job=job, applicant=worker)
+            SavedJob.objects.create(job=job, user=worker)
+
+    def count_queries(self, url, client=None):
+        with CaptureQueriesContext(connection) as queries:
+            response = (client or self.client).get(url)
+        self.assertEqual(response.status_code, 200, url)
+        return len(queries)
+
+    def test_api_listings(self):
+        urls = ["/jobListing/v1/job/", "/jobListing/v1/jobApplication/", "/jobListing/v1/savedJob/"]
+        self.seed(2)
+        small = [self.count_queries(url) for url in urls]
+        self.seed(10)
+        for url, before in zip(urls, small):
+            with self.subTest(url=url):
+                self.assertEqual(self.count_queries(url), before)
+                self.assertEqual(before, 1)
+
+    def test_admin_changelists(self):
+        admin_client = Client()
+        admin_client.force_login(self.admin)
+        urls = [
+            "/admin/JobListingPage/job/",
+            "/admin/JobListingPage/jobapplication/",
+            "/admin/JobListingPage/savedjob/",
+            "/admin/authUser/profile/",
+        ]
+        self.seed(2)
+        small = [self.count_queries(url, admin_client) for url in urls]
+        self.seed(10)
+        for url, before in zip(urls, small):
+            with self.subTest(url=url):
+                self.assertEqual(self.count_queries(url, admin_client), before)
+
+    def test_read_models_embed_summaries(self):
+        self.seed(1)
+        application = self.client.get("/jobListing/v1/jobApplication/").json()["results"][0]
+        self.assertEqual(application["job"]["title"], "Shift")
+        self.assertEqual(application["applicant"]["username"], "worker2")
+
+
+class JobCounterTests(TestCase):
+    def setUp(self):
+        self.job = make_job(make_profile(), applicants_needed=2)
+        self.workers = [make_profile(f"w{i}@example.com") for i in range(3)]
+
+    def counters(self):
+        self.job.refresh_from_db()
+        return self.job.applications_count, self.job.accepted_count
+
+    def test_tracks_create_status_change_and_delete(self):
+        first = JobApplication.objects.create(job=self.job, applicant=self.workers[0])
+        JobApplication.objects.create(job=self.job, applicant=self.workers[1], status=JobApplication.ACCEPTED)
+        self.assertEqual(self.counters(), (2, 1))
+
+        first.status = JobApplication.ACCEPTED
+        first.save()
+        first.save()
+        self.assertEqual(self.counters(), (2, 2))
+        self.assertEqual(self.job.spots_remaining, 0)
+
+        first.delete()
+        self.assertEqual(self.counters(), (1, 1))
+
+    def test_deleting_a_stale_application_uncounts_its_current_status(self):
+        stale = JobApplication.objects.create(job=self.job, applicant=self.workers[0])
+        JobApplication.objects.create(job=self.job, applicant=self.workers[1])
+        fresh = JobApplication.objects.get(pk=stale.pk)
+        fresh.status = JobApplication.ACCEPTED
+        fresh.save()
+        self.assertEqual(self.counters(), (2, 1))
+        gone = JobApplication.objects.get(pk=stale.pk)
+        stale.delete()
+        self.assertEqual(self.counters(), (1, 0))
+        # Already deleted through another instance: nothing left to uncount.
+        gone.delete()
+        self.assertEqual(self.counters(), (1, 0))
+
+    def test_stale_job_instance_does_not_clobber_counters(self):
+        stale = Job.objects.get(pk=self.job.pk)
+        JobApplication.objects.create(job=self.job, applicant=self.workers[0])
+        stale.title = "Renamed"
+        stale.save()
+        self.assertEqual(self.counters(), (1, 0))
+
+    def test_reconcile_command_repairs_drift(self):
+        JobApplication.objects.create(job=self.job, applicant=self.workers[0], status=JobApplication.ACCEPTED)
+        Job.objects.update(applications_count=7, accepted_count=0)
+        out = StringIO()
+        call_command("reconcile_job_counters", stdout=out)
+        self.assertEqual(self.counters(), (1, 1))
+        self.assertIn("1 had drifted", out.getvalue())
+
+    def test_open_filter(self):
+        full = make_job(self.job.posted_by, applicants_needed=1)
+        JobApplication.objects.create(job=full, applicant=self.workers[0], status=JobApplication.ACCEPTED)
+        ids = lambda flag: [job["id"] for job in APIClient().get(f"/jobListing/v1/job/?open={flag}").json()["results"]]
+        self.assertEqual(ids("true"), [self.job.id])
+        self.assertEqual(ids("false"), [full.id])
+
+
+class ApplicationDecisionTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.job = make_job(make_profile(), applicants_needed=2)
+        self.client.force_authenticate(self.job.posted_by.user)
+        self.applications = [
+            JobApplication.objects.create(job=self.job, applicant=make_profile(f"a{i}@example.com"))
+            for i in range(4)
+        ]
+        self.ids = [application.id for application in self.applications]
+
+    def accepted(self):
+        self.job.refresh_from_db()
+        return self.job.accepted_count, JobApplication.objects.filter(status=JobApplication.ACCEPTED).count()
+
+    def test_accept_never_overfills(self):
+        for application_id in self.ids[:2]:
+            response = self.client.post(f"/jobListing/v1/jobApplication/{application_id}/accept/")
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json()["status"], "Accepted")
+        response = self.client.post(f"/jobListing/v1/jobApplication/{self.ids[2]}/accept/")
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(self.accepted(), (2, 2))
+
+    def test_accept_is_idempotent_and_reject_frees_the_spot(self):
+        self.client.post(f"/jobListing/v1/jobApplication/{self.ids[0]}/accept/")
+        self.client.post(f"/jobListing/v1/jobApplication/{self.ids[0]}/accept/")
+        self.assertEqual(self.accepted(), (1, 1))
+        response = self.client.post(f"/jobListing/v1/jobApplication/{self.ids[0]}/reject/")
+        self.assertEqual(response.json()["status"], "Rejected")
+        self.assertEqual(self.accepted(), (0, 0))
+
+    def test_bulk_accept_fills_in_order_and_reports_the_rest(self):
+        response = self.client.post("/jobListing/v1/jobApplication/bulk-accept/", {"ids": self.ids + [9999]}, format="json")
+        body = response.json()
+        self.assertEqual(body["accepted"], self.ids[:2])
+        self.assertEqual(body["failed"], {str(self.ids[2]): "job is full", str(self.ids[3]): "job is full", "9999": "not found"})
+        self.assertEqual(self.accepted(), (2, 2))
+
+        body = self.client.post("/jobListing/v1/jobApplication/bulk-reject/", {"ids": self.ids}, format="json").json()
+        self.assertEqual(body["rejected"], self.ids)
+        self.assertEqual(self.accepted(), (0, 0))
+
+    def test_only_the_poster_decides(self):
+        anonymous, stranger = APIClient(), APIClient()
+        stranger.force_authenticate(make_profile("s@example.com").user)
+        self.assertEqual(anonymous.post(f"/jobListing/v1/jobApplication/{self.ids[0]}/accept/").status_code, 401)
+        self.assertEqual(stranger.post(f"/jobListing/v1/jobApplication/{self.ids[0]}/accept/").status_code, 404)
+        self.assertEqual(stranger.post(f"/jobListing/v1/jobApplication/{self.ids[0]}/reject/").status_code, 404)
+        body = stranger.post("/jobListing/v1/jobApplication/bulk-accept/", {"ids": self.ids[:1]}, format="json").json()
+        self.assertEqual(body, {"accepted": [], "failed": {str(self.ids[0]): "not found"}})
+        self.assertEqual(self.accepted(), (0, 0))
+        self.assertEqual(self.client.post("/jobListing/v1/jobApplication/abc/accept/").status_code, 404)
+
+    def test_status_cannot_be_patched_directly(self):
+        self.client.patch(f"/jobListing/v1/jobApplication/{self.ids[0]}/", {"status": "Accepted"}, format="json")
+        self.assertEqual(self.accepted(), (0, 0))
+
+    def test_an_accepted_application_cannot_move_to_a_full_job(self):
+        full = make_job(self.job.posted_by, applicants_needed=1)
+        JobApplication.objects.create(job=full, applicant=make_profile("f@example.com"), status=JobApplication.ACCEPTED)
+        self.client.post(f"/jobListing/v1/jobApplication/{self.ids[0]}/accept/")
+
+        for client in (APIClient(), self.client):
+            client.patch(f"/jobListing/v1/jobApplication/{self.ids[0]}/",
+                         {"job": full.id, "applicant": self.applications[1].applicant_id}, format="json")
+        application = JobApplication.objects.get(pk=self.ids[0])
+        self.assertEqual((application.job_id, application.applicant_id), (self.job.id, self.applications[0].applicant_id))
+        full.refresh_from_db()
+        self.assertEqual(full.accepted_count, 1)
+        self.assertEqual(self.accepted()[0], 1)
+
+
+class BulkCreateTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.poster = make_profile()
+
+    def job_payload(self, **kwargs):
+        payload = {
+            "title": "Recurring shift", "description": "Every Monday", "contract_duration": "4hrs Contract",
+            "job_date": "2030-01-07T09:00:00Z", "location": "Lekki", "payment": "30.00",
+            "applicants_needed": 2, "posted_by": self.poster.id,
+        }
+        payload.update(kwargs)
+        return payload
+
+    def test_creates_every_job_with_one_insert(self):
+        payload = [self.job_payload(title=f"Monday {i}") for i in range(20)]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post("/jobListing/v1/job/bulk/", payload, format="json")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.json()), 20)
+        self.assertEqual(Job.objects.count(), 20)
+        inserts = [q["sql"] for q in queries if q["sql"].startswith('INSERT INTO "JobListingPage_job"')]
+        self.assertEqual(len(inserts), 1)
+        self.assertLessEqual(len(queries), 6)
+        # bulk_create still geocodes and indexes for search
+        job = Job.objects.get(title="Monday 3")
+        self.assertIsNotNone(job.geo_cell)
+        self.assertEqual(len(self.client.get("/jobListing/v1/job/", {"q": "monday"}).json()["results"]), 20)
+
+    def test_reports_errors_per_item_and_writes_nothing(self):
+        payload = [self.job_payload(), self.job_payload(posted_by=9999), self.job_payload(payment="lots")]
+        response = self.client.post("/jobListing/v1/job/bulk/", payload, format="json")
+        self.assertEqual(response.status_code, 400)
+        errors = response.json()["errors"]
+        self.assertEqual(errors[0], {})
+        self.assertIn("posted_by", errors[1])
+        self.assertIn("payment", errors[2])
+        self.assertEqual(Job.objects.count(), 0)
+
+    def test_saved_jobs(self):
+        jobs = [make_job(self.poster) for _ in range(3)]
+        payload = [{"user": self.poster.id, "job": job.id} for job in jobs]
+        response = self.client.post("/jobListing/v1/savedJob/bulk/", payload, format="json")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(SavedJob.objects.filter(user=self.poster).count(), 3)
+
+    def test_rejects_non_list(self):
+        self.assertEqual(self.client.post("/jobListing/v1/job/bulk/", self.job_payload(), format="json").status_code, 400)
+
+    def test_patch_updates_every_job_with_one_statement(self):
+        jobs = [make_job(self.poster, title=f"Monday {i}") for i in range(5)]
+        JobApplication.objects.create(job=jobs[0], applicant=make_profile("w@example.com"))
+        etag = self.client.get("/jobListing/v1/job/")["ETag"]
+        payload = [{"id": job.id, "title": f"Tuesday {i}", "location": "Kano"} for i, job in enumerate(jobs)]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.patch("/jobListing/v1/job/bulk/", payload, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([job["title"] for job in response.json()], [f"Tuesday {i}" for i in range(5)])
+        updates = [q["sql"] for q in queries if q["sql"].startswith('UPDATE "JobListingPage_job"')]
+        self.assertEqual(len(updates), 1)
+
+        job = Job.objects.get(pk=jobs[0].pk)
+        self.assertEqual((job.latitude, job.longitude), geo.KNOWN_LOCATIONS["kano"])
+        self.assertEqual(job.geo_cell, geo.grid_cell(*geo.KNOWN_LOCATIONS["kano"]))
+        self.assertEqual(job.applications_count, 1)
+        self.assertGreater(job.updated_at, jobs[0].updated_at)
+        self.assertEqual(len(self.client.get("/jobListing/v1/job/", {"q": "tuesday"}).json()["results"]), 5)
+        self.assertEqual(self.client.get("/jobListing/v1/job/", HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_patch_changes_each_jobs_detail(self):
+        listing_cache.get_cache().clear()
+        job = make_job(self.poster, title="Before")
+        url = f"/jobListing/v1/job/{job.id}/"
+        etag = self.client.get(url)["ETag"]
+        self.client.patch("/jobListing/v1/job/bulk/", [{"id": job.id, "title": "After"}], format="json")
+        self.assertEqual(self.client.get(url).json()["title"], "After")
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_patch_reports_bad_items_and_writes_nothing(self):
+        job = make_job(self.poster)
+        payload = [{"id": job.id, "title": "Renamed"}, {"title": "No id"}, {"id": 9999}, {"id": job.id, "payment": "lots"}]
+        response = self.client.patch("/jobListing/v1/job/bulk/", payload, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["errors"][1:3], [{"id": ["An id is required."]}, {"id": ["Not found."]}])
+        errors = self.client.patch("/jobListing/v1/job/bulk/", payload[:1] + payload[:1], format="json").json()["errors"]
+        self.assertEqual(errors[1], {"id": ["Listed more than once."]})
+        self.assertEqual(Job.objects.get(pk=job.pk).title, "Shift")
+
+    def test_saved_jobs_are_not_bulk_updated(self):
+        saved = SavedJob.objects.create(user=self.poster, job=make_job(self.poster))
+        response = self.client.patch("/jobListing/v1/savedJob/bulk/", [{"id": saved.id}], format="json")
+        self.assertEqual(response.status_code, 405)
+
+
+class ListingCacheTests(TestCase):
+    def setUp(self):
+        listing_cache.get_cache().clear()
+        self.client = APIClient()
+        self.poster = make_profile()
+        self.job = make_job(self.poster, title="Cached shift")
+
+    def test_repeat_reads_are_served_from_cache(self):
+        self.client.get("/jobListing/v1/job/?page_size=5&open=true")
+        with self.assertNumQueries(0):
+            response = self.client.get("/jobListing/v1/job/?open=true&page_size=5")
+        self.assertEqual(response.json()["results"][0]["title"], "Cached shift")
+        self.client.get(f"/jobListing/v1/job/{self.job.id}/")
+        with self.assertNumQueries(0):
+            self.client.get(f"/jobListing/v1/job/{self.job.id}/")
+        self.assertEqual(listing_cache.stats()["job-list"], {"hit": 1, "miss": 1})
+        self.assertEqual(listing_cache.stats()["job-retrieve"], {"hit": 1, "miss": 1})
+
+    def test_writes_invalidate(self):
+        self.client.get("/jobListing/v1/job/")
+        self.client.get(f"/jobListing/v1/job/{self.job.id}/")
+        self.job.title = "Renamed shift"
+        self.job.save()
+        self.assertEqual(self.client.get("/jobListing/v1/job/").json()["results"][0]["title"], "Renamed shift")
+        self.assertEqual(self.client.get(f"/jobListing/v1/job/{self.job.id}/").json()["title"], "Renamed shift")
+
+        JobApplication.objects.create(job=self.job, applicant=make_profile("w@example.com"))
+        self.assertEqual(self.client.get(f"/jobListing/v1/job/{self.job.id}/").json()["applications_count"], 1)
+
+    def test_other_jobs_detail_survives_a_write(self):
+        other = make_job(self.poster)
+        self.client.get(f"/jobListing/v1/job/{other.id}/")
+        self.job.save()
+        with self.assertNumQueries(0):
+            self.client.get(f"/jobListing/v1/job/{other.id}/")
+
+    def test_stats_endpoint_is_admin_only(self):
+        self.assertEqual(self.client.get("/jobListing/v1/cacheStats/").status_code, 401)
+        self.client.force_authenticate(CustomUser.objects.create_superuser(email="a@example.com", username="a", password="pass12345"))
+        self.assertIn("job-list", self.client.get("/jobListing/v1/cacheStats/").json())
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        listing_cache.get_cache().clear()
+        self.client = APIClient()
+        self.poster = make_profile()
+        self.job = make_job(self.poster, title="Polled shift")
+        self.application = JobApplication.objects.create(job=self.job, applicant=make_profile("w@example.com"))
+
+    def assert_not_modified(self, url, serializer_class):
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, 200)
+        self.assertIn("Last-Modified", first)
+        with mock.patch.object(serializer_class, "to_representation") as to_representation, self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], first["ETag"])
+        to_representation.assert_not_called()
+        return first["ETag"]
+
+    def test_unchanged_job_list_and_detail_are_not_modified(self):
+        self.assert_not_modified("/jobListing/v1/job/", JobReadSerializer)
+        self.assert_not_modified(f"/jobListing/v1/job/{self.job.id}/", JobReadSerializer)
+
+    def test_unchanged_application_list_is_not_modified(self):
+        self.assert_not_modified("/jobListing/v1/jobApplication/", JobApplicationReadSerializer)
+
+    def test_write_changes_the_etag(self):
+        etag = self.assert_not_modified("/jobListing/v1/jobApplication/", JobApplicationReadSerializer)
+        self.application.status = JobApplication.REJECTED
+        self.application.save()
+        response = self.client.get("/jobListing/v1/jobApplication/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(response.json()["results"][0]["status"], JobApplication.REJECTED)
+
+    def test_embedded_job_and_profile_changes_change_the_etag(self):
+        SavedJob.objects.create(user=self.application.applicant, job=self.job)
+        urls = ["/jobListing/v1/jobApplication/", f"/jobListing/v1/jobApplication/{self.application.id}/",
+                "/jobListing/v1/savedJob/", "/jobListing/v1/review/", f"/jobListing/v1/job/{self.job.id}/"]
+        etags = {url: self.client.get(url)["ETag"] for url in urls}
+
+        self.job.title = "New title"
+        self.job.save()
+        for url in urls[:3]:
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etags[url])
+            self.assertEqual(response.status_code, 200, url)
+            self.assertIn("New title", response.content.decode(), url)
+        self.assertEqual(self.client.get(urls[3], HTTP_IF_NONE_MATCH=etags[urls[3]]).status_code, 304)
+
+        etags = {url: self.client.get(url)["ETag"] for url in urls}
+        adjust_profile_rating(self.application.applicant_id, added=4)
+        for url in urls:
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etags[url]).status_code, 200, url)
+
+    def test_etag_depends_on_query(self):
+        etag = self.client.get("/jobListing/v1/job/")["ETag"]
+        response = self.client.get("/jobListing/v1/job/?open=true", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+
+@mock.patch.object(sync, "SETTLE", timedelta(0))
+class DeltaSyncTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.poster = make_profile()
+        self.worker = make_profile("w@example.com")
+        self.client.force_authenticate(self.worker.user)
+
+    def sync(self, since=None, **params):
+        if since:
+            params["since"] = since
+        response = self.client.get("/jobListing/v1/changes/", params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_full_sync_then_only_changes(self):
+        job = make_job(self.poster, title="First")
+        first = self.sync()
+        self.assertEqual([(c["type"], c["op"], c["id"]) for c in first["changes"]], [("job", "upsert", job.id)])
+        self.assertEqual(first["changes"][0]["data"]["title"], "First")
+        self.assertEqual(self.sync(first["next"])["changes"], [])
+
+        job.title = "Renamed"
+        job.save()
+        application = JobApplication.objects.create(job=job, applicant=self.worker)
+        delta = {(c["type"], c["id"]): c for c in self.sync(first["next"])["changes"]}
+        self.assertEqual(set(delta), {("job", job.id), ("jobApplication", application.id)})
+        self.assertEqual(delta["job", job.id]["data"]["title"], "Renamed")
+        self.assertEqual(delta["job", job.id]["data"]["applications_count"], 1)
+
+    def test_deletes_and_cascades_become_tombstones(self):
+        job = make_job(self.poster)
+        application = JobApplication.objects.create(job=job, applicant=self.worker)
+        token = self.sync()["next"]
+        job_id, application_id = job.id, application.id
+        job.delete()
+        deletes = {(c["type"], c["id"]) for c in self.sync(token)["changes"] if c["op"] == "delete"}
+        self.assertEqual(deletes, {("job", job_id), ("jobApplication", application_id)})
+
+    def test_accepting_an_application_syncs_it(self):
+        job = make_job(self.poster)
+        application = JobApplication.objects.create(job=job, applicant=self.worker)
+        token = self.sync()["next"]
+        self.client.force_authenticate(self.poster.user)
+        self.client.post(f"/jobListing/v1/jobApplication/{application.id}/accept/")
+        changed = {(c["type"], c["id"]) for c in self.sync(token)["changes"]}
+        self.assertEqual(changed, {("job", job.id), ("jobApplication", application.id)})
+
+    def test_pages_cover_every_change_once(self):
+        jobs = [make_job(self.poster) for _ in range(5)]
+        SavedJob.objects.create(user=self.worker, job=jobs[0])
+        seen, token, has_more = [], None, True
+        while has_more:
+            page = self.sync(token, limit=2)
+            self.assertLessEqual(len(page["changes"]), 2)
+            seen += [(c["type"], c["id"]) for c in page["changes"]]
+            token, has_more = page["next"], page["has_more"]
+        self.assertEqual(len(seen), 6)
+        self.assertEqual(len(set(seen)), 6)
+
+    def test_page_costs_one_query_per_stream(self):
+        job = make_job(self.poster)
+        JobApplication.objects.create(job=job, applicant=self.worker)
+        SavedJob.objects.create(user=self.worker, job=job)
+        with self.assertNumQueries(4):
+            self.sync()
+
+    def test_recent_writes_wait_to_settle(self):
+        make_job(self.poster)
+        with mock.patch.object(sync, "SETTLE", timedelta(minutes=5)):
+            page = self.sync()
+        self.assertEqual(page["changes"], [])
+        self.assertEqual(len(self.sync(page["next"])["changes"]), 1)
+
+    def test_tokens_older_than_retention_must_resync(self):
+        job = make_job(self.poster)
+        token = self.sync()["next"]
+        job_id = job.id
+        job.delete()
+        old = timezone.now() - sync.RETENTION - timedelta(days=1)
+        Tombstone.objects.create(model="job", object_id=9999, deleted_at=old)
+
+        stale = sync.encode_token({"job": (old, job_id)}, old)
+        response = self.client.get("/jobListing/v1/changes/", {"since": stale})
+        self.assertEqual(response.status_code, 410)
+        self.assertTrue(response.json()["resync"])
+
+        out = StringIO()
+        call_command("purge_tombstones", stdout=out)
+        self.assertIn("Deleted 1 tombstones", out.getvalue())
+        self.assertEqual(list(Tombstone.objects.values_list("object_id", flat=True)), [job_id])
+        self.assertEqual([c["id"] for c in self.sync(token)["changes"]], [job_id])
+
+    def test_a_quiet_feed_keeps_its_token_fresh(self):
+        job = make_job(self.poster)
+        Job.objects.filter(pk=job.pk).update(updated_at=timezone.now() - sync.RETENTION - timedelta(days=5))
+        first = self.sync()
+        self.assertEqual([c["id"] for c in first["changes"]], [job.id])
+        # Nothing changed since, but the client did sync just now.
+        second = self.sync(first["next"])
+        self.assertEqual(second["changes"], [])
+        self.assertEqual(self.client.get("/jobListing/v1/changes/", {"since": second["next"]}).status_code, 200)
+
+    def test_only_public_and_own_rows_are_synced(self):
+        job = make_job(self.poster)
+        application = JobApplication.objects.create(job=job, applicant=self.worker)
+        saved = SavedJob.objects.create(user=self.worker, job=job)
+        token = self.sync()["next"]
+        application_id, saved_id = application.id, saved.id
+        application.delete()
+        saved.delete()
+        SavedJob.objects.create(user=self.worker, job=job)
+        JobApplication.objects.create(job=job, applicant=self.worker)
+
+        self.client.force_authenticate(make_profile("nosy@example.com").user)
+        everything = self.sync()["changes"] + self.sync(token)["changes"]
+        self.assertEqual({c["type"] for c in everything}, {"job"})
+
+        self.client.force_authenticate(self.poster.user)
+        deletes = {(c["type"], c["id"]) for c in self.sync(token)["changes"] if c["op"] == "delete"}
+        self.assertEqual(deletes, {("jobApplication", application_id)})
+        self.client.force_authenticate(self.worker.user)
+        deletes = {(c["type"], c["id"]) for c in self.sync(token)["changes"] if c["op"] == "delete"}
+        self.assertEqual(deletes, {("jobApplication", application_id), ("savedJob", saved_id)})
+
+        self.client.force_authenticate(None)
+        self.assertEqual(self.client.get("/jobListing/v1/changes/").status_code, 401)
+
+    def test_bad_token(self):
+        self.assertEqual(self.client.get("/jobListing/v1/changes/", {"since": "nope"}).status_code, 400)
+        self.assertEqual(self.client.get("/jobListing/v1/changes/", {"limit": "0"}).status_code, 400)
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(CustomUser.objects.create_superuser(email="a@example.com", username="a", password="pass12345"))
+        self.poster = make_profile()
+        self.jobs = [make_job(self.poster, title=f"Shift, {i}") for i in range(3)]
+        JobApplication.objects.create(job=self.jobs[0], applicant=make_profile("w@example.com"))
+
+    def download(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b"".join(response.streaming_content).decode()
+
+    def test_ndjson(self):
+        rows = [json.loads(line) for line in self.download("/jobListing/v1/export/job.ndjson").splitlines()]
+        self.assertEqual([row["id"] for row in rows], [job.id for job in self.jobs])
+        self.assertEqual(rows[0]["posted_by__user__username"], "poster")
+        self.assertEqual(rows[0]["applications_count"], 1)
+
+    def test_csv(self):
+        rows = list(csv.reader(StringIO(self.download("/jobListing/v1/export/jobApplication.csv"))))
+        self.assertEqual(rows[0][:3], ["id", "job_id", "job__title"])
+        self.assertEqual(rows[1][2], "Shift, 0")
+        self.assertEqual(len(rows), 2)
+
+    def test_admin_only_and_unknown_tables(self):
+        self.assertEqual(self.client.get("/jobListing/v1/export/profile.csv").status_code, 404)
+        self.assertEqual(self.client.get("/jobListing/v1/export/job.xml").status_code, 404)
+        self.client.force_authenticate(None)
+        self.assertEqual(self.client.get("/jobListing/v1/export/job.csv").status_code, 401)
+
+    def test_posters_export_their_own_jobs_and_applications(self):
+        other = make_job(make_profile("other@example.com"), title="Not mine")
+        JobApplication.objects.create(job=other, applicant=make_profile("w2@example.com"))
+        self.client.force_authenticate(self.poster.user)
+        rows = [json.loads(line) for line in self.download("/jobListing/v1/export/mine/job.ndjson").splitlines()]
+        self.assertEqual([row["id"] for row in rows], [job.id for job in self.jobs])
+        rows = list(csv.reader(StringIO(self.download("/jobListing/v1/export/mine/jobApplication.csv"))))
+        self.assertEqual([row[1] for row in rows[1:]], [str(self.jobs[0].id)])
+
+        self.assertEqual(self.client.get("/jobListing/v1/export/mine/savedJob.csv").status_code, 404)
+        self.assertEqual(self.client.get("/jobListing/v1/export/job.csv").status_code, 403)
+        self.client.force_authenticate(None)
+        self.assertEqual(self.client.get("/jobListing/v1/export/mine/job.csv").status_code, 401)
+
+    def test_command(self):
+        out = StringIO()
+        call_command("export_rows", "savedJob", "--format", "csv", stdout=out)
+        self.assertEqual(out.getvalue().splitlines(), ["id,user_id,user__user__username,job_id,job__title,saved_on,updated_at"])
+        out = StringIO()
+        call_command("export_rows", "job", "--chunk-size", "1", stdout=out)
+        self.assertEqual(len(out.getvalue().splitlines()), 3)
+
+
+class RatingTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.poster = make_profile()
+        self.workers = [make_profile(f"w{i}@example.com") for i in range(3)]
+        self.job = make_job(self.poster, applicants_needed=3)
+        self.applications = [
+            JobApplication.objects.create(job=self.job, applicant=worker, status=JobApplication.ACCEPTED)
+            for worker in self.workers
+        ]
+
+    def rating(self, profile):
+        profile.refresh_from_db()
+        return round(profile.rating, 6), profile.rating_count
+
+    def review(self, application, reviewer, rating):
+        self.client.force_authenticate(reviewer.user)
+        return self.client.post("/jobListing/v1/review/", {"application": application.id, "rating": rating}, format="json")
+
+    def test_running_mean_follows_creates_edits_and_deletes(self):
+        for application, rating in zip(self.applications, (5, 4, 2)):
+            self.assertEqual(self.review(application, application.applicant, rating).status_code, 201)
+        self.assertEqual(self.rating(self.poster), (round(11 / 3, 6), 3))
+
+        review = Review.objects.get(reviewer=self.workers[2])
+        review.rating = 5
+        review.save()
+        self.assertEqual(self.rating(self.poster), (round(14 / 3, 6), 3))
+        review.delete()
+        self.assertEqual(self.rating(self.poster), (4.5, 2))
+        Review.objects.all().delete()
+        self.assertEqual(self.rating(self.poster), (0.0, 0))
+
+    def test_deleting_a_stale_review_takes_out_its_current_rating(self):
+        Review.objects.create(application=self.applications[0], reviewer=self.workers[0], reviewee=self.poster, rating=4)
+        stale = Review.objects.create(application=self.applications[1], reviewer=self.workers[1], reviewee=self.poster, rating=1)
+        fresh = Review.objects.get(pk=stale.pk)
+        fresh.rating = 5
+        fresh.save()
+        self.assertEqual(self.rating(self.poster), (4.5, 2))
+        stale.delete()
+        self.assertEqual(self.rating(self.poster), (4.0, 1))
+        fresh.delete()  # already gone
+        self.assertEqual(self.rating(self.poster), (4.0, 1))
+
+    def test_poster_rates_the_applicant(self):
+        response = self.review(self.applications[0], self.poster, 3)
+        self.assertEqual(response.json()["reviewee"], self.workers[0].id)
+        self.assertEqual(self.rating(self.workers[0]), (3.0, 1))
+
+    def test_only_parties_to_an_accepted_application_review_once(self):
+        pending = JobApplication.objects.create(job=make_job(self.poster), applicant=self.workers[0])
+        self.assertIn("application", self.review(pending, self.poster, 4).json())
+        self.assertIn("reviewer", self.review(self.applications[0], self.workers[1], 4).json())
+        self.assertEqual(self.review(self.applications[0], self.poster, 4).status_code, 201)
+        self.assertIn("reviewer", self.review(self.applications[0], self.poster, 5).json())
+        self.assertEqual(self.review(self.applications[1], self.poster, 6).status_code, 400)
+
+    def test_reviewer_is_the_caller(self):
+        # A third party naming the poster as reviewer is still the reviewer
+        self.client.force_authenticate(self.workers[1].user)
+        response = self.client.post("/jobListing/v1/review/", {
+            "application": self.applications[0].id, "reviewer": self.poster.id, "rating": 1,
+        }, format="json")
+        self.assertIn("reviewer", response.json())
+        self.assertEqual(self.rating(self.workers[0]), (0.0, 0))
+        self.client.force_authenticate(None)
+        self.assertEqual(self.review(self.applications[0], self.poster, 4).status_code, 201)
+        review = Review.objects.get()
+        self.assertEqual(review.reviewer_id, self.poster.id)
+
+        url = f"/jobListing/v1/review/{review.id}/"
+        anonymous = APIClient()
+        self.assertEqual(anonymous.patch(url, {"rating": 1}, format="json").status_code, 401)
+        self.client.force_authenticate(self.workers[0].user)
+        self.assertEqual(self.client.patch(url, {"rating": 1}, format="json").status_code, 403)
+        self.assertEqual(self.client.delete(url).status_code, 403)
+        self.client.force_authenticate(self.poster.user)
+        self.assertEqual(self.client.patch(url, {"rating": 2}, format="json").status_code, 200)
+        self.assertEqual(self.rating(self.workers[0]), (2.0, 1))
+
+    def test_profile_saves_never_write_back_a_stale_rating(self):
+        profile = type(self.poster).objects.get(pk=self.poster.pk)
+        Review.objects.create(application=self.applications[0], reviewer=self.workers[0], reviewee=self.poster, rating=4)
+        profile.bio = "Runs a warehouse"
+        profile.save()
+        self.assertEqual(self.rating(self.poster), (4.0, 1))
+        self.assertEqual(self.poster.bio, "Runs a warehouse")
+
+    def test_profiles_sort_and_filter_by_stored_rating(self):
+        for worker, rating in zip(self.workers, (2, 5, 4)):
+            Review.objects.create(application=self.applications[self.workers.index(worker)],
+                                  reviewer=self.poster, reviewee=worker, rating=rating)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/jobListing/v1/userProfile/?ordering=-rating&min_rating=3")
+        self.assertEqual([p["id"] for p in response.json()["results"]], [self.workers[1].id, self.workers[2].id])
+        self.assertNotIn("JOIN", queries[-1]["sql"].upper())
+
+    def test_recompute_command_repairs_drift(self):
+        Review.objects.create(application=self.applications[0], reviewer=self.workers[0], reviewee=self.poster, rating=4)
+        type(self.poster).objects.update(rating=1.0, rating_count=9)
+        out = StringIO()
+        with CaptureQueriesContext(connection) as queries:
+            call_command("recompute_ratings", "--chunk-size", "2", stdout=out)
+        # The mean is computed by the UPDATE itself, never read and written back.
+        updates = [q["sql"] for q in queries if q["sql"].startswith('UPDATE "authUser_profile"')]
+        self.assertTrue(updates and all("AVG(" in sql for sql in updates))
+        self.assertEqual(self.rating(self.poster), (4.0, 1))
+        self.assertEqual(self.rating(self.workers[0]), (0.0, 0))
+        self.assertIn(f"{len(self.workers) + 1} had drifted", out.getvalue())
+
+
+class RecommendationTests(TestCase):
+    def setUp(self):
+        recommend.features.reset()
+        self.addCleanup(recommend._queued.clear)  # left behind where the pool is mocked
+        self.client = APIClient()
+        self.poster = make_profile()
+        self.worker = make_profile("worker@example.com")
+        self.worker.latitude, self.worker.longitude = geo.KNOWN_LOCATIONS["ikeja"]
+        self.worker.save()
+        self.client.force_authenticate(self.worker.user)
+        lagos, abuja = geo.KNOWN_LOCATIONS["ikeja"], geo.KNOWN_LOCATIONS["abuja"]
+        self.near = make_job(self.poster, title="Near", latitude=lagos[0], longitude=lagos[1], payment="60.00")
+        self.far = make_job(self.poster, title="Far", latitude=abuja[0], longitude=abuja[1], payment="60.00")
+        self.cheap = make_job(self.poster, title="Cheap", latitude=lagos[0], longitude=lagos[1], payment="5.00")
+
+    def recommended(self, query=""):
+        response = self.client.get(f"/jobListing/v1/job/recommended/{query}")
+        self.assertEqual(response.status_code, 200, response.content)
+        return [job["title"] for job in response.json()]
+
+    def test_ranks_by_location_and_pay_and_skips_what_cannot_be_offered(self):
+        applied = make_job(self.poster, title="Applied")
+        JobApplication.objects.create(job=applied, applicant=self.worker)
+        make_job(self.poster, title="Past", job_date=timezone.now() - timedelta(days=1))
+        full = make_job(self.poster, title="Full")
+        JobApplication.objects.create(job=full, applicant=self.poster, status=JobApplication.ACCEPTED)
+
+        self.assertEqual(self.recommended(), ["Near", "Cheap", "Far"])
+        self.assertEqual(self.recommended("?limit=1"), ["Near"])
+        self.assertEqual(self.client.get("/jobListing/v1/job/recommended/?limit=0").status_code, 400)
+
+    def test_history_favours_posters_the_worker_has_worked_for(self):
+        other = make_profile("other@example.com")
+        lagos = geo.KNOWN_LOCATIONS["ikeja"]
+        favourite = make_job(other, title="Favourite", latitude=lagos[0], longitude=lagos[1], payment="60.00")
+        SavedJob.objects.create(user=self.worker, job=make_job(other, title="Saved before"))
+        self.assertEqual(self.recommended()[:2], ["Favourite", "Near"])
+        self.assertNotIn("Saved before", self.recommended())
+        self.assertEqual(Recommendation.objects.get(profile=self.worker).job_ids[0], favourite.id)
+
+    def test_fresh_ranking_is_served_without_rescoring(self):
+        self.recommended()
+        with mock.patch.object(recommend, "score") as score, CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.recommended(), ["Near", "Cheap", "Far"])
+        score.assert_not_called()
+        self.assertEqual(len(queries), 2)  # the stored ranking, then its jobs
+
+        # Jobs that filled up since are dropped until the next recompute.
+        JobApplication.objects.create(job=self.near, applicant=self.poster, status=JobApplication.ACCEPTED)
+        self.assertEqual(self.recommended(), ["Cheap", "Far"])
+
+    def test_own_jobs_are_not_recommended(self):
+        lagos = geo.KNOWN_LOCATIONS["ikeja"]
+        own = make_job(self.worker, title="Own", latitude=lagos[0], longitude=lagos[1], payment="90.00")
+        self.assertEqual(self.recommended(), ["Near", "Cheap", "Far"])
+        self.assertNotIn(own.id, Recommendation.objects.get(profile=self.worker).job_ids)
+        # A ranking stored while it could still hold them.
+        Recommendation.objects.update(job_ids=[own.id, self.near.id], scores=[1.0, 0.9])
+        self.assertEqual(self.recommended(), ["Near"])
+
+    def test_jobs_that_have_started_since_the_ranking_are_dropped(self):
+        self.recommended()
+        Recommendation.objects.update(computed_at=timezone.now() - timedelta(days=1))
+        Job.objects.filter(pk=self.near.pk).update(job_date=timezone.now() - timedelta(hours=1))
+        with mock.patch.object(recommend._pool, "submit"):
+            self.assertEqual(self.recommended(), ["Cheap", "Far"])
+
+    def test_stale_ranking_is_served_and_recomputed_in_the_background(self):
+        self.recommended()
+        JobApplication.objects.create(job=self.near, applicant=self.poster, status=JobApplication.ACCEPTED)
+        Recommendation.objects.update(computed_at=timezone.now() - recommend.MAX_AGE)
+        recommend.features.reset()  # as in a process that has not loaded the features yet
+        with mock.patch.object(recommend._pool, "submit") as submit, mock.patch.object(recommend, "score") as score:
+            self.assertEqual(self.recommended(), ["Cheap", "Far"])
+            self.recommended()
+        score.assert_not_called()
+        submit.assert_called_once_with(recommend._run, self.worker.pk)
+        self.assertIn(self.near.id, Recommendation.objects.get(profile=self.worker).job_ids)
+
+        with mock.patch.object(recommend, "close_old_connections"):
+            recommend._run(self.worker.pk)
+        self.assertNotIn(self.near.id, Recommendation.objects.get(profile=self.worker).job_ids)
+        self.assertEqual(recommend._queued, set())
+
+    def test_refresh_applies_only_changes(self):
+        features = recommend.features
+        features.refresh()
+        before = features.snapshot
+        self.assertEqual(sorted(before.ids[before.live].tolist()), sorted([self.near.id, self.far.id, self.cheap.id]))
+
+        added = make_job(self.poster, title="New")
+        JobApplication.objects.create(job=self.far, applicant=self.poster, status=JobApplication.ACCEPTED)
+        cheap_id = self.cheap.id
+        self.cheap.delete()
+        with CaptureQueriesContext(connection) as queries:
+            features.refresh()
+        self.assertEqual(len(queries), 2)  # changed jobs, then tombstones
+        after = features.snapshot
+        self.assertEqual(sorted(after.ids[after.live].tolist()), sorted([self.near.id, added.id]))
+        self.assertFalse(after.live[after.rows[cheap_id]])
+        # A reader still holding the old snapshot sees it whole and unchanged.
+        self.assertEqual(len(before.ids), 3)
+        self.assertTrue(before.live.all())
+        self.assertEqual({len(array) for array in before[:7]}, {3})
+
+    def test_jobs_that_have_started_are_retired(self):
+        later = make_job(self.poster, title="Later", job_date=timezone.now() + timedelta(days=5))
+        features = recommend.features
+        features.refresh()
+        self.assertEqual(len(features.snapshot.ids), 4)
+        with mock.patch.object(recommend.timezone, "now", return_value=timezone.now() + timedelta(days=2)):
+            features.refresh()
+        # Three of four rows dead, so they are compacted away too.
+        self.assertEqual(features.snapshot.ids.tolist(), [later.id])
+
+    def test_refresh_command_recomputes_stale_profiles(self):
+        out = StringIO()
+        call_command("refresh_recommendations", stdout=out)
+        self.assertEqual(Recommendation.objects.count(), 2)
+        self.assertIn("for 2 profiles over 3 open jobs", out.getvalue())
+        call_command("refresh_recommendations", stdout=out)
+        self.assertIn("for 0 profiles", out.getvalue())
+
+
+class MyListsTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.poster = make_profile()
+        self.worker = make_profile("worker@example.com")
+        self.other = make_profile("other@example.com")
+        self.jobs = [make_job(self.poster, title=f"Shift {i}") for i in range(3)]
+        self.client.force_authenticate(self.worker.user)
+
+    def test_my_applications_are_only_mine_and_filter_by_status(self):
+        mine = [JobApplication.objects.create(job=job, applicant=self.worker) for job in self.jobs]
+        JobApplication.objects.create(job=self.jobs[0], applicant=self.other)
+        applications.accept_application(mine[1].pk)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/jobListing/v1/jobApplication/me/")
+        self.assertEqual([a["id"] for a in response.json()["results"]], [a.id for a in reversed(mine)])
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn("applicant", response.json()["results"][0])
+
+        response = self.client.get("/jobListing/v1/jobApplication/me/?status=Accepted")
+        self.assertEqual([a["id"] for a in response.json()["results"]], [mine[1].id])
+        self.assertEqual(self.client.get("/jobListing/v1/jobApplication/me/?status=nope").status_code, 400)
+        self.client.force_authenticate(None)
+        self.assertEqual(self.client.get("/jobListing/v1/jobApplication/me/").status_code, 401)
+
+    def test_saving_a_job_is_idempotent(self):
+        first = self.client.post("/jobListing/v1/savedJob/me/", {"job": self.jobs[0].id}, format="json")
+        again = self.client.post("/jobListing/v1/savedJob/me/", {"job": self.jobs[0].id}, format="json")
+        self.assertEqual((first.status_code, again.status_code), (201, 200))
+        self.assertEqual(first.json()["id"], again.json()["id"])
+        self.assertEqual(first.json()["user"], self.worker.id)
+        self.assertEqual(self.client.post("/jobListing/v1/savedJob/me/", {"job": 0}, format="json").status_code, 400)
+
+        # The plain and bulk endpoints return the existing row too.
+        plain = self.client.post("/jobListing/v1/savedJob/", {"user": self.worker.id, "job": self.jobs[0].id}, format="json")
+        self.assertEqual(plain.json()["id"], first.json()["id"])
+        bulk = self.client.post("/jobListing/v1/savedJob/bulk/", [
+            {"user": self.worker.id, "job": self.jobs[0].id},
+            {"user": self.worker.id, "job": self.jobs[1].id},
+            {"user": self.worker.id, "job": self.jobs[1].id},
+        ], format="json")
+        self.assertEqual(bulk.status_code, 201)
+        ids = [row["id"] for row in bulk.json()]
+        self.assertEqual(ids[0], first.json()["id"])
+        self.assertEqual(ids[1], ids[2])
+        self.assertEqual(SavedJob.objects.count(), 2)
+
+    def test_my_saved_jobs_list_and_unsave(self):
+        SavedJob.objects.create(user=self.other, job=self.jobs[0])
+        for job in self.jobs[:2]:
+            SavedJob.objects.create(user=self.worker, job=job)
+
+        response = self.client.get("/jobListing/v1/savedJob/me/")
+        self.assertEqual([s["job"]["id"] for s in response.json()["results"]], [self.jobs[1].id, self.jobs[0].id])
+
+        self.assertEqual(self.client.delete(f"/jobListing/v1/savedJob/me/?job={self.jobs[0].id}").status_code, 204)
+        self.assertEqual(self.client.delete(f"/jobListing/v1/savedJob/me/?job={self.jobs[0].id}").status_code, 204)
+        self.assertEqual(SavedJob.objects.filter(user=self.worker).count(), 1)
+        self.assertTrue(SavedJob.objects.filter(user=self.other, job=self.jobs[0]).exists())
+
+
+class JobSummaryTests(TestCase):
+    def setUp(self):
+        listing_cache.get_cache().clear()
+        self.client = APIClient()
+        self.poster = make_profile()
+        self.client.force_authenticate(self.poster.user)
+
+    def summary(self):
+        response = self.client.get("/jobListing/v1/job/mine/summary/")
+        self.assertEqual(response.status_code, 200, response.content)
+        return {job["id"]: (job["pending"], job["accepted"], job["rejected"]) for job in response.json()["results"]}
+
+    def test_counts_by_status_in_one_query_however_many_jobs(self):
+        make_job(make_profile("other@example.com"))
+        jobs = [make_job(self.poster, applicants_needed=5) for _ in range(4)]
+        workers = [make_profile(f"w{i}@example.com") for i in range(3)]
+        for job in jobs[:3]:
+            for worker, status in zip(workers, (JobApplication.PENDING, JobApplication.ACCEPTED, JobApplication.REJECTED)):
+                JobApplication.objects.create(job=job, applicant=worker, status=status)
+        JobApplication.objects.create(job=jobs[0], applicant=make_profile("w9@example.com"))
+
+        with CaptureQueriesContext(connection) as queries:
+            summary = self.summary()
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(summary, {
+            jobs[0].id: (2, 1, 1), jobs[1].id: (1, 1, 1), jobs[2].id: (1, 1, 1), jobs[3].id: (0, 0, 0),
+        })
+
+        # Served from the cache until SUMMARY_CACHE_TIMEOUT passes.
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.summary(), summary)
+        self.assertEqual(len(queries), 0)
+        self.assertEqual(listing_cache.stats()["job-summary"], {"hit": 1, "miss": 1})
+
+    def test_requires_authentication(self):
+        self.client.force_authenticate(None)
+        self.assertEqual(self.client.get("/jobListing/v1/job/mine/summary/").status_code, 401)
+
+
+class AsyncReadTests(TestCase):
+    def setUp(self):
+        listing_cache.get_cache().clear()
+        self.poster = make_profile()
+        self.worker = make_profile("worker@example.com")
+        self.jobs = [make_job(self.poster, title=f"Shift {i}") for i in range(5)]
+        self.auth = {"Authorization": f"Bearer {MyTokenObtainPairSerializer.get_token(self.worker.user).access_token}"}
+
+    async def test_job_list_and_detail_match_the_sync_endpoints(self):
+        for query in ("?page_size=2", "?open=true&page_size=10"):
+            sync_page = (await self.async_client.get(f"/jobListing/v1/job/{query}")).json()
+            async_page = (await self.async_client.get(f"/jobListing/v1/async/job/{query}")).json()
+            self.assertEqual(async_page["results"], sync_page["results"])
+
+        response = await self.async_client.get("/jobListing/v1/async/job/?page_size=2")
+        following = await self.async_client.get(response.json()["next"])
+        self.assertEqual([job["id"] for job in following.json()["results"]], [self.jobs[2].id, self.jobs[1].id])
+        again = await self.async_client.get("/jobListing/v1/async/job/?page_size=2", headers={"If-None-Match": response["ETag"]})
+        self.assertEqual(again.status_code, 304)
+
+        detail = await self.async_client.get(f"/jobListing/v1/async/job/{self.jobs[0].id}/")
+        self.assertEqual(detail.json(), (await self.async_client.get(f"/jobListing/v1/job/{self.jobs[0].id}/")).json())
+        self.assertEqual((await self.async_client.get("/jobListing/v1/async/job/999999/")).status_code, 404)
+        self.assertEqual((await self.async_client.post("/jobListing/v1/async/job/")).status_code, 405)
+
+    async def test_my_applications_need_a_bearer_token(self):
+        application = await JobApplication.objects.acreate(job=self.jobs[0], applicant=self.worker)
+        self.assertEqual((await self.async_client.get("/jobListing/v1/async/jobApplication/me/")).status_code, 401)
+        bad = await self.async_client.get("/jobListing/v1/async/jobApplication/me/", headers={"Authorization": "Bearer nope"})
+        self.assertEqual(bad.status_code, 401)
+
+        response = await self.async_client.get("/jobListing/v1/async/jobApplication/me/", headers=self.auth)
+        self.assertEqual([a["id"] for a in response.json()["results"]], [application.id])
+        response = await self.async_client.get("/jobListing/v1/async/jobApplication/me/?status=Accepted", headers=self.auth)
+        self.assertEqual(response.json()["results"], [])
+
+    @override_settings(DEBUG=True)  # Django only logs adapted middleware in debug
+    def test_no_middleware_is_adapted(self):
+        # A single sync-only middleware would run every async view through async_to_sync.
+        with self.assertNoLogs("django.request", "DEBUG"):
+            BaseHandler().load_middleware(is_async=True)
+
+
+class MetricsTests(TestCase):
+    def setUp(self):
+        listing_cache.get_cache().clear()
+        metrics.registry.reset()
+        self.poster = make_profile()
+        self.job = make_job(self.poster)
+
+    def scrape(self, **headers):
+        return self.client.get("/metrics", headers=headers)
+
+    def test_server_timing_and_metrics_per_route(self):
+        response = self.client.get(f"/jobListing/v1/job/{self.job.id}/?nonce=1")
+        timing = dict(part.strip().split(";", 1) for part in response["Server-Timing"].split(","))
+        self.assertEqual(set(timing), {"app", "db", "serialize"})
+        self.assertRegex(timing["db"], r'dur=[\d.]+;desc="[1-9]\d* queries"')
+        missing = self.client.get("/jobListing/v1/job/999999/")
+
+        with override_settings(METRICS_TOKEN="scrape-me"):
+            body = self.scrape(Authorization="Bearer scrape-me").content.decode()
+        route = 'route="job-detail",method="GET"'
+        self.assertIn(f'paeshift_requests_total{{{route},status="200"}} 1', body)
+        self.assertIn(f'paeshift_requests_total{{{route},status="404"}} 1', body)
+        self.assertIn(f'paeshift_request_duration_seconds_bucket{{{route},le="+Inf"}} 2', body)
+        self.assertIn(f'paeshift_response_bytes_total{{{route}}} {len(response.content) + len(missing.content)}', body)
+        self.assertRegex(body, rf'paeshift_db_queries_total{{{route}}} [1-9]')
+
+    def test_serializer_time_is_counted_without_patching_drf(self):
+        self.client.get(f"/jobListing/v1/job/{self.job.id}/?nonce=4")
+        self.assertGreater(metrics.registry.routes["job-detail", "GET"].serialize_seconds, 0)
+        # Serializers used outside a view are untouched.
+        serializer = JobReadSerializer(self.job)
+        self.assertNotIn("to_representation", vars(serializer))
+        self.assertIsNotNone(serializer.data)
+
+    async def test_async_views_count_their_queries(self):
+        response = await self.async_client.get(f"/jobListing/v1/async/job/{self.job.id}/")
+        self.assertRegex(response["Server-Timing"], r'db;dur=[\d.]+;desc="[1-9]\d* queries"')
+
+    def test_metrics_need_the_token_or_a_staff_user(self):
+        self.assertEqual(self.scrape().status_code, 403)
+        self.assertEqual(self.scrape(Authorization="Bearer ").status_code, 403)
+        with override_settings(METRICS_TOKEN="scrape-me"):
+            self.assertEqual(self.scrape(Authorization="Bearer wrong").status_code, 403)
+        self.client.force_login(self.poster.user)
+        self.assertEqual(self.scrape().status_code, 403)
+        CustomUser.objects.filter(pk=self.poster.user.pk).update(is_staff=True)
+        self.assertEqual(self.scrape().status_code, 200)
+
+    def test_slow_requests_are_logged_with_their_sql(self):
+        with mock.patch.object(metrics, "SLOW_REQUEST_SECONDS", 0):
+            with self.assertLogs("main.metrics", "WARNING") as logs:
+                self.client.get(f"/jobListing/v1/job/{self.job.id}/?nonce=2")
+            # At most one log per route per interval.
+            with self.assertNoLogs("main.metrics", "WARNING"):
+                self.client.get(f"/jobListing/v1/job/{self.job.id}/?nonce=3")
+        self.assertIn("(job-detail)", logs.output[0])
+        self.assertIn('FROM "JobListingPage_job"', logs.output[0])
+
+
+class PooledPostgresTests(TestCase):
+    """main.db_backends.pooled_postgresql's pool, driven with stand-in psycopg2 connections."""
+
+    def setUp(self):
+        self.wrapper = pooled.DatabaseWrapper({**connection.settings_dict, "POOL_SIZE": 2}, alias="pool-test")
+        self.addCleanup(pooled._idle.pop, "pool-test", None)
+
+    def fake_connection(self):
+        fake = mock.MagicMock(closed=0)
+        fake.info.transaction_status = pooled.base.Database.extensions.TRANSACTION_STATUS_IDLE
+        return fake
+
+    def close(self, fake, **state):
+        self.wrapper.connection = fake
+        # Set by get_new_connection on a real connection.
+        self.wrapper.isolation_level = pooled.base.Database.extensions.ISOLATION_LEVEL_READ_COMMITTED
+        for name, value in state.items():
+            setattr(self.wrapper, name, value)
+        self.wrapper._close()
+        self.wrapper.connection = None
+        self.wrapper.errors_occurred = False
+
+    def take(self, fresh=None):
+        with mock.patch.object(pooled.base.DatabaseWrapper, "get_new_connection", return_value=fresh) as connect:
+            return self.wrapper.get_new_connection({}), connect.called
+
+    def test_closed_connections_are_reused_newest_first(self):
+        older, newer = self.fake_connection(), self.fake_connection()
+        self.close(older)
+        self.close(newer)
+        self.assertEqual(self.take(), (newer, False))
+        self.assertEqual(self.take(), (older, False))
+        older.close.assert_not_called()
+        newer.close.assert_not_called()
+
+    def test_open_or_failed_transactions_are_rolled_back_before_reuse(self):
+        extensions = pooled.base.Database.extensions
+        for status in (extensions.TRANSACTION_STATUS_INTRANS, extensions.TRANSACTION_STATUS_INERROR):
+            fake = self.fake_connection()
+            fake.info.transaction_status = status
+            self.close(fake)
+            fake.rollback.assert_called_once()
+            self.assertEqual(self.take(), (fake, False))
+
+    def test_a_connection_that_raised_is_discarded(self):
+        broken, fresh = self.fake_connection(), self.fake_connection()
+        self.close(broken, errors_occurred=True)
+        broken.close.assert_called_once()
+        self.assertEqual(self.take(fresh), (fresh, True))
+
+    def test_idle_connections_are_pinged_before_reuse(self):
+        quiet, dead, fresh = self.fake_connection(), self.fake_connection(), self.fake_connection()
+        dead.cursor.return_value.__enter__.return_value.execute.side_effect = pooled.base.Database.OperationalError
+        with mock.patch.object(pooled.time, "monotonic", return_value=1000):
+            self.close(dead)
+            self.close(quiet)
+        with mock.patch.object(pooled.time, "monotonic", return_value=1000 + pooled.CHECK_AFTER_SECONDS - 1):
+            self.assertEqual(self.take(), (quiet, False))
+        quiet.cursor.assert_not_called()
+
+        with mock.patch.object(pooled.time, "monotonic", return_value=1000):
+            self.close(quiet)
+        with mock.patch.object(pooled.time, "monotonic", return_value=1000 + pooled.CHECK_AFTER_SECONDS + 1):
+            self.assertEqual(self.take(fresh), (quiet, False))
+            quiet.cursor.return_value.__enter__.return_value.execute.assert_called_once_with("SELECT 1")
+            self.assertEqual(self.take(fresh), (fresh, True))
+        dead.close.assert_called_once()
+
+    def test_pool_keeps_at_most_pool_size_connections(self):
+        kept = [self.fake_connection(), self.fake_connection()]
+        extra = self.fake_connection()
+        for fake in kept + [extra]:
+            self.close(fake)
+        extra.close.assert_called_once()
+        self.assertEqual(pooled._idle["pool-test"].qsize(), 2)
+
+
+class SqliteBackendTests(TestCase):
+    def test_connections_use_wal_and_normal_sync(self):
+        path = os.path.join(tempfile.mkdtemp(), "wal.sqlite3")
+        wrapper = sqlite_backend.DatabaseWrapper({**connection.settings_dict, "NAME": path}, alias="wal-test")
+        self.addCleanup(wrapper.close)
+        with wrapper.cursor() as cursor:
+            self.assertEqual(cursor.execute("PRAGMA journal_mode").fetchone(), ("wal",))
+            self.assertEqual(cursor.execute("PRAGMA synchronous").fetchone(), (1,))  # NORMAL
+
+
+@override_settings(METRICS_TOKEN="budget")
+class EndpointBudgetTests(EndpointBudgetMixin, TestCase):
+    """Every route in main/urls.py and JobListingPage/urls.py; admin pages are in ListingQueryCountTests."""
+    owned_routes = r"(?!admin/|userApi/)"
+
+    @classmethod
+    def setUpTestData(cls):
+        lat, lng = geo.KNOWN_LOCATIONS["ikeja"]
+        cls.poster = make_profile()
+        cls.worker = make_profile("worker@example.com")
+        Profile.objects.filter(pk=cls.worker.pk).update(latitude=lat, longitude=lng)
+        cls.staff = CustomUser.objects.create_superuser(email="admin@example.com", username="admin", password="pass12345")
+        posters = make_profiles(10, "poster")
+        workers = make_profiles(40, latitude=lat, longitude=lng)
+
+        # 25 jobs for the poster, 200 more from others; every worker applies
+        # to and saves a handful, and the worker to a page and more.
+        cls.jobs = make_jobs([cls.poster], 25) + make_jobs(posters, 20)
+        applications = [
+            JobApplication(job=cls.jobs[(w * 7 + k) % len(cls.jobs)], applicant=worker)
+            for w, worker in enumerate(workers) for k in range(5)
+        ]
+        applications += [JobApplication(job=job, applicant=cls.worker) for job in cls.jobs[:30]]
+        JobApplication.objects.bulk_create(applications)
+        SavedJob.objects.bulk_create(
+            [SavedJob(job=cls.jobs[(w * 11 + k) % len(cls.jobs)], user=worker) for w, worker in enumerate(workers) for k in range(3)]
+            + [SavedJob(job=job, user=cls.worker) for job in cls.jobs[30:60]]
+        )
+        call_command("reconcile_job_counters", stdout=StringIO())
+
+        accepted = JobApplication.objects.filter(job__posted_by=cls.poster).exclude(applicant=cls.worker)[:10]
+        JobApplication.objects.filter(pk__in=[a.pk for a in accepted]).update(status=JobApplication.ACCEPTED)
+        Review.objects.bulk_create(
+            Review(application=a, reviewer=cls.poster, reviewee_id=a.applicant_id, rating=4) for a in accepted
+        )
+        cls.reviewable = JobApplication.objects.filter(job__posted_by=cls.poster, status=JobApplication.PENDING).exclude(applicant=cls.worker)[0]
+        JobApplication.objects.filter(pk=cls.reviewable.pk).update(status=JobApplication.ACCEPTED)
+
+        # One job with a crowd of applicants for the bulk decisions.
+        cls.crowded = make_jobs([cls.poster], 1, applicants_needed=20)[0]
+        cls.crowd = [a.pk for a in JobApplication.objects.bulk_create(
+            JobApplication(job=cls.crowded, applicant=worker) for worker in workers[:15]
+        )]
+        recommend.features.reset()
+        cls.addClassCleanup(recommend.features.reset)
+        recommend.recompute(cls.worker)
+
+    def setUp(self):
+        listing_cache.get_cache().clear()
+
+    def cases(self):
+        poster, worker, staff = self.bearer(self.poster.user), self.bearer(self.worker.user), self.bearer(self.staff)
+        job, spare_job = self.jobs[0], self.jobs[200]
+        application = JobApplication.objects.filter(
+            job__in=self.jobs[:25], status=JobApplication.PENDING).exclude(applicant=self.worker)[0]
+        saved = SavedJob.objects.filter(user=self.worker)[0]
+        review = Review.objects.all()[0]
+        new_job = {
+            "title": "New shift", "description": "Warehouse shift", "contract_duration": "2hrs Contract",
+            "job_date": (timezone.now() + timedelta(days=2)).isoformat(), "location": "Ikeja, Lagos",
+            "payment": "45.00", "applicants_needed": 2, "posted_by": self.poster.pk,
+        }
+        return [
+            # main/urls.py
+            self.case("GET", "/", 200, 0, ms=1000),
+            self.case("GET", "/redoc/", 200, 0, ms=1000),
+            self.case("GET", "/metrics", 200, 0, headers={"Authorization": "Bearer budget"}),
+            self.case("GET", "/jobListing/v1/", 200, 0),
+
+            # Reads
+            self.case("GET", "/jobListing/v1/job/", 200, 1),
+            self.case("GET", "/jobListing/v1/job/?open=true&q=warehouse", 200, 1),
+            self.case("GET", f"/jobListing/v1/job/{job.pk}/", 200, 1),
+            self.case("GET", "/jobListing/v1/job/nearby/?radius=20", 200, 4, headers=worker),
+            self.case("GET", "/jobListing/v1/job/recommended/", 200, 2, headers=worker),
+            self.case("GET", "/jobListing/v1/job/mine/summary/", 200, 1, headers=poster),
+            self.case("GET", "/jobListing/v1/jobApplication/", 200, 1),
+            self.case("GET", f"/jobListing/v1/jobApplication/{application.pk}/", 200, 1),
+            self.case("GET", "/jobListing/v1/jobApplication/me/", 200, 1, headers=worker),
+            self.case("GET", "/jobListing/v1/savedJob/", 200, 1),
+            self.case("GET", f"/jobListing/v1/savedJob/{saved.pk}/", 200, 1),
+            self.case("GET", "/jobListing/v1/savedJob/me/", 200, 1, headers=worker),
+            self.case("GET", "/jobListing/v1/userProfile/", 200, 1),
+            self.case("GET", f"/jobListing/v1/userProfile/{self.worker.pk}/", 200, 1),
+            self.case("GET", "/jobListing/v1/review/", 200, 1),
+            self.case("GET", f"/jobListing/v1/review/?reviewee={review.reviewee_id}", 200, 1),
+            self.case("GET", f"/jobListing/v1/review/{review.pk}/", 200, 1),
+            self.case("GET", "/jobListing/v1/changes/", 200, 4, headers=worker),
+            self.case("GET", "/jobListing/v1/export/job.ndjson", 200, 2, headers=staff),
+            self.case("GET", "/jobListing/v1/export/mine/jobApplication.csv", 200, 1, headers=poster),
+            self.case("GET", "/jobListing/v1/cacheStats/", 200, 1, headers=staff),
+            self.case("GET", "/jobListing/v1/async/job/", 200, 1),
+            self.case("GET", f"/jobListing/v1/async/job/{job.pk}/", 200, 1),
+            self.case("GET", "/jobListing/v1/async/jobApplication/me/", 200, 1, headers=worker),
+
+            # Writes
+            self.case("POST", "/jobListing/v1/job/", 201, 5, data=new_job, headers=poster),
+            self.case("POST", "/jobListing/v1/job/bulk/", 201, 7, data=[new_job] * 20, headers=poster),
+            self.case("PATCH", f"/jobListing/v1/job/{job.pk}/", 200, 5, data={"payment": "55.00"}, headers=poster),
+            self.case("PATCH", "/jobListing/v1/job/bulk/", 200, 7, data=[
+                {"id": job.pk, "payment": "60.00", "location": "Yaba, Lagos"} for job in self.jobs[:20]
+            ], headers=poster),
+            self.case("POST", "/jobListing/v1/jobApplication/", 201, 7, data={"job": spare_job.pk, "applicant": self.worker.pk}, headers=worker),
+            self.case("POST", f"/jobListing/v1/jobApplication/{application.pk}/accept/", 200, 7, headers=poster),
+            self.case("POST", f"/jobListing/v1/jobApplication/{application.pk}/reject/", 200, 7, headers=poster),
+            self.case("POST", "/jobListing/v1/jobApplication/bulk-accept/", 200, 7, data={"ids": self.crowd}, headers=poster),
+            self.case("POST", "/jobListing/v1/jobApplication/bulk-reject/", 200, 6, data={"ids": self.crowd}, headers=poster),
+            self.case("POST", "/jobListing/v1/savedJob/", 201, 7, data={"job": spare_job.pk, "user": self.worker.pk}, headers=worker),
+            self.case("POST", "/jobListing/v1/savedJob/bulk/", 201, 7, data=[
+                {"job": job.pk, "user": self.worker.pk} for job in self.jobs[150:170]
+            ], headers=worker),
+            self.case("POST", "/jobListing/v1/savedJob/me/", 201, 7, data={"job": self.jobs[180].pk}, headers=worker),
+            self.case("DELETE", f"/jobListing/v1/savedJob/me/?job={self.jobs[180].pk}", 204, 4, headers=worker),
+            self.case("DELETE", f"/jobListing/v1/savedJob/{saved.pk}/", 204, 4, headers=worker),
+            self.case("POST", "/jobListing/v1/review/", 201, 9, data={
+                "application": self.reviewable.pk, "rating": 5,
+            }, headers=poster),
+            self.case("PATCH", f"/jobListing/v1/review/{review.pk}/", 200, 10, data={"rating": 2}, headers=poster),
+            self.case("PATCH", f"/jobListing/v1/userProfile/{self.worker.pk}/", 200, 3, data={"bio": "Forklift certified"}, headers=worker),
+            self.case("DELETE", f"/jobListing/v1/jobApplication/{application.pk}/", 204, 7, headers=poster),
+            self.case("DELETE", f"/jobListing/v1/job/{spare_job.pk}/", 204, 16, headers=poster),
+        ]
+
+
+class SyntheticDataTests(TestCase):
+    def generate(self, prefix, **options):
+        options = {"users": 40, "jobs": 60, "applications": 300, "saved": 100, **options}
+        call_command("generate_synthetic_data", "--prefix", prefix,
+                     *(f"--{name}={value}" for name, value in options.items()), stdout=StringIO())
+        return Job.objects.filter(posted_by__user__username__startswith=prefix).order_by("pk")
+
+    def test_generates_consistent_reproducible_data(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        manifest = os.path.join(directory.name, "synthetic.json")
+        jobs = self.generate("a", manifest=manifest)
+        self.assertEqual(CustomUser.objects.filter(username__startswith="a").count(), 40)
+        self.assertEqual(Profile.objects.filter(user__username__startswith="a").count(), 40)
+        self.assertEqual(jobs.count(), 60)
+        self.assertEqual(JobApplication.objects.count(), 300)
+        self.assertEqual(SavedJob.objects.count(), 100)
+        self.assertFalse(JobApplication.objects.filter(applicant__job__isnull=False).exists())  # posters never apply
+        self.assertFalse(jobs.filter(accepted_count__gt=F("applicants_needed")).exists())
+        out = StringIO()
+        call_command("reconcile_job_counters", stdout=out)
+        self.assertIn("0 had drifted", out.getvalue())
+
+        with open(manifest) as handle:
+            workers = json.load(handle)["workers"]
+        self.assertEqual(len(workers), 36)
+        login = self.client.post("/userApi/v1/user/token/", {"email": workers[0]["email"], "password": "synthetic-pass-123"})
+        self.assertEqual(login.status_code, 200)
+
+        # The same seed gives the same data under another prefix.
+        fields = ("title", "payment", "location", "applicants_needed", "applications_count", "accepted_count")
+        self.assertEqual(list(self.generate("b").values_list(*fields)), list(jobs.values_list(*fields)))
+        self.assertNotEqual(list(self.generate("c", seed=2).values_list(*fields)), list(jobs.values_list(*fields)))
+
+    def test_refuses_an_existing_prefix(self):
+        self.generate("a", users=10, jobs=5, applications=10, saved=5)
+        with self.assertRaisesMessage(CommandError, "already exist"):
+            self.generate("a")
@@ -26,7 +26,8 @@
 
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import UserProfileViewSet, JobViewSet, JobApplicationViewSet, SavedJobViewSet
+from .views import UserProfileViewSet, JobViewSet, JobApplicationViewSet, SavedJobViewSet, ReviewViewSet, cache_stats, changes, export_mine, export_table
+from . import async_views
 
 # Router setup
 router = DefaultRouter()
@@ -34,7 +35,16 @@ router.register(r'userProfile', UserProfileViewSet, basename='user-profile')
 router.register(r'job', JobViewSet, basename='job')
 router.register(r'jobApplication', JobApplicationViewSet, basename='job-application')
 router.register(r'savedJob', SavedJobViewSet, basename='saved-job')
+router.register(r'review', ReviewViewSet, basename='review')
 
 urlpatterns = [
+    path("cacheStats/", cache_stats),
+    path("changes/", changes),
+    path("export/mine/<str:kind>.<str:fmt>", export_mine),
+    path("export/<str:kind>.<str:fmt>", export_table),
+    # Async reads for ASGI deployments; see async_views.py
+    path("async/job/", async_views.job_list),
+    path("async/job/<int:pk>/", async_views.job_detail),
+    path("async/jobApplication/me/", async_views.my_application_list),
     path("", include(router.urls)),  # This automatically includes all routes
 ]
@@ -1,20 +1,431 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q
+from django.http import StreamingHttpResponse
 from django.shortcuts import render
-from rest_framework import viewsets
-from.models import Profile, Job, JobApplication, SavedJob
-from.serializers import UserProfileSerializer, JobSerializer, JobApplicationSerializer, SavedJobSerializer
+from django.utils import timezone
+from rest_framework import status, viewsets
+from rest_framework.decorators import action, api_view, authentication_classes, permission_classes
+from rest_framework.exceptions import MethodNotAllowed, NotFound, PermissionDenied, ValidationError
+from rest_framework.authentication import BasicAuthentication, SessionAuthentication
+from rest_framework.permissions import SAFE_METHODS, IsAdminUser, IsAuthenticated, IsAuthenticatedOrReadOnly
+from rest_framework.response import Response
+from authUser.authentication import ClaimsJWTAuthentication
+from.models import Profile, Job, JobApplication, Review, SavedJob, OPEN_JOB
+from.serializers import (
+    UserProfileSerializer, JobSerializer, JobReadSerializer, NearbyJobSerializer, RecommendedJobSerializer, JobDashboardSerializer,
+    JobApplicationSerializer, JobApplicationReadSerializer, SavedJobSerializer, SavedJobReadSerializer,
+    MyJobApplicationSerializer, MySavedJobSerializer, MySavedJobReadSerializer,
+    ReviewSerializer, ReviewReadSerializer, ApplicationIdsSerializer,
+)
+from. import applications, export, geo, recommend, search, sync
+from.listing_cache import CachedReadMixin, ConditionalGetMixin
+from. import listing_cache
+from main.metrics import SerializerTimingMixin, timed
 
-class UserProfileViewSet(viewsets.ModelViewSet):
+NEARBY_DEFAULT_RADIUS_KM = 10
+NEARBY_MAX_RADIUS_KM = 200
+CHANGES_DEFAULT_LIMIT = 500
+CHANGES_MAX_LIMIT = 1000
+RECOMMENDED_DEFAULT_LIMIT = 20
+# Seconds a poster's dashboard counts may lag behind new applications
+SUMMARY_CACHE_TIMEOUT = getattr(settings, 'JOB_SUMMARY_CACHE_TIMEOUT', 15)
+listing_cache.ENDPOINTS.append('job-summary')
+
+# Bearer tokens are trusted without a user query on reads, unless a view
+# needs more than the token's claims; writes always load the user row, so
+# a deactivated user's token can no longer change anything.
+CLAIMS_AUTHENTICATION = [ClaimsJWTAuthentication, SessionAuthentication, BasicAuthentication]
+
+
+class ReadSerializerMixin:
+    """
+    Answer reads with ``read_serializer_class`` (nested summaries) and take
+    writes through ``serializer_class`` (plain ids). The queryset's
+    select_related plan must cover whatever the read serializer touches.
+    """
+    read_serializer_class = None
+
+    def get_serializer_class(self):
+        if self.read_serializer_class is not None and self.request.method in SAFE_METHODS:
+            return self.read_serializer_class
+        return super().get_serializer_class()
+
+class BulkWriteMixin:
+    """
+    POST a JSON list to ``<route>/bulk/`` to create every item in one
+    transaction with one INSERT; PATCH a list of partial items, each with
+    the ``id`` of its row, to update them with one bulk_update. Nothing is
+    written unless every item is valid; on failure ``errors`` holds one
+    entry per item, in order.
+    """
+    bulk_max_items = 1000
+    bulk_updates = True
+
+    @action(detail=False, methods=['post', 'patch'])
+    def bulk(self, request):
+        if request.method == 'PATCH' and not self.bulk_updates:
+            raise MethodNotAllowed(request.method)
+        if not isinstance(request.data, list) or not request.data:
+            raise ValidationError({"detail": "Expected a non-empty list of items."})
+        if len(request.data) > self.bulk_max_items:
+            raise ValidationError({"detail": f"At most {self.bulk_max_items} items per request."})
+
+        if request.method == 'PATCH':
+            instances = self.bulk_instances(request.data)
+            if isinstance(instances, Response):
+                return instances
+            serializer = timed(self.serializer_class(instances, data=request.data, many=True, partial=True,
+                                                     context=self.get_serializer_context()))
+        else:
+            serializer = timed(self.serializer_class(data=request.data, many=True, context=self.get_serializer_context()))
+        if not serializer.is_valid():
+            return Response({"errors": serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
+        with transaction.atomic():
+            instances = serializer.save()
+            listing_cache.invalidate(self.version_namespace, *[instance.pk for instance in instances])
+        return Response(serializer.data, status=status.HTTP_200_OK if request.method == 'PATCH' else status.HTTP_201_CREATED)
+
+    def bulk_instances(self, items):
+        """The rows a bulk PATCH names, in order, or a 400 Response listing the bad ids."""
+        ids = [item.get('id') if isinstance(item, dict) else None for item in items]
+        ids = [pk if isinstance(pk, int) and not isinstance(pk, bool) else None for pk in ids]
+        rows = self.serializer_class.Meta.model.objects.in_bulk([pk for pk in ids if pk is not None])
+        errors, seen = [], set()
+        for pk in ids:
+            if pk is None:
+                errors.append({"id": ["An id is required."]})
+            elif pk not in rows:
+                errors.append({"id": ["Not found."]})
+            elif pk in seen:
+                errors.append({"id": ["Listed more than once."]})
+            else:
+                errors.append({})
+            seen.add(pk)
+        if any(errors):
+            return Response({"errors": errors}, status=status.HTTP_400_BAD_REQUEST)
+        return [rows[pk] for pk in ids]
+
+def filter_jobs(queryset, params, listing):
+    """
+    Apply ?open= and, when ``listing``, ?q= to a Job queryset. Returns it
+    with the ordering it needs, or None to keep the view's own.
+    """
+    is_open = params.get('open', '').lower()
+    if is_open in ('true', '1'):
+        queryset = queryset.filter(OPEN_JOB)
+    elif is_open in ('false', '0'):
+        queryset = queryset.exclude(OPEN_JOB)
+    query = params.get('q', '').strip()
+    if query and listing:
+        # Most relevant first; the cursor then seeks on the rank.
+        return search.search_jobs(queryset, query), ('-search_rank', '-id')
+    return queryset, None
+
+def my_applications(user_id, params):
+    """The user's applications, with ?status= keeping one status."""
+    # Served by the (applicant, status, id) index, reached through the unique Profile.user.
+    queryset = JobApplication.objects.filter(applicant__user_id=user_id).select_related('job')
+    wanted = params.get('status')
+    if wanted is not None:
+        if wanted not in (JobApplication.PENDING, JobApplication.ACCEPTED, JobApplication.REJECTED):
+            raise ValidationError({"status": "Must be Pending, Accepted or Rejected."})
+        queryset = queryset.filter(status=wanted)
+    return queryset
+
+class UserProfileViewSet(SerializerTimingMixin, ConditionalGetMixin, viewsets.ModelViewSet):
+    authentication_classes = CLAIMS_AUTHENTICATION
     queryset = Profile.objects.all()
     serializer_class = UserProfileSerializer
+    ordering = ('-id',)
+    version_namespace = 'userProfile'
+    rating_orderings = {'rating': ('rating', 'id'), '-rating': ('-rating', '-id')}
 
-class JobViewSet(viewsets.ModelViewSet):
-    queryset = Job.objects.all()
+    def get_queryset(self):
+        # Rating is stored on the row (see adjust_profile_rating), so these
+        # read the (rating, id) index instead of aggregating reviews.
+        queryset = super().get_queryset()
+        params = self.request.query_params
+        if params.get('ordering') in self.rating_orderings:
+            self.ordering = self.rating_orderings[params['ordering']]
+        try:
+            if 'min_rating' in params:
+                queryset = queryset.filter(rating__gte=float(params['min_rating']))
+            if 'min_reviews' in params:
+                queryset = queryset.filter(rating_count__gte=int(params['min_reviews']))
+        except ValueError:
+            raise ValidationError({"detail": "min_rating and min_reviews must be numbers"})
+        return queryset
+
+class JobViewSet(SerializerTimingMixin, ConditionalGetMixin, CachedReadMixin, BulkWriteMixin, ReadSerializerMixin, viewsets.ModelViewSet):
+    authentication_classes = CLAIMS_AUTHENTICATION
+    queryset = Job.objects.select_related('posted_by__user')
     serializer_class = JobSerializer
+    read_serializer_class = JobReadSerializer
+    ordering = ('-date_posted', '-id')
+    version_namespace = 'job'
+
+    def get_queryset(self):
+        queryset, ordering = filter_jobs(super().get_queryset(), self.request.query_params, self.action == 'list')
+        self.ordering = ordering or self.ordering
+        return queryset
+
+    @action(detail=False, methods=['get'])
+    def nearby(self, request):
+        """
+        Jobs within ?radius= km (default 10) of ?lat=&lng=, closest first.
+        Without coordinates the caller's profile location is used.
+        """
+        latitude, longitude = request.query_params.get('lat'), request.query_params.get('lng')
+        if (latitude is None or longitude is None) and request.user.is_authenticated:
+            latitude, longitude = request.user.profile.latitude, request.user.profile.longitude
+        try:
+            latitude, longitude = float(latitude), float(longitude)
+            radius = float(request.query_params.get('radius', NEARBY_DEFAULT_RADIUS_KM))
+        except (TypeError, ValueError):
+            raise ValidationError({"detail": "lat and lng are required and must be numbers"})
+        if not (-90 <= latitude <= 90 and -180 <= longitude <= 180) or not 0 < radius <= NEARBY_MAX_RADIUS_KM:
+            raise ValidationError({"detail": f"lat/lng out of range or radius not within 0-{NEARBY_MAX_RADIUS_KM} km"})
+
+        jobs = geo.nearby(self.get_queryset(), latitude, longitude, radius, self.paginator.get_page_size(request))
+        return Response(self.serialize(NearbyJobSerializer, jobs, many=True, context=self.get_serializer_context()))
+
+    @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated])
+    def recommended(self, request):
+        """
+        The caller's best-matching open jobs, best first, up to ?limit=
+        (default 20, at most recommend.TOP_K). Served from the caller's
+        precomputed Recommendation; see recommend.py.
+        """
+        try:
+            limit = int(request.query_params.get('limit', RECOMMENDED_DEFAULT_LIMIT))
+        except ValueError:
+            raise ValidationError({"detail": "limit must be a number"})
+        if not 0 < limit <= recommend.TOP_K:
+            raise ValidationError({"detail": f"limit must be within 1-{recommend.TOP_K}"})
 
-class JobApplicationViewSet(viewsets.ModelViewSet):
-    queryset = JobApplication.objects.all()
+        recommendation = recommend.for_user(request.user.pk)
+        if recommendation is None:
+            raise NotFound("No profile for this user.")
+        # The ranking is served however old it is (a stale one is only
+        # recomputed in the background), so drop jobs that have since
+        # started, filled up, been deleted or been applied to. The caller's
+        # own jobs are never scored, but rankings stored before that was
+        # so may still hold them.
+        scores = dict(zip(recommendation.job_ids, recommendation.scores))
+        jobs = {job.pk: job for job in (
+            self.get_queryset().filter(OPEN_JOB, pk__in=scores, job_date__gte=timezone.now())
+            .exclude(applications__applicant_id=recommendation.profile_id)
+            .exclude(posted_by_id=recommendation.profile_id)
+        )}
+        ranked = [jobs[job_id] for job_id in recommendation.job_ids if job_id in jobs][:limit]
+        for job in ranked:
+            job.score = scores[job.pk]
+        return Response(self.serialize(RecommendedJobSerializer, ranked, many=True, context=self.get_serializer_context()))
+
+    @action(detail=False, methods=['get'], url_path='mine/summary', permission_classes=[IsAuthenticated])
+    def summary(self, request):
+        """
+        The caller's posted jobs, newest first, each with its applications
+        counted by status: one grouped query per page, cached for
+        SUMMARY_CACHE_TIMEOUT seconds.
+        """
+        cache = listing_cache.get_cache()
+        key = f'listing:job-summary:{request.user.pk}:{listing_cache.request_key(request)}'
+        data = cache.get(key)
+        if data is not None:
+            listing_cache.record('job-summary', 'hit')
+            return Response(data)
+
+        listing_cache.record('job-summary', 'miss')
+        queryset = Job.objects.filter(posted_by__user_id=request.user.pk).annotate(
+            pending=Count('applications', filter=Q(applications__status=JobApplication.PENDING)),
+            accepted=Count('applications', filter=Q(applications__status=JobApplication.ACCEPTED)),
+            rejected=Count('applications', filter=Q(applications__status=JobApplication.REJECTED)),
+        )
+        page = self.paginate_queryset(queryset)
+        response = self.get_paginated_response(self.serialize(JobDashboardSerializer, page, many=True))
+        cache.set(key, response.data, SUMMARY_CACHE_TIMEOUT)
+        return response
+
+class JobApplicationViewSet(SerializerTimingMixin, ConditionalGetMixin, ReadSerializerMixin, viewsets.ModelViewSet):
+    authentication_classes = CLAIMS_AUTHENTICATION
+    queryset = JobApplication.objects.select_related('job', 'applicant__user')
     serializer_class = JobApplicationSerializer
+    read_serializer_class = JobApplicationReadSerializer
+    ordering = ('-id',)
+    version_namespace = 'jobApplication'
+    lookup_value_regex = r'\d+'
+
+    @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated])
+    def me(self, request):
+        """The caller's own applications, newest first; ?status= keeps one status."""
+        page = self.paginate_queryset(my_applications(request.user.pk, request.query_params))
+        return self.get_paginated_response(self.serialize(MyJobApplicationSerializer, page, many=True))
+
+    # Only the poster of an application's job may decide it; anyone else's
+    # applications answer as if they did not exist.
+    @action(detail=True, methods=['post'], permission_classes=[IsAuthenticated])
+    def accept(self, request, pk=None):
+        try:
+            applications.accept_application(pk, poster_user_id=request.user.pk)
+        except JobApplication.DoesNotExist:
+            raise NotFound()
+        except applications.JobFilled:
+            return Response({"detail": "This job already has all the applicants it needs."}, status=status.HTTP_409_CONFLICT)
+        return Response(self.serialize(JobApplicationReadSerializer, self.get_queryset().get(pk=pk)))
 
-class SavedJobViewSet(viewsets.ModelViewSet):
-    queryset = SavedJob.objects.all()
+    @action(detail=True, methods=['post'], permission_classes=[IsAuthenticated])
+    def reject(self, request, pk=None):
+        try:
+            applications.reject_application(pk, poster_user_id=request.user.pk)
+        except JobApplication.DoesNotExist:
+            raise NotFound()
+        return Response(self.serialize(JobApplicationReadSerializer, self.get_queryset().get(pk=pk)))
+
+    @action(detail=False, methods=['post'], url_path='bulk-accept', permission_classes=[IsAuthenticated])
+    def bulk_accept(self, request):
+        """Accept {"ids": [...]} in order until each job is full; reports every id."""
+        serializer = ApplicationIdsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response(applications.bulk_accept(serializer.validated_data['ids'], poster_user_id=request.user.pk))
+
+    @action(detail=False, methods=['post'], url_path='bulk-reject', permission_classes=[IsAuthenticated])
+    def bulk_reject(self, request):
+        serializer = ApplicationIdsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response(applications.bulk_reject(serializer.validated_data['ids'], poster_user_id=request.user.pk))
+
+class SavedJobViewSet(SerializerTimingMixin, ConditionalGetMixin, BulkWriteMixin, ReadSerializerMixin, viewsets.ModelViewSet):
+    authentication_classes = CLAIMS_AUTHENTICATION
+    queryset = SavedJob.objects.select_related('user__user', 'job')
     serializer_class = SavedJobSerializer
+    read_serializer_class = SavedJobReadSerializer
+    ordering = ('-saved_on', '-id')
+    version_namespace = 'savedJob'
+    # A save is only its (user, job) key; change one by deleting it and saving again.
+    bulk_updates = False
+
+    @action(detail=False, methods=['get', 'post', 'delete'], permission_classes=[IsAuthenticated])
+    def me(self, request):
+        """
+        GET the caller's saved jobs, newest first. POST {"job": id} saves a
+        job (201, or 200 if it was already saved); DELETE ?job=id unsaves it.
+        """
+        mine = SavedJob.objects.filter(user__user_id=request.user.pk)
+        if request.method == 'GET':
+            page = self.paginate_queryset(mine.select_related('job'))
+            return self.get_paginated_response(self.serialize(MySavedJobReadSerializer, page, many=True))
+
+        if request.method == 'DELETE':
+            job = request.query_params.get('job', '')
+            if not job.isdigit():
+                raise ValidationError({"job": "Must be a job id."})
+            mine.filter(job_id=job).delete()
+            return Response(status=status.HTTP_204_NO_CONTENT)
+
+        serializer = MySavedJobSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        profile_id = Profile.objects.filter(user_id=request.user.pk).values_list('pk', flat=True).first()
+        if profile_id is None:
+            raise NotFound("No profile for this user.")
+        saved_job, created = SavedJob.objects.get_or_create(user_id=profile_id, job=serializer.validated_data['job'])
+        return Response(self.serialize(MySavedJobSerializer, saved_job),
+                        status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
+
+class ReviewViewSet(SerializerTimingMixin, ConditionalGetMixin, ReadSerializerMixin, viewsets.ModelViewSet):
+    authentication_classes = CLAIMS_AUTHENTICATION
+    queryset = Review.objects.select_related('reviewer__user', 'reviewee__user')
+    serializer_class = ReviewSerializer
+    read_serializer_class = ReviewReadSerializer
+    permission_classes = [IsAuthenticatedOrReadOnly]
+    ordering = ('-id',)
+    version_namespace = 'review'
+
+    def caller_profile_id(self):
+        profile_id = Profile.objects.filter(user_id=self.request.user.pk).values_list('pk', flat=True).first()
+        if profile_id is None:
+            raise NotFound("No profile for this user.")
+        return profile_id
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self.action == 'create':
+            context['reviewer_id'] = self.caller_profile_id()
+        return context
+
+    def get_object(self):
+        # Only the reviewer may change or withdraw a review.
+        review = super().get_object()
+        if self.request.method not in SAFE_METHODS and review.reviewer.user_id != self.request.user.pk:
+            raise PermissionDenied("Only the reviewer can change or delete this review.")
+        return review
+
+    def perform_create(self, serializer):
+        serializer.save(reviewer_id=serializer.context['reviewer_id'])
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        reviewee = self.request.query_params.get('reviewee')
+        if reviewee is not None:
+            if not reviewee.isdigit():
+                raise ValidationError({"detail": "reviewee must be a profile id"})
+            queryset = queryset.filter(reviewee_id=reviewee)
+        return queryset
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def cache_stats(request):
+    """Hit/miss counts per cached endpoint."""
+    return Response(listing_cache.stats())
+
+
+@api_view(['GET'])
+@authentication_classes(CLAIMS_AUTHENTICATION)
+@permission_classes([IsAuthenticated])
+def changes(request):
+    """
+    Jobs, and the caller's own applications and saved jobs, plus the
+    applications to the caller's jobs, inserted, updated or deleted since
+    ?since=<token>, oldest first, at most ?limit= per call. Start without a
+    token, then pass back ``next`` until ``has_more`` is false. A token
+    older than the tombstone retention window gets 410 Gone: discard local
+    data and sync again from no token.
+    """
+    try:
+        limit = min(int(request.query_params.get('limit', CHANGES_DEFAULT_LIMIT)), CHANGES_MAX_LIMIT)
+        if limit < 1:
+            raise ValueError(limit)
+    except ValueError:
+        raise ValidationError({"limit": f"Must be a number between 1 and {CHANGES_MAX_LIMIT}."})
+    try:
+        return Response(sync.changes(request.query_params.get('since'), limit, request.user.pk, context={'request': request}))
+    except sync.InvalidToken:
+        raise ValidationError({"since": "Invalid sync token."})
+    except sync.ResyncRequired:
+        return Response({"detail": "Full resync required: this sync token is older than the deletes kept.", "resync": True},
+                        status=status.HTTP_410_GONE)
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def export_table(request, kind, fmt):
+    """Every job, jobApplication or savedJob as NDJSON or CSV, streamed in id order."""
+    if kind not in export.EXPORTS or fmt not in export.FORMATS:
+        raise NotFound()
+    response = StreamingHttpResponse(export.stream(kind, fmt), content_type=export.FORMATS[fmt])
+    response['Content-Disposition'] = f'attachment; filename="{kind}.{fmt}"'
+    return response
+
+
+@api_view(['GET'])
+@authentication_classes(CLAIMS_AUTHENTICATION)
+@permission_classes([IsAuthenticated])
+def export_mine(request, kind, fmt):
+    """The caller's own jobs, or the applications to them, as NDJSON or CSV, streamed in id order."""
+    if kind not in export.POSTER_EXPORTS or fmt not in export.FORMATS:
+        raise NotFound()
+    response = StreamingHttpResponse(export.stream(kind, fmt, poster=request.user.pk), content_type=export.FORMATS[fmt])
+    response['Content-Disposition'] = f'attachment; filename="my-{kind}.{fmt}"'
+    return response
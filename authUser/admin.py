@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from . models import CustomUser, Profile
+from . models import CustomUser, Profile, OutboundEmail
 
 class CustomUserAdmin(admin.ModelAdmin):
     list_display = ["username", "lastName", "email"]
@@ -15,11 +15,17 @@ class ProfileAdmin(admin.ModelAdmin):
     list_filter = ["user", "lastName", "location", "rating"]
    # search_fields = ["user", "fullName", "country"]
     list_per_page = 20
+    list_select_related = ["user"]
     readonly_fields = ["bio"]
     ordering=["lastName"]
 
+class OutboundEmailAdmin(admin.ModelAdmin):
+    list_display = ["subject", "status", "attempts", "next_attempt_at", "sent_at"]
+    list_filter = ["status"]
+    list_per_page = 20
+    readonly_fields = ["attempts", "last_error", "sent_at"]
+
 
 admin.site.register(CustomUser, CustomUserAdmin)
 admin.site.register(Profile, ProfileAdmin)
-
-
+admin.site.register(OutboundEmail, OutboundEmailAdmin)
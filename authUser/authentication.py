@@ -0,0 +1,71 @@
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.utils.functional import LazyObject
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+# Claims MyTokenObtainPairSerializer.get_token puts in every token.
+USER_CLAIMS = ('username', 'firstName', 'lastName', 'email')
+
+
+class ClaimsUser(LazyObject):
+    """
+    The user a token was issued to, answered from its claims: id, pk and
+    the USER_CLAIMS cost nothing. The id claim is coerced to the primary
+    key's type, as some simplejwt releases write it as a string. Anything else (is_staff, profile, an
+    isinstance check, assigning it to a foreign key) loads the CustomUser
+    row once, the same way Django's lazy ``request.user`` does.
+    """
+
+    def __init__(self, user_id, claims):
+        super().__init__()
+        user_id = get_user_model()._meta.pk.to_python(user_id)
+        # Straight into __dict__: LazyObject would forward setattr to the real user.
+        self.__dict__.update(
+            {claim: claims.get(claim) for claim in USER_CLAIMS},
+            id=user_id, pk=user_id, is_authenticated=True, is_anonymous=False,
+        )
+
+    def _setup(self):
+        try:
+            user = get_user_model().objects.get(**{api_settings.USER_ID_FIELD: self.__dict__['id']})
+        except get_user_model().DoesNotExist:
+            raise AuthenticationFailed("User not found", code="user_not_found")
+        if not user.is_active:
+            raise AuthenticationFailed("User is inactive", code="user_inactive")
+        self._wrapped = user
+
+    def __bool__(self):
+        return True
+
+    def __str__(self):
+        return self.__dict__['email'] or str(self.__dict__['id'])
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication without the per-request user query on reads: the
+    request's user is a ClaimsUser built from the token. A user deleted or
+    deactivated after the token was issued is only noticed by a read once
+    something loads the row, so tokens should stay short-lived. Writes
+    always load the row, so they fail for such a user.
+    """
+
+    def authenticate(self, request):
+        result = super().authenticate(request)
+        if result is not None and request.method not in SAFE_METHODS:
+            result[0]._setup()
+        return result
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken("Token contained no recognizable user identification")
+        try:
+            return ClaimsUser(user_id, validated_token)
+        except ValidationError:
+            raise InvalidToken("Token contained no recognizable user identification")
@@ -0,0 +1,113 @@
+import atexit
+import hashlib
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from PIL import Image, ImageOps
+
+from .models import Profile
+
+# Profile pictures are cleaned up and resized off the request path. An
+# upload is re-encoded without EXIF (which can carry GPS data) and at most
+# MAX_SIZE px on its longest side, then cut into square VARIANTS, each in
+# every FORMAT. Variant files are named after a hash of their bytes, so
+# their URLs never change meaning and can be cached forever.
+VARIANTS = {
+    'thumb': 64,
+    'small': 160,
+    'medium': 480,
+}
+FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+MAX_SIZE = 1600
+VARIANT_DIR = 'user_image/variants'
+
+logger = logging.getLogger(__name__)
+
+_pool = ThreadPoolExecutor(max_workers=getattr(settings, 'IMAGE_WORKERS', 2), thread_name_prefix='images')
+atexit.register(_pool.shutdown, wait=False)
+
+
+def needs_processing(profile):
+    return bool(profile.image) and profile.image_variants.get('source') != profile.image.name
+
+
+def schedule(profile_id):
+    """Process the profile's image in the worker pool once the current transaction commits."""
+    transaction.on_commit(lambda: _pool.submit(_run, profile_id))
+
+
+def _run(profile_id):
+    close_old_connections()
+    try:
+        process(profile_id)
+    except Exception:
+        logger.exception("Could not process the image of profile %s", profile_id)
+    finally:
+        close_old_connections()
+
+
+def _save(data, extension):
+    # Same bytes, same name: an existing file is already the right one.
+    name = f'{VARIANT_DIR}/{hashlib.sha256(data).hexdigest()[:32]}.{extension}'
+    if not default_storage.exists(name):
+        default_storage.save(name, ContentFile(data))
+    return name
+
+
+def _encode(image, fmt):
+    pil_format, options = FORMATS[fmt]
+    buffer = BytesIO()
+    image.save(buffer, pil_format, **options)
+    return buffer.getvalue()
+
+
+def process(profile_id):
+    """
+    Replace the profile's upload with a stripped, downscaled copy and build
+    its variants. Does nothing if the current image was already processed.
+    """
+    profile = Profile.objects.get(pk=profile_id)
+    if not needs_processing(profile):
+        return profile
+    original = profile.image.name
+
+    with profile.image.open('rb') as upload, Image.open(upload) as image:
+        image = ImageOps.exif_transpose(image)  # keep the orientation EXIF would have applied
+        image = image.convert('RGB')            # drops EXIF, alpha and palettes
+    image.thumbnail((MAX_SIZE, MAX_SIZE), Image.LANCZOS)
+
+    variants = {}
+    for variant, size in VARIANTS.items():
+        square = ImageOps.fit(image, (size, size), Image.LANCZOS)
+        variants[variant] = {fmt: _save(_encode(square, fmt), fmt) for fmt in FORMATS}
+    cleaned = _save(_encode(image, 'jpeg'), 'jpeg')
+
+    with transaction.atomic():
+        profile = Profile.objects.select_for_update().get(pk=profile_id)
+        if profile.image.name != original:
+            return profile  # a newer upload replaced it meanwhile; that one gets its own run
+        profile.image.name = cleaned
+        profile.image_variants = {'source': cleaned, **variants}
+        # save(), not update(), so post_save receivers (e.g. cached job cards) hear about it
+        profile.save(update_fields=['image', 'image_variants'])
+    if original != cleaned:
+        default_storage.delete(original)
+    return profile
+
+
+def urls(profile):
+    """{variant: {format: url}} for the profile's image, or None until processed."""
+    if not profile.image or profile.image_variants.get('source') != profile.image.name:
+        return None
+    return {
+        variant: {fmt: default_storage.url(name) for fmt, name in formats.items()}
+        for variant, formats in profile.image_variants.items() if variant in VARIANTS
+    }
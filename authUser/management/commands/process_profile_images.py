@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from authUser import images
+from authUser.models import Profile
+
+
+class Command(BaseCommand):
+    help = "Build the resized variants for profile pictures uploaded before they existed"
+
+    def handle(self, *args, **options):
+        processed = 0
+        for profile in Profile.objects.exclude(image='').exclude(image__isnull=True).iterator():
+            if images.needs_processing(profile):
+                images.process(profile.pk)
+                processed += 1
+        self.stdout.write(self.style.SUCCESS(f"Processed {processed} profile pictures"))
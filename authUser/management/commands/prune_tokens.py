@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+
+class Command(BaseCommand):
+    help = "Delete expired outstanding and blacklisted refresh tokens in batches; run it daily"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000,
+                            help="Tokens deleted per transaction (default 5000)")
+
+    def handle(self, *args, **options):
+        # Unlike simplejwt's flushexpiredtokens, which deletes everything in
+        # one statement, this keeps each transaction (and its locks) short.
+        now = timezone.now()
+        deleted = blacklisted = 0
+        while True:
+            ids = list(OutstandingToken.objects.filter(expires_at__lte=now)
+                       .order_by('pk').values_list('pk', flat=True)[:options['batch_size']])
+            if not ids:
+                break
+            with transaction.atomic():
+                blacklisted += BlacklistedToken.objects.filter(token_id__in=ids).delete()[0]
+                deleted += OutstandingToken.objects.filter(pk__in=ids).delete()[0]
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Deleted {deleted} expired outstanding tokens, {blacklisted} of them blacklisted"
+        ))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from authUser import otp
+
+
+class Command(BaseCommand):
+    help = "Delete expired one-time codes; run it periodically (e.g. hourly from cron)"
+
+    def handle(self, *args, **options):
+        deleted = otp.purge()
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} expired one-time codes"))
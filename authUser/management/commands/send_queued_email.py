@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from authUser import outbox
+
+
+class Command(BaseCommand):
+    help = "Deliver queued OutboundEmail rows in batches, retrying failures with backoff"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100,
+                            help="Messages sent per connection (default 100)")
+        parser.add_argument('--interval', type=float, default=5.0,
+                            help="Seconds to sleep when the queue is empty (default 5)")
+        parser.add_argument('--once', action='store_true',
+                            help="Drain what is due now and exit instead of polling")
+
+    def handle(self, *args, **options):
+        total_sent = total_failed = 0
+        while True:
+            sent, failed = outbox.deliver(options['batch_size'])
+            total_sent, total_failed = total_sent + sent, total_failed + failed
+            if sent or failed:
+                self.stdout.write(f"Sent {sent}, failed {failed}")
+            if sent:
+                continue
+            if options['once']:
+                break
+            # Nothing due, or nothing could be sent (e.g. the mail server is
+            # down): wait rather than spend an attempt on every queued message.
+            time.sleep(options['interval'])
+
+        self.stdout.write(self.style.SUCCESS(f"Sent {total_sent} emails, {total_failed} failed attempts"))
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-18 11:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authUser', '0003_profile_rating'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='latitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='longitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-18 12:25
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authUser', '0006_one_time_codes'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='customuser',
+            name='refresh_token',
+        ),
+    ]
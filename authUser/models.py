@@ -1,13 +1,12 @@
 from django.db import models
 from django.contrib.auth.models import AbstractUser
+from django.utils import timezone
 
 class CustomUser(AbstractUser):
     username=models.CharField(null=True, blank=True, max_length=30)
     email= models.EmailField(unique=True)
     firstName=models.CharField(max_length=100, null=True, blank=True)
     lastName=models.CharField(max_length=100, null=True, blank=True)
-    otp=models.CharField(max_length=100)
-    refresh_token=models.CharField(unique=True, null=True, max_length=100)
     
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = []
@@ -33,23 +32,61 @@ class CustomUser(AbstractUser):
 class Profile(models.Model):
     user = models.OneToOneField(CustomUser, on_delete=models.CASCADE)
     image = models.ImageField(upload_to="user_image", null=True, blank=True)
+    # Resized copies of `image`, filled in by authUser/images.py
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     firstName=models.CharField(max_length=100, null=True, blank=True)
     lastName=models.CharField(max_length=100, null=True, blank=True)
     location=models.CharField(max_length=100, blank=True, null=True)
+    latitude=models.FloatField(null=True, blank=True)
+    longitude=models.FloatField(null=True, blank=True)
     bio = models.TextField(max_length=400, null=True, blank=True)
+    # Running mean of the ratings in JobListingPage.Review, kept up to date
+    # by adjust_profile_rating; `manage.py recompute_ratings` rebuilds it.
     rating= models.FloatField(default=0.0)
+    rating_count=models.PositiveIntegerField(default=0)
     date=models.DateTimeField(auto_now_add=True)
+
+    RATING_FIELDS = ('rating', 'rating_count')
+    # Written only by authUser/images.py, with explicit update_fields
+    IMAGE_FIELDS = ('image_variants',)
     
     
-    # class Meta:
-    #     verbose_name = ["Profile"]
-    #     verbose_name_plural = ["Profiles"]
+    class Meta:
+        indexes = [
+            # Sorting and filtering profiles by rating
+            models.Index(fields=['rating', 'id'], name='profile_rating_id_idx'),
+        ]
     
     def __str__(self):
         if self.lastName:
             return self.lastName
         else:
             return self.user.username
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        return super().from_db(db, field_names, values)._remember_loaded()
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self._remember_loaded()
+
+    def _remember_loaded(self):
+        fields = self.__dict__
+        # The place it was loaded with: a changed location is geocoded again
+        # on save (JobListingPage.geo.locate).
+        if {'location', 'latitude', 'longitude'} <= fields.keys():
+            self._loaded_geo = (fields['location'], fields['latitude'], fields['longitude'])
+        # And the image: one that did not change is not written back, as
+        # images.process may have replaced the file since it was loaded.
+        if 'image' in fields:
+            self._loaded_image = str(fields['image'] or '')
+        return self
+
+    def _image_changed(self):
+        if 'image' not in self.__dict__:
+            return False  # deferred and never set
+        return (self.image.name or '') != getattr(self, '_loaded_image', None)
         
         
         
@@ -58,8 +95,73 @@ class Profile(models.Model):
         if self.lastName == "" or self.lastName==None:
             self.lastName = self.user.username
             
-        
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            # Never write back a rating or image this instance may have read long ago.
+            skip = {*self.RATING_FIELDS, *self.IMAGE_FIELDS}
+            if not self._image_changed():
+                skip.add('image')
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in skip
+            ]
             
         super(Profile, self).save(*args, **kwargs)
+        self._loaded_image = self.image.name or ''
+    
     
-    
\ No newline at end of file
+
+# Outgoing mail waits here until `manage.py send_queued_email` delivers it,
+# so requests never block on the mail provider. See authUser/outbox.py.
+class OutboundEmail(models.Model):
+    PENDING = 'pending'
+    SENT = 'sent'
+    FAILED = 'failed'
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    html_body = models.TextField(blank=True)
+    from_email = models.CharField(max_length=255, blank=True)
+    to = models.JSONField()
+    status = models.CharField(max_length=10, choices=[
+        (PENDING, 'Pending'),
+        (SENT, 'Sent'),
+        (FAILED, 'Failed'),
+    ], default=PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # The worker polls pending mail by due time
+            models.Index(fields=['next_attempt_at'], condition=models.Q(status='pending'), name='outbox_due_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.subject} -> {", ".join(self.to)}'
+
+
+# Short-lived codes, e.g. for password resets. Only a keyed hash of the code
+# is stored; see authUser/otp.py. Expired rows are removed by `manage.py
+# purge_otps`, which keeps the table (and its index) small.
+class OneTimeCode(models.Model):
+    PASSWORD_RESET = 'password_reset'
+
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='one_time_codes')
+    purpose = models.CharField(max_length=32, default=PASSWORD_RESET)
+    code_hash = models.CharField(max_length=64)
+    expires_at = models.DateTimeField()
+    attempts = models.PositiveSmallIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'expires_at'], name='otp_user_expires_idx'),
+            # The purge command deletes by expiry alone
+            models.Index(fields=['expires_at'], name='otp_expires_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.purpose} code for {self.user_id}'
@@ -0,0 +1,83 @@
+import hashlib
+import hmac
+import secrets
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Count, F, Max, Q
+from django.utils import timezone
+
+from .models import OneTimeCode
+
+# One-time codes: six digits from `secrets`, stored as an HMAC keyed on
+# SECRET_KEY so a leaked table does not leak live codes. Guessing is bounded
+# by MAX_ATTEMPTS per code and by its TTL, and re-issuing does not reset
+# it: a new code inherits the wrong guesses made against the one it
+# replaces, none is issued while the live code is locked, and at most
+# ISSUE_LIMIT are issued per user per ISSUE_WINDOW. Replaced codes are
+# expired rather than deleted so the window can be counted from the table.
+DIGITS = 6
+TTL = timedelta(minutes=getattr(settings, 'OTP_TTL_MINUTES', 15))
+MAX_ATTEMPTS = getattr(settings, 'OTP_MAX_ATTEMPTS', 5)
+ISSUE_LIMIT = getattr(settings, 'OTP_ISSUE_LIMIT', 5)
+ISSUE_WINDOW = timedelta(minutes=getattr(settings, 'OTP_ISSUE_WINDOW_MINUTES', 60))
+
+
+class TooManyCodes(Exception):
+    """No new code may be issued to this user yet."""
+
+
+def _hash(user_id, purpose, code):
+    message = f'{user_id}:{purpose}:{code}'.encode('utf-8')
+    return hmac.new(settings.SECRET_KEY.encode('utf-8'), message, hashlib.sha256).hexdigest()
+
+
+def issue(user, purpose=OneTimeCode.PASSWORD_RESET):
+    """
+    Replace any outstanding ``purpose`` code for ``user`` and return the
+    new code in clear. Raises TooManyCodes when the live code is locked or
+    ISSUE_LIMIT codes were issued within ISSUE_WINDOW.
+    """
+    now = timezone.now()
+    recent = OneTimeCode.objects.filter(user=user, purpose=purpose, created_at__gt=now - ISSUE_WINDOW).aggregate(
+        issued=Count('id'), attempts=Max('attempts', filter=Q(expires_at__gt=now)),
+    )
+    attempts = recent['attempts'] or 0
+    if attempts >= MAX_ATTEMPTS or recent['issued'] >= ISSUE_LIMIT:
+        raise TooManyCodes(user.pk)
+
+    code = str(secrets.randbelow(10 ** DIGITS)).zfill(DIGITS)
+    OneTimeCode.objects.filter(user=user, purpose=purpose, expires_at__gt=now).update(expires_at=now)
+    OneTimeCode.objects.create(
+        user=user, purpose=purpose, code_hash=_hash(user.pk, purpose, code), expires_at=now + TTL, attempts=attempts,
+    )
+    return code
+
+
+def verify(user_id, code, purpose=OneTimeCode.PASSWORD_RESET):
+    """
+    True, and the code is used up, if ``code`` is the live ``purpose`` code
+    for ``user_id``. One indexed lookup on (user, expires_at); the hashes
+    are compared in constant time.
+
+    Every guess is counted before it is compared, by a conditional UPDATE
+    that the database applies to the row one request at a time, so
+    concurrent guesses cannot share an attempt and at most MAX_ATTEMPTS
+    are ever compared.
+    """
+    candidate = (OneTimeCode.objects
+                 .filter(user_id=user_id, expires_at__gt=timezone.now(), purpose=purpose)
+                 .order_by('-expires_at').first())
+    if candidate is None:
+        return False
+    counted = OneTimeCode.objects.filter(pk=candidate.pk, attempts__lt=MAX_ATTEMPTS).update(attempts=F('attempts') + 1)
+    if not counted or not hmac.compare_digest(candidate.code_hash, _hash(user_id, purpose, str(code))):
+        return False
+    # Delete rather than mark used, so a code can only ever be redeemed once.
+    return OneTimeCode.objects.filter(pk=candidate.pk).delete()[0] > 0
+
+
+def purge(now=None):
+    """Delete expired codes that no longer count towards ISSUE_LIMIT; returns how many."""
+    now = now or timezone.now()
+    return OneTimeCode.objects.filter(expires_at__lte=now, created_at__lte=now - ISSUE_WINDOW).delete()[0]
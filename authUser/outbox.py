@@ -0,0 +1,90 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import OutboundEmail
+
+# Mail is queued in OutboundEmail and delivered by `manage.py
+# send_queued_email`. A worker leases a batch by pushing its next_attempt_at
+# past LEASE, then sends outside any transaction over one connection, so a
+# crashed worker's batch is simply retried once the lease runs out.
+MAX_ATTEMPTS = getattr(settings, 'OUTBOX_MAX_ATTEMPTS', 6)
+BACKOFF = timedelta(seconds=getattr(settings, 'OUTBOX_BACKOFF_SECONDS', 30))
+MAX_BACKOFF = timedelta(hours=1)
+LEASE = timedelta(minutes=5)
+
+
+def enqueue(subject, body, to, html_body='', from_email=None):
+    """Queue one message for the worker and return its OutboundEmail row."""
+    return OutboundEmail.objects.create(
+        subject=subject, body=body, html_body=html_body, to=list(to),
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+    )
+
+
+def backoff(attempts):
+    """Delay before retrying a message that has failed ``attempts`` times."""
+    return min(BACKOFF * 2 ** min(attempts - 1, 16), MAX_BACKOFF)
+
+
+def claim(batch_size):
+    """Lease up to ``batch_size`` due messages to this worker."""
+    now = timezone.now()
+    with transaction.atomic():
+        due = (OutboundEmail.objects.select_for_update(skip_locked=True)
+               .filter(status=OutboundEmail.PENDING, next_attempt_at__lte=now)
+               .order_by('next_attempt_at', 'id')[:batch_size])
+        batch = list(due)
+        OutboundEmail.objects.filter(pk__in=[email.pk for email in batch]).update(
+            attempts=F('attempts') + 1, next_attempt_at=now + LEASE
+        )
+    for email in batch:
+        email.attempts += 1
+    return batch
+
+
+def deliver(batch_size=100, connection=None):
+    """
+    Send one batch of due mail over a single connection. Failed messages
+    are retried with exponential backoff and given up after MAX_ATTEMPTS;
+    if the connection cannot be opened, the whole batch has failed.
+    Returns (sent, failed) counts.
+    """
+    batch = claim(batch_size)
+    if not batch:
+        return 0, 0
+
+    connection = connection or get_connection()
+    sent, failed = [], []
+    try:
+        connection.open()
+    except Exception as exc:  # the mail server is down; every claimed row records it
+        failed = [(email, f'{type(exc).__name__}: {exc}') for email in batch]
+    else:
+        try:
+            for email in batch:
+                message = EmailMultiAlternatives(email.subject, email.body, email.from_email, email.to, connection=connection)
+                if email.html_body:
+                    message.attach_alternative(email.html_body, 'text/html')
+                try:
+                    connection.send_messages([message])
+                except Exception as exc:  # whatever the backend raises, the row records it
+                    failed.append((email, f'{type(exc).__name__}: {exc}'))
+                else:
+                    sent.append(email.pk)
+        finally:
+            connection.close()
+
+    now = timezone.now()
+    OutboundEmail.objects.filter(pk__in=sent).update(status=OutboundEmail.SENT, sent_at=now, last_error='')
+    for email, error in failed:
+        if email.attempts >= MAX_ATTEMPTS:
+            changes = {'status': OutboundEmail.FAILED}
+        else:
+            changes = {'next_attempt_at': now + backoff(email.attempts)}
+        OutboundEmail.objects.filter(pk=email.pk).update(last_error=error, **changes)
+    return len(sent), len(failed)
@@ -1,7 +1,10 @@
 from django.contrib.auth.password_validation import validate_password
 from rest_framework import serializers
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
 
 from authUser.models import CustomUser, Profile
+from authUser.tokens import RotatingRefreshToken
 
 
 class CustomUserSerializer(serializers.ModelSerializer):
@@ -40,6 +43,29 @@ class RegistrationSerializer(serializers.ModelSerializer):
         validated_data.pop('password2')  # Remove password2 from validated_data
         user = CustomUser.objects.create_user(**validated_data)
         return user
+
+
+class RotatingTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Swap a refresh token for a new access and refresh pair, blacklisting the
+    old one. Blacklisting is the real check: of several requests racing
+    with the same token, only the one that creates its BlacklistedToken row
+    (a unique key) gets new tokens.
+    """
+    token_class = RotatingRefreshToken
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs["refresh"])
+        _, created = refresh.blacklist()
+        if not created:
+            raise TokenError("Token is blacklisted")
+
+        data = {"access": str(refresh.access_token)}
+        refresh.set_jti()
+        refresh.set_exp()
+        refresh.set_iat()
+        data["refresh"] = str(refresh)
+        return data
             
             
             
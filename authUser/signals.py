@@ -5,8 +5,15 @@ from django.db.models.signals import post_save
 from django.dispatch import receiver
 
 from .models import Profile
+from . import images
 
 @receiver(post_save, sender=CustomUser)
 def create_profile(sender, instance, created, **kwargs):
     if created:
-        Profile.objects.create(user=instance)
\ No newline at end of file
+        Profile.objects.create(user=instance)
+
+
+@receiver(post_save, sender=Profile)
+def process_profile_image(sender, instance, **kwargs):
+    if images.needs_processing(instance):
+        images.schedule(instance.pk)
@@ -1,3 +1,424 @@
-from django.test import TestCase
+import shutil
+import tempfile
+from datetime import timedelta
+from io import BytesIO, StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.core import mail
+from django.core.exceptions import ValidationError
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from PIL import Image
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+from authUser.views import MyTokenObtainPairSerializer
+from main.testing import EndpointBudgetMixin, make_job, make_profile
+
+from . import images, otp, outbox
+from .authentication import ClaimsUser
+from .tokens import RotatingRefreshToken, revoked_jtis
+from .models import CustomUser, OneTimeCode, OutboundEmail
+
+
+class PasswordResetEmailTests(TestCase):
+    def setUp(self):
+        CustomUser.objects.create_user(username="ada", email="ada@example.com", password="pass12345")
+
+    def test_reset_queues_instead_of_sending(self):
+        response = self.client.get("/userApi/v1/user/passwordReset/ada@example.com/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(mail.outbox, [])
+
+        email = OutboundEmail.objects.get()
+        self.assertEqual(email.to, ["ada@example.com"])
+        self.assertIn("create-new-password", email.body)
+        self.assertIn("<a href=", email.html_body)
+
+        call_command("send_queued_email", "--once", stdout=StringIO())
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].alternatives[0][1], "text/html")
+        email.refresh_from_db()
+        self.assertEqual(email.status, OutboundEmail.SENT)
+
+
+class OutboxTests(TestCase):
+    def test_batch_reuses_one_connection(self):
+        for i in range(3):
+            outbox.enqueue(f"Hello {i}", "Body", [f"user{i}@example.com"])
+        with mock.patch.object(EmailBackend, "open") as opened:
+            self.assertEqual(outbox.deliver(batch_size=10), (3, 0))
+        opened.assert_called_once()
+        self.assertEqual([message.subject for message in mail.outbox], ["Hello 0", "Hello 1", "Hello 2"])
+
+    def test_failures_back_off_then_give_up(self):
+        email = outbox.enqueue("Hello", "Body", ["user@example.com"])
+        with mock.patch.object(EmailBackend, "send_messages", side_effect=OSError("connection refused")):
+            self.assertEqual(outbox.deliver(), (0, 1))
+            email.refresh_from_db()
+            self.assertEqual((email.status, email.attempts), (OutboundEmail.PENDING, 1))
+            self.assertIn("connection refused", email.last_error)
+            self.assertGreater(email.next_attempt_at, timezone.now() + outbox.backoff(1) - timedelta(seconds=5))
+            # Not due again until the backoff has passed
+            self.assertEqual(outbox.deliver(), (0, 0))
+
+            for attempt in range(2, outbox.MAX_ATTEMPTS + 1):
+                OutboundEmail.objects.update(next_attempt_at=timezone.now())
+                outbox.deliver()
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts), (OutboundEmail.FAILED, outbox.MAX_ATTEMPTS))
+
+    def test_unreachable_server_fails_the_batch_and_keeps_the_worker_running(self):
+        emails = [outbox.enqueue(f"Hello {i}", "Body", [f"user{i}@example.com"]) for i in range(2)]
+        with mock.patch.object(EmailBackend, "open", side_effect=ConnectionRefusedError("smtp down")):
+            out = StringIO()
+            call_command("send_queued_email", "--once", stdout=out)
+        self.assertIn("Sent 0, failed 2", out.getvalue())
+        for email in emails:
+            email.refresh_from_db()
+            self.assertEqual((email.status, email.attempts), (OutboundEmail.PENDING, 1))
+            self.assertIn("smtp down", email.last_error)
+            self.assertGreater(email.next_attempt_at, timezone.now() + outbox.backoff(1) - timedelta(seconds=5))
+
+    def test_backoff_doubles_up_to_a_cap(self):
+        self.assertEqual(outbox.backoff(2), 2 * outbox.backoff(1))
+        self.assertEqual(outbox.backoff(50), outbox.MAX_BACKOFF)
+
+    def test_claimed_mail_is_leased(self):
+        outbox.enqueue("Hello", "Body", ["user@example.com"])
+        self.assertEqual(len(outbox.claim(10)), 1)
+        self.assertEqual(outbox.claim(10), [])
+
+
+class OneTimeCodeTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username="ada", email="ada@example.com", password="pass12345")
+
+    def test_codes_are_short_hashed_and_single_use(self):
+        code = otp.issue(self.user)
+        self.assertRegex(code, r"^\d{6}$")
+        self.assertNotIn(code, OneTimeCode.objects.get().code_hash)
+        with self.assertNumQueries(3):  # the lookup, counting the attempt, then consuming the code
+            self.assertTrue(otp.verify(self.user.pk, code))
+        self.assertFalse(otp.verify(self.user.pk, code))
+
+    def test_new_code_replaces_the_old_one(self):
+        old = otp.issue(self.user)
+        new = otp.issue(self.user)
+        self.assertEqual(OneTimeCode.objects.filter(expires_at__gt=timezone.now()).count(), 1)
+        if old != new:
+            self.assertFalse(otp.verify(self.user.pk, old))
+        self.assertTrue(otp.verify(self.user.pk, new))
+
+    def test_wrong_guesses_lock_the_code(self):
+        code = otp.issue(self.user)
+        wrong = str((int(code) + 1) % 10 ** otp.DIGITS).zfill(otp.DIGITS)
+        for _ in range(otp.MAX_ATTEMPTS):
+            self.assertFalse(otp.verify(self.user.pk, wrong))
+        self.assertFalse(otp.verify(self.user.pk, code))
+        self.assertEqual(OneTimeCode.objects.get().attempts, otp.MAX_ATTEMPTS)
+
+    def test_guesses_are_counted_before_they_are_compared(self):
+        code = otp.issue(self.user)
+        # A guess that read the code just before other guesses used up its attempts
+        stale = OneTimeCode.objects.get()
+        OneTimeCode.objects.update(attempts=otp.MAX_ATTEMPTS)
+        with mock.patch("django.db.models.query.QuerySet.first", return_value=stale):
+            self.assertFalse(otp.verify(self.user.pk, code))
+        self.assertTrue(OneTimeCode.objects.exists())
+
+    def test_reissuing_keeps_wrong_guesses(self):
+        code = otp.issue(self.user)
+        wrong = str((int(code) + 1) % 10 ** otp.DIGITS).zfill(otp.DIGITS)
+        for _ in range(otp.MAX_ATTEMPTS - 1):
+            self.assertFalse(otp.verify(self.user.pk, wrong))
+        code = otp.issue(self.user)
+        wrong = str((int(code) + 1) % 10 ** otp.DIGITS).zfill(otp.DIGITS)
+        self.assertFalse(otp.verify(self.user.pk, wrong))
+        # Locked now, and no new code until it expires
+        self.assertFalse(otp.verify(self.user.pk, code))
+        with self.assertRaises(otp.TooManyCodes):
+            otp.issue(self.user)
+
+    def test_issuing_is_limited_per_user(self):
+        for _ in range(otp.ISSUE_LIMIT):
+            otp.issue(self.user)
+        with self.assertRaises(otp.TooManyCodes):
+            otp.issue(self.user)
+        OneTimeCode.objects.update(created_at=timezone.now() - otp.ISSUE_WINDOW)
+        otp.issue(self.user)
+
+    def test_expired_codes_fail_and_are_purged(self):
+        code = otp.issue(self.user)
+        OneTimeCode.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertFalse(otp.verify(self.user.pk, code))
+        # Kept while they still count towards the issue limit
+        call_command("purge_otps", stdout=StringIO())
+        self.assertTrue(OneTimeCode.objects.exists())
+        OneTimeCode.objects.update(created_at=timezone.now() - otp.ISSUE_WINDOW)
+        out = StringIO()
+        call_command("purge_otps", stdout=out)
+        self.assertIn("Deleted 1 expired", out.getvalue())
+        self.assertFalse(OneTimeCode.objects.exists())
+
+    def test_password_change_flow(self):
+        response = self.client.get("/userApi/v1/user/passwordReset/ada@example.com/")
+        # Nothing about the user: no code, hash or flags
+        self.assertEqual(response.json(), {"message": "Password reset email sent"})
+        code = OutboundEmail.objects.get().body.split("otp=")[1][:otp.DIGITS]
+
+        url = "/userApi/v1/user/passwordChange/"
+        payload = {"uuidb64": self.user.pk, "password": "n3w-Passw0rd"}
+        self.assertEqual(self.client.post(url, {**payload, "otp": "x"}).status_code, 404)
+        self.assertEqual(self.client.post(url, {**payload, "otp": code}).status_code, 201)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.check_password("n3w-Passw0rd"))
+        self.assertEqual(self.client.post(url, {**payload, "otp": code}).status_code, 404)
+        self.assertEqual(self.client.post(url, {"password": "x"}).status_code, 400)
+
+    def test_reset_requests_are_throttled(self):
+        OneTimeCode.objects.create(user=self.user, code_hash="x", expires_at=timezone.now() + otp.TTL,
+                                   attempts=otp.MAX_ATTEMPTS)
+        response = self.client.get("/userApi/v1/user/passwordReset/ada@example.com/")
+        self.assertEqual(response.status_code, 429)
+        self.assertFalse(OutboundEmail.objects.exists())
+
+
+class ClaimsAuthenticationTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(
+            username="ada", email="ada@example.com", password="pass12345", firstName="Ada", lastName="Obi",
+        )
+        self.client = APIClient()
+        token = MyTokenObtainPairSerializer.get_token(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    def test_claims_need_no_query(self):
+        user = ClaimsUser(self.user.pk, {"username": "ada", "email": "ada@example.com", "firstName": "Ada"})
+        with self.assertNumQueries(0):
+            self.assertTrue(user and user.is_authenticated)
+            self.assertEqual((user.pk, user.username, user.firstName), (self.user.pk, "ada", "Ada"))
+
+    def test_string_id_claims_become_the_pk_type(self):
+        from JobListingPage.models import JobApplication, Review
+
+        user = ClaimsUser(str(self.user.pk), {})
+        self.assertEqual((user.id, user.pk), (self.user.pk, self.user.pk))
+        with self.assertRaises(ValidationError):
+            ClaimsUser("ada", {})
+
+        worker = make_profile("bo@example.com")
+        application = JobApplication.objects.create(
+            job=make_job(self.user.profile), applicant=worker, status=JobApplication.ACCEPTED,
+        )
+        review = Review.objects.create(application=application, reviewer=self.user.profile, reviewee=worker, rating=4)
+        token = MyTokenObtainPairSerializer.get_token(self.user).access_token
+        token["user_id"] = str(self.user.pk)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        response = self.client.patch(f"/jobListing/v1/review/{review.pk}/", {"rating": 5}, format="json")
+        self.assertEqual(response.status_code, 200, response.content)
+
+    def test_other_attributes_load_the_user_once(self):
+        user = ClaimsUser(self.user.pk, {})
+        with self.assertNumQueries(1):
+            self.assertFalse(user.is_staff)
+            self.assertIsInstance(user, CustomUser)
+            self.assertTrue(user.check_password("pass12345"))
+
+    def test_inactive_user_fails_on_load(self):
+        CustomUser.objects.filter(pk=self.user.pk).update(is_active=False)
+        user = ClaimsUser(self.user.pk, {})
+        with self.assertRaises(Exception) as raised:
+            user.is_staff
+        self.assertEqual(raised.exception.default_code, "authentication_failed")
+
+    def test_listing_skips_the_user_query(self):
+        from JobListingPage.views import JobViewSet
+
+        with self.assertNumQueries(1):  # just the page of jobs
+            response = self.client.get("/jobListing/v1/job/?page_size=5&open=true")
+        self.assertEqual(response.status_code, 200)
+        with mock.patch.object(JobViewSet, "authentication_classes", [JWTAuthentication]), self.assertNumQueries(2):
+            self.client.get("/jobListing/v1/job/?page_size=5&open=false")
+
+    def test_writes_resolve_the_real_user(self):
+        job = make_job(self.user.profile)
+        self.assertEqual(self.client.post("/jobListing/v1/savedJob/me/", {"job": job.id}, format="json").status_code, 201)
+        CustomUser.objects.filter(pk=self.user.pk).update(is_active=False)
+        # Reads still trust the token; writes load the user and find it inactive.
+        self.assertEqual(self.client.get("/jobListing/v1/job/").status_code, 200)
+        for response in (
+            self.client.post("/jobListing/v1/savedJob/me/", {"job": job.id}, format="json"),
+            self.client.post("/jobListing/v1/jobApplication/bulk-reject/", {"ids": [1]}, format="json"),
+        ):
+            self.assertEqual(response.status_code, 401)
+
+    def test_bad_token_is_rejected(self):
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer not-a-token")
+        self.assertEqual(self.client.get("/jobListing/v1/job/").status_code, 401)
+
+
+class RefreshRotationTests(TestCase):
+    url = "/userApi/v1/user/token/refresh/"
+
+    def setUp(self):
+        revoked_jtis.clear()
+        self.user = CustomUser.objects.create_user(username="ada", email="ada@example.com", password="pass12345")
+        self.refresh = str(MyTokenObtainPairSerializer.get_token(self.user))
+
+    def test_refresh_rotates_and_old_token_is_revoked(self):
+        response = self.client.post(self.url, {"refresh": self.refresh})
+        self.assertEqual(response.status_code, 200)
+        rotated = response.json()["refresh"]
+        self.assertNotEqual(rotated, self.refresh)
+        self.assertEqual(self.client.post(self.url, {"refresh": self.refresh}).status_code, 401)
+        self.assertEqual(self.client.post(self.url, {"refresh": rotated}).status_code, 200)
+
+    def test_known_revoked_tokens_skip_the_database(self):
+        RotatingRefreshToken(self.refresh).blacklist()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.post(self.url, {"refresh": self.refresh}).status_code, 401)
+        revoked_jtis.clear()
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.post(self.url, {"refresh": self.refresh}).status_code, 401)
+
+    def test_lost_race_is_rejected(self):
+        # Another request blacklisted the token after this one's check passed.
+        token = RotatingRefreshToken(self.refresh)
+        token.blacklist()
+        with mock.patch.object(RotatingRefreshToken, "check_blacklist"):
+            self.assertEqual(self.client.post(self.url, {"refresh": self.refresh}).status_code, 401)
+
+    def test_lru_evicts_oldest(self):
+        from .tokens import RevokedJTICache
+
+        cache = RevokedJTICache(2)
+        for jti in ("a", "b", "c"):
+            cache.add(jti)
+        self.assertNotIn("a", cache)
+        self.assertIn("c", cache)
+
+    def test_prune_deletes_only_expired_tokens(self):
+        RotatingRefreshToken(self.refresh).blacklist()
+        str(MyTokenObtainPairSerializer.get_token(self.user))
+        OutstandingToken.objects.filter(jti=RotatingRefreshToken(self.refresh, verify=False)["jti"]).update(
+            expires_at=timezone.now() - timedelta(seconds=1)
+        )
+        out = StringIO()
+        call_command("prune_tokens", "--batch-size", "1", stdout=out)
+        self.assertIn("Deleted 1 expired outstanding tokens, 1 of them blacklisted", out.getvalue())
+        self.assertEqual(OutstandingToken.objects.count(), 1)
+        self.assertFalse(BlacklistedToken.objects.exists())
+
+    def test_password_reset_hands_out_no_tokens(self):
+        response = self.client.get("/userApi/v1/user/passwordReset/ada@example.com/")
+        self.assertNotIn("refresh_token", response.json())
+        self.assertEqual(OutstandingToken.objects.count(), 1)  # only the one from setUp
+
+
+def make_jpeg(size=(2400, 1200), orientation=None):
+    image = Image.new("RGB", size, (200, 40, 40))
+    exif = Image.Exif()
+    exif[0x010F] = "TestCam"  # Make
+    if orientation:
+        exif[0x0112] = orientation
+    buffer = BytesIO()
+    image.save(buffer, "JPEG", exif=exif)
+    return ContentFile(buffer.getvalue(), name="upload.jpg")
+
+
+class ProfileImageTests(TestCase):
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media)
+        override = override_settings(MEDIA_ROOT=media)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.profile = CustomUser.objects.create_user(username="ada", email="ada@example.com", password="pass12345").profile
+
+    def upload(self, content):
+        # Run the worker pool job inline, once the upload commits.
+        with mock.patch.object(images._pool, "submit", side_effect=lambda run, pk: images.process(pk)), \
+                self.captureOnCommitCallbacks(execute=True):
+            self.profile.image.save("upload.jpg", content)
+        self.profile.refresh_from_db()
+
+    def test_upload_is_stripped_downscaled_and_varied(self):
+        self.upload(make_jpeg(orientation=6))  # rotated 90 degrees
+        with default_storage.open(self.profile.image.name) as cleaned, Image.open(cleaned) as image:
+            self.assertEqual(image.size, (800, 1600))
+            self.assertEqual(len(image.getexif()), 0)
+        self.assertFalse(default_storage.exists("user_image/upload.jpg"))
+
+        variants = images.urls(self.profile)
+        self.assertEqual(set(variants), set(images.VARIANTS))
+        with default_storage.open(self.profile.image_variants["thumb"]["webp"]) as thumb, Image.open(thumb) as image:
+            self.assertEqual((image.format, image.size), ("WEBP", (64, 64)))
+        self.assertTrue(variants["small"]["jpeg"].startswith("/media/user_image/variants/"))
+
+    def test_variant_names_follow_content(self):
+        self.upload(make_jpeg())
+        first = self.profile.image_variants
+        self.upload(make_jpeg())
+        self.assertEqual(self.profile.image_variants, first)
+
+    def test_serializers_expose_variant_urls(self):
+        from JobListingPage.serializers import ProfileSummarySerializer, UserProfileSerializer
+
+        self.assertIsNone(ProfileSummarySerializer(self.profile).data["avatar"])
+        self.upload(make_jpeg())
+        self.assertEqual(set(ProfileSummarySerializer(self.profile).data["avatar"]), {"thumb", "small"})
+        self.assertIn("medium", UserProfileSerializer(self.profile).data["image_variants"])
+
+    def test_stale_profiles_do_not_undo_processing(self):
+        stale = type(self.profile).objects.get(pk=self.profile.pk)
+        self.upload(make_jpeg())
+        processed = (self.profile.image.name, self.profile.image_variants)
+        # Loaded before the upload and saved after processing deleted it
+        stale.bio = "Forklift certified"
+        stale.save()
+        self.profile.refresh_from_db()
+        self.assertEqual((self.profile.image.name, self.profile.image_variants), processed)
+        self.assertEqual(self.profile.bio, "Forklift certified")
+        self.assertIsNotNone(images.urls(self.profile))
+
+    def test_backfill_command(self):
+        self.profile.image.save("upload.jpg", make_jpeg(), save=False)
+        type(self.profile).objects.filter(pk=self.profile.pk).update(image=self.profile.image.name)
+        out = StringIO()
+        call_command("process_profile_images", stdout=out)
+        self.assertIn("Processed 1", out.getvalue())
+        self.profile.refresh_from_db()
+        self.assertIsNotNone(images.urls(self.profile))
+
+
+class AuthEndpointBudgetTests(EndpointBudgetMixin, TestCase):
+    owned_routes = r"userApi/"
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(username="ada", email="ada@example.com", password="pass12345")
+        for i in range(50):
+            CustomUser.objects.create_user(username=f"user{i}", email=f"user{i}@example.com")
+
+    def cases(self):
+        refresh = str(MyTokenObtainPairSerializer.get_token(self.user))
+        code = otp.issue(self.user)
+        # Password hashing dominates the register, token and change budgets.
+        return [
+            self.case("POST", "/userApi/v1/user/register/", 201, 5, ms=1000, data={
+                "username": "grace", "firstName": "Grace", "lastName": "Hopper", "email": "grace@example.com",
+                "password": "n3w-Passw0rd", "password2": "n3w-Passw0rd",
+            }),
+            self.case("POST", "/userApi/v1/user/token/", 200, 2, ms=1000, data={"email": "ada@example.com", "password": "pass12345"}),
+            self.case("POST", "/userApi/v1/user/token/refresh/", 200, 6, data={"refresh": refresh}),
+            self.case("POST", "/userApi/v1/user/passwordChange/", 201, 5, ms=1000, data={
+                "otp": code, "uuidb64": self.user.pk, "password": "n3w-Passw0rd",
+            }),
+            self.case("GET", "/userApi/v1/user/passwordReset/ada@example.com/", 200, 5),
+        ]
@@ -0,0 +1,64 @@
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+from rest_framework_simplejwt.tokens import RefreshToken
+
+
+class RevokedJTICache:
+    """
+    In-process LRU of JTIs known to be blacklisted. It only ever answers
+    "revoked": a blacklisted token stays blacklisted until it expires, so
+    that answer cannot go stale, whereas "not revoked" could be outdated by
+    another process and always goes to the database.
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._jtis = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __contains__(self, jti):
+        with self._lock:
+            if jti in self._jtis:
+                self._jtis.move_to_end(jti)
+                return True
+        return False
+
+    def add(self, jti):
+        if not self.maxsize:
+            return
+        with self._lock:
+            self._jtis[jti] = None
+            self._jtis.move_to_end(jti)
+            while len(self._jtis) > self.maxsize:
+                self._jtis.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._jtis.clear()
+
+
+revoked_jtis = RevokedJTICache(getattr(settings, 'REVOKED_JTI_CACHE_SIZE', 10000))
+
+
+class RotatingRefreshToken(RefreshToken):
+    """
+    A refresh token whose blacklist check is one lookup on the unique jti
+    index, skipped entirely for JTIs this process already knows are revoked.
+    """
+
+    def check_blacklist(self):
+        jti = self.payload[api_settings.JTI_CLAIM]
+        if jti in revoked_jtis or BlacklistedToken.objects.filter(token__jti=jti).exists():
+            revoked_jtis.add(jti)
+            raise TokenError(_("Token is blacklisted"))
+
+    def blacklist(self):
+        blacklisted, created = super().blacklist()
+        revoked_jtis.add(self.payload[api_settings.JTI_CLAIM])
+        return blacklisted, created
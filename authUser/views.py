@@ -1,25 +1,21 @@
 from django.shortcuts import render
-from django.core.mail import send_mail
-from django.core.mail import EmailMultiAlternatives
 from django.template.loader import render_to_string
+from . import otp, outbox
 from . models import CustomUser, Profile
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from rest_framework_simplejwt.views import TokenObtainPairView
 from rest_framework import generics, status
 from rest_framework.permissions import AllowAny
 from authUser.serializers import RegistrationSerializer, CustomUserSerializer
+from authUser.tokens import RotatingRefreshToken
 from rest_framework.response import Response
-from rest_framework.exceptions import NotFound
+from rest_framework.exceptions import NotFound, Throttled
+from rest_framework.throttling import ScopedRateThrottle
 from django.contrib.auth import get_user_model
-import random
-from rest_framework_simplejwt.tokens import RefreshToken
-
-def generate_random_otp(length=8):
-    otp = ''.join([str(random.randint(100000,999999)) for _ in range(length)])
-    return otp
+from main.metrics import SerializerTimingMixin
 
 class MyTokenObtainPairSerializer(TokenObtainPairSerializer):
-    
+    token_class = RotatingRefreshToken
     
     @classmethod
     def get_token(cls, user):
@@ -37,7 +33,7 @@ class MyTokenObtainPairView(TokenObtainPairView):
     serializer_class = MyTokenObtainPairSerializer
     
     
-class RegisterView(generics.CreateAPIView):
+class RegisterView(SerializerTimingMixin, generics.CreateAPIView):
     queryset=CustomUser.objects.all()
     permission_classes=[AllowAny]
     serializer_class=RegistrationSerializer
@@ -72,9 +68,16 @@ class RegisterView(generics.CreateAPIView):
         
 #         return user
 
-class PasswordResetVerifyView(generics.RetrieveAPIView):
+class PasswordResetVerifyView(generics.GenericAPIView):
     permission_classes = [AllowAny]
-    serializer_class = CustomUserSerializer
+    # Per client IP; otp.issue also limits the codes each user gets.
+    throttle_classes = [ScopedRateThrottle]
+    throttle_scope = 'password_reset'
+    
+    def get(self, request, *args, **kwargs):
+        # Open to anyone who knows an email, so it says nothing about the user.
+        self.get_object()
+        return Response({"message": "Password reset email sent"})
     
     def get_object(self):
         email = self.kwargs['email']
@@ -84,16 +87,15 @@ class PasswordResetVerifyView(generics.RetrieveAPIView):
         except get_user_model().DoesNotExist:
             raise NotFound("User not found or not initially registered")
         
-        # If user is found, proceed with token generation and OTP
+        # The one-time code is what authorizes the password change; no
+        # tokens are minted here, as this endpoint is open to anyone.
         uuidb64 = user.pk
-        refresh = RefreshToken.for_user(user)
-        refresh_token = str(refresh.access_token)
-        user.refresh_token = refresh_token
-        user.otp = generate_random_otp()
-        user.save()
+        try:
+            code = otp.issue(user)
+        except otp.TooManyCodes:
+            raise Throttled(detail="Too many reset codes requested for this account; try again later.")
         
-        link = f"http://localhost:5173/create-new-password/?otp={user.otp}&uuidb64={uuidb64}&refresh_token={refresh_token}"
-        print("link ===", link)
+        link = f"http://localhost:5173/create-new-password/?otp={code}&uuidb64={uuidb64}"
         
         context = {
             "link":link,
@@ -102,15 +104,8 @@ class PasswordResetVerifyView(generics.RetrieveAPIView):
         subject = "Password Reset Email"
         text_body = render_to_string("email/password_reset.txt", context)
         html_body = render_to_string("email/password_reset.html", context)
-        msg = send_mail(
-            subject,
-            "timson@paeshift.com",
-            [user.email],
-            text_body
-            
-        )
-        #msg.attach_alternative(html_body, "text/html")
-        #msg.send
+        # Queued, not sent: `manage.py send_queued_email` delivers it
+        outbox.enqueue(subject, text_body, [user.email], html_body=html_body)
         
         
         return user
@@ -119,18 +114,22 @@ class PasswordResetVerifyView(generics.RetrieveAPIView):
 class PasswordChangeView(generics.CreateAPIView):
     permission_classes =[AllowAny]
     serializer_class = CustomUserSerializer
+    # Per client IP; otp.verify also limits the guesses at each code.
+    throttle_classes = [ScopedRateThrottle]
+    throttle_scope = 'password_change'
     
     def create(self, request, *args, **kwargs):
         #payload = request.data
         
-        otp=request.data['otp']
-        uuidb64=request.data['uuidb64']
-        password=request.data['password']
+        code=request.data.get('otp')
+        uuidb64=request.data.get('uuidb64')
+        password=request.data.get('password')
+        if not (code and password and str(uuidb64).isdigit()):
+            return Response({"message":"otp, uuidb64 and password are required"}, status=status.HTTP_400_BAD_REQUEST)
         
-        user = CustomUser.objects.get(id=uuidb64, otp=otp)
-        if user:
+        user = CustomUser.objects.filter(id=uuidb64).first()
+        if user and otp.verify(user.pk, code):
             user.set_password(password)
-            user.pop(otp)
             user.save()
             
             return Response({"message":"Password successfully changed"}, status=status.HTTP_201_CREATED)
@@ -0,0 +1,110 @@
+"""
+Load test for accepting applications: many threads race to accept
+applications for one job. Checks that the job never ends up with more
+accepted applicants than it needs and reports accepts/sec.
+
+    python -m benchmarks.accept_contention --applicants 2000 --needed 50 --threads 16
+    python -m benchmarks.accept_contention --bulk 25
+
+SQLite serialises writers, so "database is locked" errors are retried and
+counted; point DATABASES at Postgres for real row-level contention.
+"""
+import argparse
+import threading
+import time
+
+from benchmarks.harness import setup
+from main.testing import make_profile, make_profiles
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--applicants", type=int, default=2000)
+    parser.add_argument("--needed", type=int, default=50)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--bulk", type=int, default=0,
+                        help="accept this many ids per call through bulk_accept instead of one at a time")
+    args = parser.parse_args()
+
+    teardown = setup(shared=True)
+    try:
+        run(args)
+    finally:
+        teardown()
+
+
+def run(args):
+    from django.db import OperationalError, connection
+    from django.utils import timezone
+
+    from JobListingPage.applications import JobFilled, accept_application, bulk_accept
+    from JobListingPage.models import Job, JobApplication
+
+    poster = make_profile()
+    job = Job.objects.create(
+        title="Popular shift", description="Everyone wants it", contract_duration="8hrs Contract",
+        job_date=timezone.now(), location="Lagos", payment="100.00", applicants_needed=args.needed,
+        posted_by=poster,
+    )
+    workers = make_profiles(args.applicants)
+    JobApplication.objects.bulk_create(JobApplication(job=job, applicant=worker) for worker in workers)
+    Job.objects.filter(pk=job.pk).update(applications_count=args.applicants)
+    ids = list(JobApplication.objects.filter(job=job).values_list("pk", flat=True))
+
+    batch = max(args.bulk, 1)
+    calls = [ids[i:i + batch] for i in range(0, len(ids), batch)]
+    lock = threading.Lock()
+    stats = {"accepted": 0, "full": 0, "retries": 0, "calls": 0}
+
+    def worker():
+        try:
+            while True:
+                with lock:
+                    if not calls:
+                        return
+                    chunk = calls.pop()
+                while True:
+                    try:
+                        if args.bulk:
+                            outcome = bulk_accept(chunk)
+                            accepted, full = len(outcome["accepted"]), len(outcome["failed"])
+                        else:
+                            try:
+                                accept_application(chunk[0])
+                                accepted, full = 1, 0
+                            except JobFilled:
+                                accepted, full = 0, 1
+                        break
+                    except OperationalError:
+                        with lock:
+                            stats["retries"] += 1
+                        time.sleep(0.001)
+                with lock:
+                    stats["accepted"] += accepted
+                    stats["full"] += full
+                    stats["calls"] += 1
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=worker) for _ in range(args.threads)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    job.refresh_from_db()
+    in_table = JobApplication.objects.filter(job=job, status=JobApplication.ACCEPTED).count()
+    print(f"threads={args.threads} applicants={args.applicants} needed={args.needed} bulk={args.bulk}")
+    print(f"  {stats['calls']} calls in {elapsed:.3f}s = {stats['calls'] / elapsed:,.0f} calls/sec, "
+          f"{len(ids) / elapsed:,.0f} applications decided/sec")
+    print(f"  accepted={stats['accepted']} turned away={stats['full']} lock retries={stats['retries']}")
+    print(f"  accepted_count={job.accepted_count} accepted rows={in_table}")
+
+    assert stats["accepted"] == in_table == job.accepted_count == min(args.needed, args.applicants), "job over- or under-filled"
+    print("  invariant holds: accepted == applicants_needed")
+
+
+if __name__ == "__main__":
+    main()
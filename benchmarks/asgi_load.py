@@ -0,0 +1,181 @@
+"""
+Concurrent-request throughput and latency of the same read endpoints
+served three ways: sync views under gunicorn (WSGI, the render.yaml
+default), the same sync views under uvicorn workers (ASGI), and the async
+views in JobListingPage/async_views.py under uvicorn workers.
+
+Each setup runs as a real server process over a shared SQLite file, driven
+by --concurrency client threads with keep-alive connections. --db-latency
+adds a sleep to every query in the server, to stand in for a database on
+another host. Requires gunicorn and uvicorn (requirements.txt).
+
+    python -m benchmarks.asgi_load --concurrency 32 --requests 2000 --db-latency 5
+"""
+import argparse
+import http.client
+import itertools
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import textwrap
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from benchmarks.harness import report, setup
+from main.testing import make_profile, make_profiles
+
+SETUPS = {
+    # label: (server command, job list path, my applications path)
+    "WSGI, sync views": (
+        ["gunicorn", "main.wsgi:application", "--worker-class", "sync"],
+        "/jobListing/v1/job/", "/jobListing/v1/jobApplication/me/",
+    ),
+    "ASGI, sync views": (
+        ["gunicorn", "main.asgi:application", "--worker-class", "uvicorn.workers.UvicornWorker"],
+        "/jobListing/v1/job/", "/jobListing/v1/jobApplication/me/",
+    ),
+    "ASGI, async views": (
+        ["gunicorn", "main.asgi:application", "--worker-class", "uvicorn.workers.UvicornWorker"],
+        "/jobListing/v1/async/job/", "/jobListing/v1/async/jobApplication/me/",
+    ),
+}
+
+# Server settings: the benchmark database, plus the simulated query latency.
+SETTINGS = """
+    import time
+
+    from django.db.backends.signals import connection_created
+
+    from main.settings import *  # noqa: F401,F403
+
+    DATABASES["default"]["NAME"] = {database!r}
+    ALLOWED_HOSTS = ["*"]
+    DEBUG = False
+
+    def _slow(execute, sql, params, many, context):
+        time.sleep({latency})
+        return execute(sql, params, many, context)
+
+    def _add_latency(connection, **kwargs):
+        # Fires on every reconnect of the same wrapper object; add the sleep once.
+        if _slow not in connection.execute_wrappers:
+            connection.execute_wrappers.append(_slow)
+
+    if {latency}:
+        connection_created.connect(_add_latency, weak=False)
+"""
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(command, workers, settings_dir):
+    port = free_port()
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE="bench_settings",
+               PYTHONPATH=os.pathsep.join([settings_dir, os.getcwd(), os.environ.get("PYTHONPATH", "")]))
+    server = subprocess.Popen(
+        command + ["--workers", str(workers), "--bind", f"127.0.0.1:{port}", "--log-level", "warning"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            connection.request("GET", "/jobListing/v1/cacheStats/")
+            connection.getresponse().read()
+            return server, port
+        except OSError:
+            time.sleep(0.2)
+    server.kill()
+    raise RuntimeError(f"server did not start: {' '.join(command)}")
+
+
+def drive(port, paths, headers, concurrency, requests, vary):
+    """Send ``requests`` GETs over ``concurrency`` connections; returns (requests/s, latencies)."""
+    nonces = itertools.count()
+    counter = itertools.count()
+    local = threading.local()
+
+    def one(_):
+        if not hasattr(local, "connection"):
+            local.connection = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+        path = paths[next(counter) % len(paths)]
+        if vary:
+            # A distinct query string per request makes every read a listing-cache miss.
+            path += f"{'&' if '?' in path else '?'}nonce={next(nonces)}"
+        start = time.perf_counter()
+        local.connection.request("GET", path, headers=headers)
+        response = local.connection.getresponse()
+        response.read()
+        elapsed = time.perf_counter() - start
+        assert response.status == 200, (path, response.status)
+        return elapsed
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(min(requests, concurrency * 4))))  # warm up every connection
+        start = time.perf_counter()
+        latencies = list(pool.map(one, range(requests)))
+        elapsed = time.perf_counter() - start
+    return requests / elapsed, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=2, help="Server processes per setup")
+    parser.add_argument("--db-latency", type=float, default=0, help="Milliseconds added to every query")
+    parser.add_argument("--jobs", type=int, default=2000)
+    parser.add_argument("--cache-hits", action="store_true", help="Repeat identical requests instead of varying them")
+    args = parser.parse_args()
+
+    teardown = setup(shared=True)
+    try:
+        from django.db import connection
+        from django.utils import timezone
+
+        from authUser.views import MyTokenObtainPairSerializer
+        from JobListingPage.models import Job, JobApplication
+
+        poster = make_profile()
+        job_date = timezone.now() + timedelta(days=3)
+        jobs = Job.objects.bulk_create(
+            Job(title=f"Shift {i}", description="Benchmark shift", contract_duration="4hrs Contract",
+                job_date=job_date, location="Ikeja, Lagos", payment="40.00", posted_by=poster, applicants_needed=5)
+            for i in range(args.jobs)
+        )
+        worker = make_profiles(1)[0]
+        JobApplication.objects.bulk_create(JobApplication(job=job, applicant=worker) for job in jobs[:50])
+        token = MyTokenObtainPairSerializer.get_token(worker.user).access_token
+        headers = {"Authorization": f"Bearer {token}"}
+
+        settings_dir = tempfile.mkdtemp()
+        with open(os.path.join(settings_dir, "bench_settings.py"), "w") as handle:
+            handle.write(textwrap.dedent(SETTINGS.format(
+                database=connection.settings_dict["NAME"], latency=args.db_latency / 1000,
+            )))
+
+        print(f"{args.concurrency} concurrent clients, {args.workers} workers, "
+              f"{args.db_latency:g} ms per query, {'cache hits' if args.cache_hits else 'cache misses'}")
+        for label, (command, job_list, my_applications) in SETUPS.items():
+            server, port = start_server(command, args.workers, settings_dir)
+            try:
+                paths = [f"{job_list}?page_size=20", f"{job_list}{jobs[0].pk}/", f"{my_applications}?page_size=20"]
+                rps, latencies = drive(port, paths, headers, args.concurrency, args.requests, not args.cache_hits)
+            finally:
+                server.terminate()
+                server.wait()
+            report(f"{label:<18} {rps:7.0f} req/s", latencies)
+    finally:
+        teardown()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,59 @@
+"""
+Posting N jobs one request at a time against one bulk request, through
+the full DRF stack (routing, authentication, validation, INSERT).
+
+    python -m benchmarks.bulk_create --jobs 1000
+"""
+import argparse
+import time
+
+from benchmarks.harness import setup
+from main.testing import make_profile
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--jobs", type=int, default=1000)
+    args = parser.parse_args()
+
+    teardown = setup()
+    try:
+        from rest_framework.test import APIClient
+
+        from JobListingPage.models import Job
+
+        client = APIClient()
+        poster = make_profile()
+        payload = [
+            {
+                "title": f"Recurring shift {i}", "description": "Weekly warehouse shift",
+                "contract_duration": "4hrs Contract", "job_date": "2030-01-07T09:00:00Z",
+                "location": "Ikeja, Lagos", "payment": "35.00", "applicants_needed": 3,
+                "posted_by": poster.id,
+            }
+            for i in range(args.jobs)
+        ]
+
+        start = time.perf_counter()
+        for item in payload:
+            response = client.post("/jobListing/v1/job/", item, format="json")
+            assert response.status_code == 201, response.content
+        single = time.perf_counter() - start
+        assert Job.objects.count() == args.jobs
+        Job.objects.all().delete()
+
+        start = time.perf_counter()
+        response = client.post("/jobListing/v1/job/bulk/", payload, format="json")
+        bulk = time.perf_counter() - start
+        assert response.status_code == 201, response.content
+        assert Job.objects.count() == args.jobs
+
+        print(f"{args.jobs} single POSTs   {single:8.3f} s   {args.jobs / single:10,.0f} jobs/sec")
+        print(f"1 bulk POST        {bulk:8.3f} s   {args.jobs / bulk:10,.0f} jobs/sec")
+        print(f"speed-up           {single / bulk:8.1f}x")
+    finally:
+        teardown()
+
+
+if __name__ == "__main__":
+    main()
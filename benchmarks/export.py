@@ -0,0 +1,104 @@
+"""
+Exporting every Job: the streaming exporter (values() rows off a cursor)
+against serializing model instances the way the list viewsets do. Each
+export runs in a fresh process so its peak RSS is its own.
+
+    python -m benchmarks.export --rows 1000000
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+from datetime import timedelta
+
+from benchmarks.harness import setup
+from main.testing import make_profile
+
+
+def seed_jobs(Job, poster, size):
+    from django.utils import timezone
+
+    job_date = timezone.now() + timedelta(days=3)
+    for start in range(0, size, 10000):
+        Job.objects.bulk_create(
+            Job(title=f"Shift {i}", description="Benchmark shift, bring your own gloves",
+                contract_duration="4hrs Contract", job_date=job_date, location="Ikeja, Lagos",
+                payment="40.00", posted_by=poster)
+            for i in range(start, min(start + 10000, size))
+        )
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run_child(db, mode, fmt):
+    """Export from ``db`` in this process and print the measurements as JSON."""
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "main.settings")
+    import django
+
+    django.setup()
+    from django.db import connection
+
+    connection.settings_dict["NAME"] = db
+    from JobListingPage import export
+    from JobListingPage.models import Job
+    from JobListingPage.serializers import JobReadSerializer
+
+    baseline = peak_rss_mb()
+    start = time.perf_counter()
+    size = 0
+    if mode == "streamed":
+        for chunk in export.stream("job", fmt):
+            size += len(chunk)
+        rows = Job.objects.count()
+    else:
+        data = JobReadSerializer(Job.objects.select_related("posted_by__user").order_by("pk"), many=True).data
+        size, rows = len(json.dumps(data, default=str)), len(data)
+    seconds = time.perf_counter() - start
+    print(json.dumps({"rows": rows, "seconds": seconds, "bytes": size, "baseline": baseline, "peak": peak_rss_mb()}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--skip-materialized", action="store_true", help="Only run the streaming exports")
+    parser.add_argument("--child", nargs=3, metavar=("DB", "MODE", "FORMAT"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        return run_child(*args.child)
+
+    teardown = setup(shared=True)
+    try:
+        from django.db import connection
+
+        from JobListingPage.models import Job
+
+        seed_jobs(Job, make_profile(), args.rows)
+        db = connection.settings_dict["NAME"]
+        connection.close()
+
+        runs = [("streamed", "ndjson"), ("streamed", "csv")]
+        if not args.skip_materialized:
+            runs.append(("materialized", "json"))
+        for mode, fmt in runs:
+            output = subprocess.run(
+                [sys.executable, "-m", "benchmarks.export", "--child", db, mode, fmt],
+                check=True, capture_output=True, text=True,
+            ).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            print(
+                f"{mode + ' ' + fmt:<20} {result['rows']:>9,} rows  {result['seconds']:8.2f} s"
+                f"  {result['rows'] / result['seconds']:>10,.0f} rows/sec"
+                f"  peak RSS {result['peak']:7.1f} MB (+{result['peak'] - result['baseline']:.1f} MB over startup)"
+            )
+    finally:
+        teardown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Shared setup for the benchmark scripts in this directory.
+
+Every benchmark runs against a throwaway test database (in-memory for
+SQLite), never the configured one. Run them from the repository root:
+
+    python -m benchmarks.nearby --sizes 100000 1000000
+"""
+import os
+import statistics
+import tempfile
+import time
+
+import django
+
+
+def setup(shared=False):
+    """
+    Configure Django, create the test database and return its teardown.
+    Pass ``shared=True`` when several threads or processes must see the
+    same database; SQLite then uses a temporary file instead of memory.
+    """
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "main.settings")
+    django.setup()
+
+    from django.db import connection
+    from django.test.utils import setup_test_environment
+
+    setup_test_environment()
+    if shared and connection.vendor == "sqlite":
+        connection.settings_dict["TEST"]["NAME"] = os.path.join(tempfile.mkdtemp(), "bench.sqlite3")
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    return lambda: connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+def timed(fn, repeat=5):
+    """Run ``fn`` ``repeat`` times and return the wall time of each run in seconds."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def report(label, samples):
+    print(
+        f"{label:<40} median {statistics.median(samples) * 1000:9.2f} ms"
+        f"   p95 {percentile(samples, 95) * 1000:9.2f} ms   p99 {percentile(samples, 99) * 1000:9.2f} ms"
+        f"   n={len(samples)}"
+    )
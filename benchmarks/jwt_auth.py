@@ -0,0 +1,88 @@
+"""
+GET /jobListing/v1/job/ with a bearer token, authenticated by simplejwt's
+JWTAuthentication (one user query per request) and by
+ClaimsJWTAuthentication (user built from the token claims). Measured on
+cache misses and on listing-cache hits, where the user query is the only
+query left.
+
+    python -m benchmarks.jwt_auth --requests 2000 --jobs 200
+"""
+import argparse
+import itertools
+import time
+from contextlib import nullcontext
+from datetime import timedelta
+from unittest import mock
+
+from benchmarks.harness import setup
+from main.testing import make_profile
+
+NONCES = itertools.count()
+
+
+def run(client, url, requests, vary):
+    """Requests per second and queries per request for ``requests`` GETs of ``url``."""
+    from django.db import connection
+
+    queries = 0
+
+    def count(execute, sql, params, many, context):
+        nonlocal queries
+        queries += 1
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(count):
+        start = time.perf_counter()
+        for _ in range(requests):
+            # A distinct query string per request makes every read a cache miss.
+            response = client.get(f"{url}&nonce={next(NONCES)}" if vary else url)
+            assert response.status_code == 200, response.content
+        elapsed = time.perf_counter() - start
+    return requests / elapsed, queries / requests
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--jobs", type=int, default=200)
+    args = parser.parse_args()
+
+    teardown = setup()
+    try:
+        from django.utils import timezone
+        from rest_framework.test import APIClient
+        from rest_framework_simplejwt.authentication import JWTAuthentication
+
+        from authUser.views import MyTokenObtainPairSerializer
+        from JobListingPage import listing_cache
+        from JobListingPage.models import Job
+        from JobListingPage.views import JobViewSet
+
+        poster = make_profile()
+        job_date = timezone.now() + timedelta(days=3)
+        Job.objects.bulk_create(
+            Job(title=f"Shift {i}", description="Benchmark shift", contract_duration="4hrs Contract",
+                job_date=job_date, location="Ikeja, Lagos", payment="40.00", posted_by=poster)
+            for i in range(args.jobs)
+        )
+        client = APIClient()
+        token = MyTokenObtainPairSerializer.get_token(poster.user).access_token
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        url = "/jobListing/v1/job/?page_size=20"
+
+        for label, vary in (("cache miss", True), ("cache hit", False)):
+            for name, patch in (
+                ("JWTAuthentication", mock.patch.object(JobViewSet, "authentication_classes", [JWTAuthentication])),
+                ("ClaimsJWTAuthentication", nullcontext()),
+            ):
+                listing_cache.get_cache().clear()
+                with patch:
+                    run(client, url, 50, vary)  # warm up
+                    rps, queries = run(client, url, args.requests, vary)
+                print(f"{label:<11} {name:<24} {rps:10,.0f} req/sec   {queries:4.1f} queries/request")
+    finally:
+        teardown()
+
+
+if __name__ == "__main__":
+    main()
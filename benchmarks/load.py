@@ -0,0 +1,242 @@
+"""
+Capacity test against a running server: virtual users log in through
+/userApi/v1/user/token/, then browse job pages (following the cursor),
+open job details, apply and save jobs in a weighted mix, each over one
+keep-alive connection. Reports throughput and latency percentiles per
+operation and writes them, with the commit and settings, to a JSON file
+for comparison across commits.
+
+Unlike the other scripts here it does not make a test database: load the
+server's database with synthetic data first, and pass the manifest it
+writes so the virtual users can log in as the synthetic workers.
+
+    python manage.py generate_synthetic_data --users 2000 --jobs 10000 \\
+        --applications 50000 --saved 20000 --manifest synthetic.json
+    gunicorn main.wsgi:application --workers 4 --bind 127.0.0.1:8000 &
+    python -m benchmarks.load --manifest synthetic.json --users 32 --duration 60 \\
+        --output load-$(git rev-parse --short HEAD).json --compare load-previous.json
+
+The run is reproducible for a given --seed, manifest and data, except
+for the interleaving of the virtual users. Each request applies or saves
+for real, so regenerate the data (or use a fresh --prefix) between runs
+that should be compared.
+"""
+import argparse
+import http.client
+import json
+import random
+import statistics
+import subprocess
+import threading
+import time
+from datetime import datetime, timezone
+from urllib.parse import urlsplit
+
+from benchmarks.harness import percentile
+
+# Relative frequency of each operation after login
+MIX = {"browse": 50, "detail": 25, "apply": 10, "save": 15}
+PAGE_SIZE = 20
+
+
+class VirtualUser:
+    """One worker's session: its own connection, token and the jobs it has seen."""
+
+    def __init__(self, host, port, worker, password, rng, session_requests):
+        self.host, self.port = host, port
+        self.worker, self.password = worker, password
+        self.rng = rng
+        self.session_requests = session_requests
+        self.connection = None
+        self.headers = {}
+        self.since_login = session_requests  # log in before the first request
+        self.seen, self.applied = [], set()
+        self.next_page = None
+
+    def request(self, method, path, body=None, auth=True):
+        headers = dict(self.headers) if auth else {}
+        if body is not None:
+            body = json.dumps(body)
+            headers["Content-Type"] = "application/json"
+        for attempt in (1, 2):
+            if self.connection is None:
+                self.connection = http.client.HTTPConnection(self.host, self.port, timeout=60)
+            try:
+                self.connection.request(method, path, body=body, headers=headers)
+                response = self.connection.getresponse()
+                return response.status, response.read()
+            except (ConnectionError, http.client.HTTPException):
+                # The server closed an idle keep-alive connection; retry once on a new one.
+                self.connection.close()
+                self.connection = None
+                if attempt == 2:
+                    raise
+
+    def login(self):
+        status, body = self.request("POST", "/userApi/v1/user/token/",
+                                    {"email": self.worker["email"], "password": self.password}, auth=False)
+        if status == 200:
+            self.headers = {"Authorization": f"Bearer {json.loads(body)['access']}"}
+        self.since_login = 0
+        return status
+
+    def browse(self):
+        if self.next_page and self.rng.random() < 0.5:
+            path = self.next_page
+        else:
+            path = f"/jobListing/v1/job/?page_size={PAGE_SIZE}" + ("&open=true" if self.rng.random() < 0.5 else "")
+        status, body = self.request("GET", path)
+        if status == 200:
+            page = json.loads(body)
+            self.seen = [job["id"] for job in page["results"]] or self.seen
+            # `next` is an absolute URL; replay only its path and query.
+            self.next_page = page["next"] and "?".join(filter(None, urlsplit(page["next"])[2:4]))
+        return status
+
+    def detail(self):
+        return self.request("GET", f"/jobListing/v1/job/{self.rng.choice(self.seen)}/")[0]
+
+    def apply(self):
+        candidates = [job for job in self.seen if job not in self.applied]
+        if not candidates:
+            return self.browse()
+        job = self.rng.choice(candidates)
+        self.applied.add(job)
+        return self.request("POST", "/jobListing/v1/jobApplication/", {"job": job, "applicant": self.worker["profile"]})[0]
+
+    def save(self):
+        return self.request("POST", "/jobListing/v1/savedJob/me/", {"job": self.rng.choice(self.seen)})[0]
+
+    def next_operation(self):
+        if self.since_login >= self.session_requests:
+            return "login"
+        self.since_login += 1
+        if not self.seen:
+            return "browse"
+        operations, weights = zip(*MIX.items())
+        return self.rng.choices(operations, weights=weights)[0]
+
+
+def run(args, manifest):
+    target = urlsplit(args.url)
+    workers = manifest["workers"]
+    rng = random.Random(args.seed)
+    users = [
+        VirtualUser(target.hostname, target.port or 80, rng.choice(workers), manifest["password"],
+                    random.Random(rng.random()), args.session_requests)
+        for _ in range(args.users)
+    ]
+    samples = {operation: [] for operation in ["login", *MIX]}
+    statuses = {operation: {} for operation in samples}
+    lock = threading.Lock()
+    start = time.perf_counter()
+    measure_from = start + args.warmup
+    deadline = measure_from + args.duration
+
+    def drive(user):
+        while True:
+            operation = user.next_operation()
+            began = time.perf_counter()
+            if began >= deadline:
+                break
+            try:
+                status = str(getattr(user, operation)())
+            except OSError as error:
+                status = type(error).__name__
+            elapsed = time.perf_counter() - began
+            if began >= measure_from:
+                with lock:
+                    samples[operation].append(elapsed)
+                    statuses[operation][status] = statuses[operation].get(status, 0) + 1
+
+    threads = [threading.Thread(target=drive, args=(user,)) for user in users]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return samples, statuses
+
+
+def summarize(samples, statuses, duration):
+    def stats(values, counts):
+        errors = sum(count for status, count in counts.items() if not status.startswith(("2", "3")))
+        summary = {"requests": len(values), "throughput_rps": round(len(values) / duration, 2),
+                   "errors": errors, "statuses": counts}
+        if values:
+            summary.update({
+                f"{name}_ms": round(value * 1000, 2) for name, value in (
+                    ("mean", statistics.fmean(values)), ("p50", statistics.median(values)),
+                    ("p95", percentile(values, 95)), ("p99", percentile(values, 99)), ("max", max(values)),
+                )
+            })
+        return summary
+
+    everything, counts = [], {}
+    for operation, values in samples.items():
+        everything += values
+        for status, count in statuses[operation].items():
+            counts[status] = counts.get(status, 0) + count
+    return stats(everything, counts), {operation: stats(samples[operation], statuses[operation]) for operation in samples}
+
+
+def commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(result, previous=None):
+    def line(label, current, before):
+        text = (f"{label:<8} {current['throughput_rps']:8.1f} req/s   p50 {current.get('p50_ms', 0):8.2f} ms"
+                f"   p95 {current.get('p95_ms', 0):8.2f} ms   p99 {current.get('p99_ms', 0):8.2f} ms"
+                f"   errors {current['errors']}")
+        if before and before.get("p95_ms"):
+            text += (f"   (vs {previous['commit']}: {current['throughput_rps'] / before['throughput_rps'] - 1:+.1%} req/s,"
+                     f" p95 {current.get('p95_ms', 0) / before['p95_ms'] - 1:+.1%})")
+        print(text)
+
+    print(f"{result['config']['users']} virtual users for {result['config']['duration']} s against {result['config']['url']}")
+    line("all", result["overall"], previous and previous["overall"])
+    for operation, current in result["operations"].items():
+        line(operation, current, previous and previous["operations"].get(operation))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:8000", help="Server to load")
+    parser.add_argument("--manifest", required=True, help="Written by manage.py generate_synthetic_data --manifest")
+    parser.add_argument("--users", type=int, default=16, help="Concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds measured")
+    parser.add_argument("--warmup", type=float, default=5, help="Seconds run before measuring")
+    parser.add_argument("--session-requests", type=int, default=50,
+                        help="Requests per login; each virtual user logs in again after this many")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--compare", help="A previous --output file to compare against")
+    args = parser.parse_args()
+
+    with open(args.manifest) as handle:
+        manifest = json.load(handle)
+    samples, statuses = run(args, manifest)
+    overall, operations = summarize(samples, statuses, args.duration)
+    result = {
+        "commit": commit(),
+        "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "config": {key: getattr(args, key) for key in ("url", "users", "duration", "warmup", "session_requests", "seed")},
+        "mix": MIX,
+        "overall": overall,
+        "operations": operations,
+    }
+    previous = None
+    if args.compare:
+        with open(args.compare) as handle:
+            previous = json.load(handle)
+    print_results(result, previous)
+    if args.output:
+        with open(args.output, "w") as handle:
+            json.dump(result, handle, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Cost of the request metrics in main/metrics.py: the same requests through
+the full WSGI request cycle with MetricsMiddleware in MIDDLEWARE and with
+it removed (and its query wrapper taken off the connection). Rounds of
+the two setups alternate so drift in the machine affects both alike.
+
+    python -m benchmarks.metrics_overhead --requests 2000 --rounds 5
+"""
+import argparse
+import itertools
+import time
+from datetime import timedelta
+
+from benchmarks.harness import report, setup
+from main.testing import make_profile
+
+
+def run(handler, environ_for, paths, requests, nonces):
+    latencies = []
+    for i in range(requests):
+        # A distinct query string per request makes every read a listing-cache miss.
+        environ = environ_for(paths[i % len(paths)], f"page_size=20&nonce={next(nonces)}")
+        start = time.perf_counter()
+        response = handler(environ, lambda status, headers: None)
+        b"".join(response)
+        response.close()
+        latencies.append(time.perf_counter() - start)
+        assert response.status_code == 200, response.status_code
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000, help="Requests per setup per round")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--jobs", type=int, default=200)
+    args = parser.parse_args()
+
+    teardown = setup()
+    try:
+        from django.conf import settings
+        from django.core.handlers.wsgi import WSGIHandler
+        from django.db import connection
+        from django.test import RequestFactory, override_settings
+        from django.utils import timezone
+
+        from JobListingPage.models import Job
+        from main import metrics
+
+        poster = make_profile()
+        job_date = timezone.now() + timedelta(days=3)
+        jobs = Job.objects.bulk_create(
+            Job(title=f"Shift {i}", description="Benchmark shift", contract_duration="4hrs Contract",
+                job_date=job_date, location="Ikeja, Lagos", payment="40.00", posted_by=poster)
+            for i in range(args.jobs)
+        )
+        factory = RequestFactory()
+        paths = ["/jobListing/v1/job/", f"/jobListing/v1/job/{jobs[0].pk}/"]
+
+        def environ_for(path, query):
+            return factory._base_environ(PATH_INFO=path, QUERY_STRING=query, REQUEST_METHOD="GET")
+
+        without = [name for name in settings.MIDDLEWARE if name != "main.metrics.MetricsMiddleware"]
+        setups = {"metrics on": settings.MIDDLEWARE, "metrics off": without}
+        nonces = itertools.count()
+        latencies = {label: [] for label in setups}
+        for _ in range(args.rounds):
+            for label, middleware in setups.items():
+                with override_settings(MIDDLEWARE=middleware):
+                    connection.ensure_connection()
+                    if label == "metrics off":
+                        connection.execute_wrappers[:] = [
+                            wrapper for wrapper in connection.execute_wrappers if wrapper is not metrics._record_query
+                        ]
+                    handler = WSGIHandler()
+                    run(handler, environ_for, paths, 100, nonces)  # warm up
+                    latencies[label] += run(handler, environ_for, paths, args.requests, nonces)
+
+        print(f"{connection.vendor}, job list (20 per page) and detail, "
+              f"{args.requests * args.rounds} requests per setup")
+        for label, values in latencies.items():
+            report(f"{label:<12}", values)
+        on, off = (sum(latencies[label]) / len(latencies[label]) for label in setups)
+        print(f"overhead: {(on - off) * 1e6:.0f} us per request ({(on - off) / off:.1%} of the mean)")
+        print(f"registry: {len(metrics.registry.routes)} routes")
+    finally:
+        teardown()
+
+
+if __name__ == "__main__":
+    main()
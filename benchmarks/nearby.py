@@ -0,0 +1,84 @@
+"""
+Radius search on Job: grid-cell index (geo.nearby) against a full scan
+that computes the distance to every job.
+
+    python -m benchmarks.nearby --sizes 100000 1000000 --radius 10
+"""
+import argparse
+import heapq
+import random
+import time
+from datetime import timedelta
+
+from benchmarks.harness import report, setup
+from main.testing import make_profile
+
+
+def seed_jobs(Job, geo, poster, size, rng):
+    from django.utils import timezone
+
+    Job.objects.all().delete()
+    cities = list(geo.KNOWN_LOCATIONS.values())
+    job_date = timezone.now() + timedelta(days=3)
+    batch = []
+    for i in range(size):
+        lat, lng = rng.choice(cities)
+        lat, lng = lat + rng.uniform(-1, 1), lng + rng.uniform(-1, 1)
+        batch.append(Job(
+            title=f"Shift {i}", description="Benchmark shift", contract_duration="4hrs Contract",
+            job_date=job_date, location="", payment="40.00", posted_by=poster,
+            latitude=lat, longitude=lng, geo_cell=geo.grid_cell(lat, lng),
+        ))
+        if len(batch) == 10000:
+            Job.objects.bulk_create(batch)
+            batch = []
+    Job.objects.bulk_create(batch)
+
+
+def full_scan(Job, geo, lat, lng, radius, limit):
+    matches = []
+    for pk, job_lat, job_lng in Job.objects.values_list("id", "latitude", "longitude").iterator():
+        distance = geo.haversine_km(lat, lng, job_lat, job_lng)
+        if distance <= radius:
+            matches.append((distance, pk))
+    return [pk for _, pk in heapq.nsmallest(limit, matches)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100000, 1000000])
+    parser.add_argument("--radius", type=float, default=10)
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    teardown = setup()
+    try:
+        from JobListingPage import geo
+        from JobListingPage.models import Job
+
+        rng = random.Random(args.seed)
+        poster = make_profile()
+        centres = [rng.choice(list(geo.KNOWN_LOCATIONS.values())) for _ in range(args.queries)]
+        for size in args.sizes:
+            seed_jobs(Job, geo, poster, size, rng)
+            indexed, scanned = [], []
+            for lat, lng in centres:
+                start = time.perf_counter()
+                found = [job.id for job in geo.nearby(Job.objects.all(), lat, lng, args.radius, args.limit)]
+                indexed.append(time.perf_counter() - start)
+
+                start = time.perf_counter()
+                expected = full_scan(Job, geo, lat, lng, args.radius, args.limit)
+                scanned.append(time.perf_counter() - start)
+
+                assert found == expected, "indexed search disagrees with the full scan"
+            report(f"{size:>9,} jobs  indexed radius search", indexed)
+            report(f"{size:>9,} jobs  full scan", scanned)
+    finally:
+        teardown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+GET /jobListing/v1/job/recommended/ over a large set of open jobs: served
+from the stored top-K (the request path), against ranking every open job
+on each request. Also times the full and incremental loads of the feature
+arrays and the NumPy scoring on its own.
+
+    python -m benchmarks.recommend --jobs 100000 --workers 200
+"""
+import argparse
+import random
+import time
+from datetime import timedelta
+
+from benchmarks.harness import report, setup
+from main.testing import make_profile, make_profiles
+
+
+def seed_jobs(Job, geo, posters, size, rng):
+    from django.utils import timezone
+
+    cities = list(geo.KNOWN_LOCATIONS.values())
+    now = timezone.now()
+    batch = []
+    for i in range(size):
+        lat, lng = rng.choice(cities)
+        lat, lng = lat + rng.uniform(-0.5, 0.5), lng + rng.uniform(-0.5, 0.5)
+        batch.append(Job(
+            title=f"Shift {i}", description="Benchmark shift", contract_duration="4hrs Contract",
+            job_date=now + timedelta(hours=rng.uniform(1, 24 * 30)), location="",
+            payment=f"{rng.uniform(10, 120):.2f}", posted_by=rng.choice(posters),
+            latitude=lat, longitude=lng, geo_cell=geo.grid_cell(lat, lng),
+        ))
+        if len(batch) == 10000:
+            Job.objects.bulk_create(batch)
+            batch = []
+    Job.objects.bulk_create(batch)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--jobs", type=int, default=100000)
+    parser.add_argument("--workers", type=int, default=200)
+    parser.add_argument("--history", type=int, default=10, help="Saved jobs per worker")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    teardown = setup()
+    try:
+        from django.utils import timezone
+        from rest_framework.test import APIClient
+
+        from authUser.views import MyTokenObtainPairSerializer
+        from JobListingPage import geo, recommend
+        from JobListingPage.models import Job, Recommendation, SavedJob
+
+        rng = random.Random(args.seed)
+        posters = [make_profile()] + make_profiles(50, prefix="poster")
+        seed_jobs(Job, geo, posters, args.jobs, rng)
+        workers = make_profiles(args.workers)
+        cities = list(geo.KNOWN_LOCATIONS.values())
+        for worker in workers:
+            worker.latitude, worker.longitude = rng.choice(cities)
+            worker.save(update_fields=["latitude", "longitude"])
+        job_ids = list(Job.objects.values_list("id", flat=True))
+        SavedJob.objects.bulk_create(
+            SavedJob(user=worker, job_id=job_id)
+            for worker in workers for job_id in rng.sample(job_ids, args.history)
+        )
+
+        # As if seeded an hour ago, so the incremental refresh below only sees the edits.
+        Job.objects.update(updated_at=timezone.now() - timedelta(hours=1))
+        recommend.features.reset()
+        start = time.perf_counter()
+        recommend.features.refresh()
+        print(f"full load of {len(recommend.features.snapshot.ids):,} open jobs: {(time.perf_counter() - start) * 1000:.0f} ms")
+        changed = rng.sample(job_ids, 100)
+        Job.objects.filter(pk__in=changed).update(payment="99.00", updated_at=timezone.now())
+        start = time.perf_counter()
+        recommend.features.refresh()
+        print(f"incremental refresh after 100 edits: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+        scoring = []
+        for worker in workers:
+            preferences = recommend.WorkerPreferences(worker)
+            jobs = recommend.features.snapshot
+            start = time.perf_counter()
+            recommend.top_jobs(recommend.score(jobs, preferences), jobs.ids)
+            scoring.append(time.perf_counter() - start)
+        report(f"{args.jobs:>7,} jobs  score + top-{recommend.TOP_K}", scoring)
+
+        clients = []
+        for worker in workers:
+            client = APIClient()
+            token = MyTokenObtainPairSerializer.get_token(worker.user).access_token
+            client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+            clients.append(client)
+        url = "/jobListing/v1/job/recommended/"
+
+        def measure(before_each):
+            samples = []
+            for i in range(args.requests):
+                client = clients[i % len(clients)]
+                before_each(workers[i % len(workers)])
+                start = time.perf_counter()
+                response = client.get(url)
+                samples.append(time.perf_counter() - start)
+                assert response.status_code == 200, response.content
+            return samples
+
+        # Ranking on every request: no stored row, so the view computes one.
+        per_request = measure(lambda worker: Recommendation.objects.filter(profile=worker).delete())
+        # Precomputed: every worker's row is fresh after the pass above.
+        precomputed = measure(lambda worker: None)
+        report(f"{args.jobs:>7,} jobs  ranked per request", per_request)
+        report(f"{args.jobs:>7,} jobs  precomputed top-K", precomputed)
+    finally:
+        teardown()
+
+
+if __name__ == "__main__":
+    main()
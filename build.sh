@@ -18,7 +18,7 @@ python manage.py migrate --noinput
 # Create a superuser (optional)
 # python manage.py createsuperuser --noinput
 
-# Output Django settings to verify environment variables
-echo "DJANGO_SECRET_KEY=$DJANGO_SECRET_KEY"
+# Report which settings came from the environment, without printing secrets
+[ -n "$DJANGO_SECRET_KEY" ] && echo "DJANGO_SECRET_KEY is set" || echo "DJANGO_SECRET_KEY is not set"
 echo "DEBUG=$DEBUG"
-echo "DATABASE_URL=$DATABASE_URL"
+[ -n "$DATABASE_URL" ] && echo "DATABASE_URL is set" || echo "DATABASE_URL is not set, using SQLite"
@@ -3,6 +3,21 @@ ASGI config for main project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Serve it with uvicorn, alone or as gunicorn workers (both are in
+requirements.txt):
+
+    uvicorn main.asgi:application --host 0.0.0.0 --port $PORT --workers 4
+    gunicorn main.asgi:application -k uvicorn.workers.UvicornWorker -w 4 --bind 0.0.0.0:$PORT
+
+A sync gunicorn worker is stuck for as long as its request waits on the
+database; under ASGI a worker keeps taking requests meanwhile. The DRF
+viewsets run there in a thread per request, and the async reads in
+JobListingPage/async_views.py (/jobListing/v1/async/...) stay on the event
+loop until they query, which makes cache hits and 304s cheaper still.
+That only holds while every entry in MIDDLEWARE is async-capable, which is
+why WhiteNoise is wrapped in main/middleware.py.
+`python -m benchmarks.asgi_load` compares the setups.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
 """
@@ -0,0 +1,65 @@
+import queue
+import time
+
+from django.db.backends.postgresql import base
+
+# Idle connections per database alias, newest last, as
+# (connection, isolation level, time it was returned).
+_idle = {}
+
+# A connection idle for longer than this is pinged before it is reused.
+CHECK_AFTER_SECONDS = 30
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    PostgreSQL (psycopg2) with an in-process connection pool: closing a
+    connection at the end of a request hands it back to the pool instead,
+    and the next request in any thread of the process takes it from there
+    without a new TCP and authentication handshake. The pool keeps at most
+    POOL_SIZE idle connections; CONN_MAX_AGE should be 0, see settings.
+    """
+
+    def _pool(self):
+        return _idle.setdefault(self.alias, queue.LifoQueue(maxsize=self.settings_dict['POOL_SIZE']))
+
+    def get_new_connection(self, conn_params):
+        pool = self._pool()
+        while True:
+            try:
+                connection, isolation_level, returned_at = pool.get_nowait()
+            except queue.Empty:
+                return super().get_new_connection(conn_params)
+            if not connection.closed and (time.monotonic() - returned_at < CHECK_AFTER_SECONDS or _ping(connection)):
+                self.isolation_level = isolation_level
+                return connection
+            connection.close()
+
+    def _close(self):
+        connection = self.connection
+        if connection is None:
+            return
+        # Only a connection in a clean state goes back; anything the
+        # request left open is rolled back first.
+        reusable = not connection.closed and not self.in_atomic_block and not self.errors_occurred
+        if reusable:
+            try:
+                if connection.info.transaction_status != base.Database.extensions.TRANSACTION_STATUS_IDLE:
+                    connection.rollback()
+                self._pool().put_nowait((connection, self.isolation_level, time.monotonic()))
+                return
+            except (base.Database.Error, queue.Full):
+                pass
+        with self.wrap_database_errors:
+            connection.close()
+
+
+def _ping(connection):
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+        if not connection.autocommit:
+            connection.rollback()
+        return True
+    except base.Database.Error:
+        return False
@@ -0,0 +1,17 @@
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    SQLite set up for a web server rather than a single script: WAL lets
+    readers carry on while a write commits, and synchronous=NORMAL only
+    syncs at checkpoints, which WAL keeps safe against corruption (a power
+    cut can lose the last commits, not the database). How long a writer
+    waits for the lock is OPTIONS["timeout"], see settings.DATABASES.
+    """
+
+    def get_new_connection(self, conn_params):
+        connection = super().get_new_connection(conn_params)
+        connection.execute('PRAGMA journal_mode = WAL')  # stays set in the file; a no-op in memory
+        connection.execute('PRAGMA synchronous = NORMAL')
+        return connection
@@ -0,0 +1,277 @@
+import bisect
+import logging
+import secrets
+import threading
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse, HttpResponseForbidden
+
+# Per-route request metrics, kept in this process: wall time, database
+# queries and their time, serializer time and response size. Read them at
+# /metrics (Prometheus text format) or per response in the Server-Timing
+# header. Each worker process counts only its own requests, so a scrape
+# sees one worker; sum over scrapes (or run one worker) for totals.
+#
+# A request's numbers live in a RequestStats reached through a ContextVar,
+# which follows the request into the threads the async ORM runs queries in.
+
+SLOW_REQUEST_SECONDS = getattr(settings, 'METRICS_SLOW_REQUEST_MS', 500) / 1000
+SLOW_LOG_INTERVAL = getattr(settings, 'METRICS_SLOW_LOG_INTERVAL_SECONDS', 10)  # per route
+SERVER_TIMING = getattr(settings, 'METRICS_SERVER_TIMING', True)
+MAX_LOGGED_QUERIES = 50
+
+# Upper bounds, in seconds, of the request duration histogram buckets
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+logger = logging.getLogger(__name__)
+
+_current = ContextVar('request_stats', default=None)
+
+
+class RequestStats:
+    __slots__ = ('queries', 'db_seconds', 'serialize_seconds', 'sql')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.serialize_seconds = 0.0
+        self.sql = []
+
+
+class RouteStats:
+    """Running totals for one (route, method); updated under the registry lock."""
+    __slots__ = ('requests', 'statuses', 'buckets', 'seconds', 'queries', 'db_seconds',
+                 'serialize_seconds', 'response_bytes', 'last_slow_log')
+
+    def __init__(self):
+        self.requests = 0
+        self.statuses = {}
+        self.buckets = [0] * (len(DURATION_BUCKETS) + 1)  # the last one is +Inf
+        self.seconds = 0.0
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.serialize_seconds = 0.0
+        self.response_bytes = 0
+        self.last_slow_log = 0.0
+
+
+class Registry:
+    def __init__(self):
+        self.routes = {}
+        self.lock = threading.Lock()
+
+    def observe(self, route, method, status, seconds, stats, response_bytes):
+        """Add a finished request; returns True if it should be logged as slow."""
+        with self.lock:
+            entry = self.routes.get((route, method))
+            if entry is None:
+                entry = self.routes[route, method] = RouteStats()
+            entry.requests += 1
+            entry.statuses[status] = entry.statuses.get(status, 0) + 1
+            entry.buckets[bisect.bisect_left(DURATION_BUCKETS, seconds)] += 1
+            entry.seconds += seconds
+            entry.queries += stats.queries
+            entry.db_seconds += stats.db_seconds
+            entry.serialize_seconds += stats.serialize_seconds
+            entry.response_bytes += response_bytes
+            if seconds >= SLOW_REQUEST_SECONDS:
+                now = time.monotonic()
+                if now - entry.last_slow_log >= SLOW_LOG_INTERVAL:
+                    entry.last_slow_log = now
+                    return True
+        return False
+
+    def reset(self):
+        with self.lock:
+            self.routes.clear()
+
+    def exposition(self):
+        """The metrics in Prometheus text format."""
+        with self.lock:
+            routes = sorted(self.routes.items())
+            lines = []
+
+            def family(name, kind, help_text, samples):
+                lines.append(f'# HELP paeshift_{name} {help_text}')
+                lines.append(f'# TYPE paeshift_{name} {kind}')
+                lines.extend(f'paeshift_{sample}' for sample in samples)
+
+            def labels(route, method, **extra):
+                pairs = {'route': route, 'method': method, **extra}
+                return ','.join(f'{key}="{_escape(value)}"' for key, value in pairs.items())
+
+            family('requests_total', 'counter', 'Requests by route, method and status code.', [
+                f'requests_total{{{labels(route, method, status=str(status))}}} {count}'
+                for (route, method), entry in routes for status, count in sorted(entry.statuses.items())
+            ])
+            duration = []
+            for (route, method), entry in routes:
+                cumulative = 0
+                for bound, count in zip(DURATION_BUCKETS + ('+Inf',), entry.buckets):
+                    cumulative += count
+                    duration.append(f'request_duration_seconds_bucket{{{labels(route, method, le=str(bound))}}} {cumulative}')
+                duration.append(f'request_duration_seconds_sum{{{labels(route, method)}}} {entry.seconds:.6f}')
+                duration.append(f'request_duration_seconds_count{{{labels(route, method)}}} {entry.requests}')
+            family('request_duration_seconds', 'histogram', 'Wall time from the first middleware to the response.', duration)
+            for name, attribute, help_text in (
+                ('db_queries_total', 'queries', 'Database queries run by requests.'),
+                ('db_seconds_total', 'db_seconds', 'Time requests spent waiting on database queries.'),
+                ('serialize_seconds_total', 'serialize_seconds', 'Time requests spent in DRF serializers.'),
+                ('response_bytes_total', 'response_bytes', 'Response body bytes, streamed responses excluded.'),
+            ):
+                family(name, 'counter', help_text, [
+                    f'{name}{{{labels(route, method)}}} {_number(getattr(entry, attribute))}'
+                    for (route, method), entry in routes
+                ])
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _number(value):
+    return f'{value:.6f}' if isinstance(value, float) else str(value)
+
+
+registry = Registry()
+
+
+# Database time, through the execute_wrappers list that
+# connection.execute_wrapper() manages. It is added to every connection as
+# it opens, which covers the per-thread connections of async views, and to
+# connections this thread opened before the module was imported at the
+# start of each request.
+def _record_query(execute, sql, params, many, context):
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.db_seconds += time.perf_counter() - start
+        stats.queries += 1
+        if len(stats.sql) < MAX_LOGGED_QUERIES:
+            stats.sql.append(sql)
+
+
+def _instrument_connection(sender, connection, **kwargs):
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+
+connection_created.connect(_instrument_connection)
+
+
+def _instrument_open_connections():
+    for connection in connections.all(initialized_only=True):
+        _instrument_connection(None, connection)
+
+
+# Serializer time, for the serializers that views hand to timed(): the
+# top-level to_representation is where DRF turns instances into
+# primitives; nested serializers run inside it. Only that one instance is
+# wrapped, so serializers used outside a view are left as DRF made them.
+def timed(serializer):
+    """Count the time ``serializer`` spends building its ``.data`` in this request's stats."""
+    represent = serializer.to_representation
+
+    def to_representation(instance):
+        stats = _current.get()
+        if stats is None:
+            return represent(instance)
+        start = time.perf_counter()
+        try:
+            return represent(instance)
+        finally:
+            stats.serialize_seconds += time.perf_counter() - start
+
+    serializer.to_representation = to_representation
+    return serializer
+
+
+class SerializerTimingMixin:
+    """
+    For views: time the serializers get_serializer() returns, and the ones
+    built from other classes through serialize().
+    """
+
+    def get_serializer(self, *args, **kwargs):
+        return timed(super().get_serializer(*args, **kwargs))
+
+    def serialize(self, serializer_class, *args, **kwargs):
+        return timed(serializer_class(*args, **kwargs)).data
+
+
+class MetricsMiddleware:
+    """
+    Time each request and attach its numbers to the registry and the
+    Server-Timing header. Put it first in MIDDLEWARE so the wall time
+    covers the other middleware too.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        _instrument_open_connections()
+        stats, start = RequestStats(), time.perf_counter()
+        token = _current.set(stats)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, stats, time.perf_counter() - start)
+
+    async def __acall__(self, request):
+        stats, start = RequestStats(), time.perf_counter()
+        token = _current.set(stats)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, stats, time.perf_counter() - start)
+
+    def _finish(self, request, response, stats, seconds):
+        match = getattr(request, 'resolver_match', None)
+        route = match.view_name if match is not None else 'unmatched'
+        size = 0 if response.streaming else len(response.content)
+        if registry.observe(route, request.method, response.status_code, seconds, stats, size):
+            logger.warning(
+                "Slow request: %s %s (%s) took %.0f ms, %d queries in %.0f ms:\n%s",
+                request.method, request.path, route, seconds * 1000, stats.queries,
+                stats.db_seconds * 1000, '\n'.join(stats.sql),
+            )
+        if SERVER_TIMING:
+            response['Server-Timing'] = (
+                f'app;dur={seconds * 1000:.1f}, '
+                f'db;dur={stats.db_seconds * 1000:.1f};desc="{stats.queries} queries", '
+                f'serialize;dur={stats.serialize_seconds * 1000:.1f}'
+            )
+        return response
+
+
+def metrics_view(request):
+    """
+    The registry in Prometheus text format, for staff sessions or a
+    scraper sending ``Authorization: Bearer <METRICS_TOKEN>``.
+    """
+    token = getattr(settings, 'METRICS_TOKEN', None)
+    header = request.META.get('HTTP_AUTHORIZATION', '')
+    scraper = bool(token) and secrets.compare_digest(header.encode(), f'Bearer {token}'.encode())
+    if not scraper and not request.user.is_staff:
+        return HttpResponseForbidden()
+    return HttpResponse(registry.exposition(), content_type='text/plain; version=0.0.4; charset=utf-8')
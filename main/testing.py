@@ -0,0 +1,163 @@
+"""
+Helpers shared by the apps' tests and the scripts in benchmarks/: users,
+profiles and jobs built in few queries, and the per-endpoint query and
+latency budgets.
+
+The benchmarks import this module before django.setup(), so models and
+DRF's test client are imported inside the functions that use them.
+"""
+import os
+import re
+import time
+from datetime import timedelta
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLResolver, get_resolver, resolve
+
+PASSWORD = "pass12345"
+
+
+def make_profile(email="poster@example.com"):
+    from authUser.models import CustomUser
+
+    user = CustomUser.objects.create_user(email=email, username=email.split("@")[0], password=PASSWORD)
+    return user.profile
+
+
+def make_job(profile, **kwargs):
+    from django.utils import timezone
+
+    from JobListingPage.models import Job
+
+    fields = {
+        "title": "Shift",
+        "description": "Warehouse shift",
+        "contract_duration": "2hrs Contract",
+        "job_date": timezone.now() + timedelta(days=1),
+        "location": "Lagos",
+        "payment": "50.00",
+        "applicants_needed": 1,
+        "posted_by": profile,
+    }
+    fields.update(kwargs)
+    return Job.objects.create(**fields)
+
+
+def make_profiles(count, prefix="worker", **fields):
+    """
+    ``count`` users with profiles in two bulk INSERTs. Skips the per-user
+    password hashing and the create_profile signal that make create_user slow.
+    """
+    from django.contrib.auth.hashers import make_password
+
+    from authUser.models import CustomUser, Profile
+
+    password = make_password(PASSWORD)
+    start = CustomUser.objects.count()
+    users = CustomUser.objects.bulk_create(
+        CustomUser(email=f"{prefix}{start + i}@example.com", username=f"{prefix}{start + i}", password=password)
+        for i in range(count)
+    )
+    return Profile.objects.bulk_create(Profile(user=user, lastName=user.username, **fields) for user in users)
+
+
+def make_jobs(posters, per_poster, **kwargs):
+    """``per_poster`` jobs for each of ``posters`` in one INSERT."""
+    from django.utils import timezone
+
+    from JobListingPage.models import Job
+
+    jobs = []
+    for poster in posters:
+        for i in range(per_poster):
+            job = Job(**{
+                "title": f"Shift {i}", "description": "Warehouse shift", "contract_duration": "2hrs Contract",
+                "job_date": timezone.now() + timedelta(days=1 + i % 7), "location": "Ikeja, Lagos",
+                "payment": f"{30 + i % 40}.00", "applicants_needed": 5, "posted_by": poster, **kwargs,
+            })
+            job.fill_geo()
+            jobs.append(job)
+    return Job.objects.bulk_create(jobs)
+
+
+def routed_endpoints():
+    """The full route of every URL pattern, as ResolverMatch.route spells it, without DRF's format-suffix twins."""
+    routes = []
+
+    def walk(resolver, prefix):
+        for pattern in resolver.url_patterns:
+            route = URLResolver._join_route(prefix, str(pattern.pattern))
+            if isinstance(pattern, URLResolver):
+                walk(pattern, route)
+            elif "(?P<format>" not in route:
+                routes.append(route)
+
+    walk(get_resolver(), "")
+    return routes
+
+
+class EndpointBudgetMixin:
+    """
+    Hit every route a test class owns (``owned_routes``, a regex on the
+    route) and hold each request to a budget of database queries and
+    milliseconds. ``cases()`` lists the requests, in order, as built by
+    ``case()``; they share one database, so later cases see earlier writes.
+
+    A change that adds queries to an endpoint fails here: an N+1 on a page
+    of 20 rows blows any budget. If the extra work is intended, raise the
+    budget in the same change. A new route fails until it has a case.
+
+    Latency budgets are checked too, in every run. Wall time depends on the
+    machine, so they are loose, to catch gross regressions rather than
+    noise, and scaled by LATENCY_BUDGET_SCALE (default 3, which leaves a
+    shared CI runner plenty of room; 1 on a quiet machine to hold endpoints
+    to the budgets as written). LATENCY_BUDGETS=0 turns the check off.
+    """
+    owned_routes = None
+    default_ms = 250
+    check_latency = os.environ.get("LATENCY_BUDGETS", "1") != "0"
+    latency_scale = float(os.environ.get("LATENCY_BUDGET_SCALE", "3"))
+
+    def case(self, method, path, status, queries, data=None, headers=None, ms=None):
+        return {
+            "method": method, "path": path, "status": status, "queries": queries,
+            "data": data, "headers": headers or {}, "ms": ms or self.default_ms,
+        }
+
+    def bearer(self, user):
+        from authUser.views import MyTokenObtainPairSerializer
+
+        return {"Authorization": f"Bearer {MyTokenObtainPairSerializer.get_token(user).access_token}"}
+
+    def cases(self):
+        raise NotImplementedError
+
+    def request(self, case):
+        from rest_framework.test import APIClient
+
+        client = APIClient()
+        send = getattr(client, case["method"].lower())
+        start = time.perf_counter()
+        with CaptureQueriesContext(connection) as queries:
+            response = send(case["path"], case["data"], format="json", headers=case["headers"])
+            if response.streaming:
+                b"".join(response.streaming_content)
+        return response, queries, (time.perf_counter() - start) * 1000
+
+    def test_every_route_has_a_budget(self):
+        covered = {resolve(case["path"].split("?")[0]).route for case in self.cases()}
+        owned = {route for route in routed_endpoints() if re.match(self.owned_routes, route)}
+        self.assertFalse(owned - covered, "routes without a budget case")
+
+    def test_endpoints_stay_within_budget(self):
+        for case in self.cases():
+            with self.subTest(f"{case['method']} {case['path']}"):
+                response, queries, elapsed = self.request(case)
+                self.assertEqual(response.status_code, case["status"], getattr(response, "content", b"")[:500])
+                self.assertLessEqual(
+                    len(queries), case["queries"],
+                    "\n".join(query["sql"] for query in queries.captured_queries),
+                )
+                if self.check_latency:
+                    self.assertLess(elapsed, case["ms"] * self.latency_scale)
@@ -9,6 +9,8 @@ from rest_framework import permissions
 from drf_yasg.views import get_schema_view
 from drf_yasg import openapi
 
+from main.metrics import metrics_view
+
 
 
 schema_view = get_schema_view(
@@ -35,6 +37,7 @@ urlpatterns = [
     #path("token/", include("rest_framework_simplejwt.urls")),
     
     path("admin/", admin.site.urls),
+    path("metrics", metrics_view, name="metrics"),
     path("userApi/v1/", include("authUser.urls")),
     path("jobListing/v1/", include("JobListingPage.urls")),
    